@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 class BinanceClient:
     def __init__(self, config):
         self.config = config
+        self.testnet = config.get('testnet', False)
         self.exchange = ccxt.binance({
             'apiKey': config['api_key'],
             'secret': config['api_secret'],
@@ -18,13 +19,15 @@ class BinanceClient:
             'options': {
                 'defaultType': 'future',
                 'adjustForTimeDifference': True,
-                'recvWindow': 10000
+                'recvWindow': 10000,
+                # account snapshots fetch open orders for all symbols at once
+                'warnOnFetchOpenOrdersWithoutSymbol': False,
             }
         })
-        if config.get('testnet', False):
+        if self.testnet:
             self.exchange.set_sandbox_mode(True)
         logger.info(
-            "BinanceClient initialized (testnet)" if config.get('testnet', False)
+            "BinanceClient initialized (testnet)" if self.testnet
             else "BinanceClient initialized (mainnet)"
         )
 
@@ -1,16 +1,18 @@
 import asyncio
 import logging
-import os
 from collections import defaultdict
 from datetime import datetime
 
-import joblib
 import pandas as pd
 import numpy as np
 
 from api_client import BinanceClient
 from signal_engine import SignalEngine
-from features import extract_features
+from compute_executor import ComputeExecutor
+from exchange_metadata import ExchangeMetadata
+from order_book import OrderBookManager
+from rate_limit import DEPTH_SNAPSHOT_LIMIT, RateBudget, depth_weight
+from features import latest_features
 import talib
 
 logger = logging.getLogger(__name__)
@@ -50,7 +52,6 @@ class AsyncMultiMAStrategy:
         self.client = client
         self.config = config
         self.signal_engine = SignalEngine(config.get("model_path", "model_xgb.pkl"))
-        self.model = self._load_model(config.get("model_path", "model_xgb.pkl"))
         self.symbols = config.get("symbols", [])
         self.timeframes = config.get("timeframes", [])
         self.data = defaultdict(lambda: defaultdict(pd.DataFrame))
@@ -58,20 +59,37 @@ class AsyncMultiMAStrategy:
         self.trade_value = config.get("trade_value", 50)
         self.min_ai_confidence = config.get("min_ai_confidence", 0.5)
         self.model_required = config.get("model_required", True)
+        self.model_reload_interval = config.get("model_reload_interval", 30)
+        self.executor = ComputeExecutor.from_config(config)
+        self.metadata = ExchangeMetadata(
+            self._fetch_exchange_info,
+            config.get("exchange_info_path", "data/exchange_info.json"),
+            config.get("exchange_info_ttl", 6 * 3600),
+        )
+        self.rate_budget = RateBudget(config.get("rate_limit_weight", 1200))
+        self.order_books = OrderBookManager(self._fetch_depth_snapshot, config.get("order_book_max_age", 5))
+        self.depth_bps = config.get("depth_bps", 10)
+
+    @property
+    def model(self):
+        """Active model of the signal engine; follows hot reloads."""
+        return self.signal_engine.model
+
+    async def _fetch_exchange_info(self):
+        return await self.client.exchange.fapiPublicGetExchangeInfo()
+
+    async def _fetch_depth_snapshot(self, symbol):
+        await self.rate_budget.acquire(depth_weight(DEPTH_SNAPSHOT_LIMIT))
+        return await self.client.exchange.fetch_order_book(symbol, limit=DEPTH_SNAPSHOT_LIMIT)
+
+    def process_depth(self, symbol, event):
+        self.order_books.on_depth(symbol, event)
 
-    def _load_model(self, path: str):
-        if not os.path.isfile(path):
-            logger.warning("Model file not found: %s", path)
-            return None
+    async def async_init(self):
         try:
-            model = joblib.load(path)
-            logger.info("Model loaded from %s", path)
-            return model
+            await self.metadata.load()
         except Exception as exc:
-            logger.error("Could not load model: %s", exc)
-            return None
-
-    async def async_init(self):
+            logger.error("Could not load exchange metadata: %s", exc)
         for symbol in self.symbols:
             for tf in self.timeframes:
                 candles = await self.client.fetch_candles(symbol, tf, limit=100)
@@ -81,6 +99,9 @@ class AsyncMultiMAStrategy:
                 self.data[symbol][tf] = candles.set_index("timestamp")
 
     def process_timeframe_data(self, symbol: str, timeframe: str, candle: pd.Series):
+        if isinstance(candle, tuple):
+            candle = pd.Series(candle[1:], index=["open", "high", "low", "close", "volume"],
+                               name=pd.Timestamp(candle[0], unit="ms"))
         df = self.data[symbol][timeframe]
         if df.empty or candle.name > df.index[-1]:
             df = pd.concat([df, candle.to_frame().T])
@@ -97,31 +118,27 @@ class AsyncMultiMAStrategy:
         direction, score = calculate_score(indicators)
         return direction, score
 
-    def ai_accepts_trade(self, features: pd.DataFrame, direction: str) -> bool:
-        if self.model is None:
-            return not self.model_required
-        X = features.tail(1)
-        if X.isnull().any().any():
-            return False
-        prob = self.model.predict_proba(X)[0][1]
-        logger.debug("AI probability %.2f for %s", prob, direction)
-        if direction == "long":
-            return prob >= self.min_ai_confidence
-        if direction == "short":
-            return prob <= (1 - self.min_ai_confidence)
-        return False
-
     async def try_enter(self, symbol: str, tf: str, direction: str, candle: pd.Series):
         price = float(candle["close"])
-        qty = round(self.trade_value * self.leverage[symbol] / price, 6)
-        order_book = await self.client.exchange.fetch_order_book(symbol, limit=5)
-        bid = float(order_book["bids"][0][0])
-        ask = float(order_book["asks"][0][0])
-        spread = (ask - bid) / bid
+        qty = self.trade_value * self.leverage[symbol] / price
+        qty = self.metadata.round_qty(symbol, qty) if symbol in self.metadata else round(qty, 6)
+        if not self.metadata.check_order(symbol, qty, price):
+            logger.warning("Order size %.6f below exchange minimums for %s", qty, symbol)
+            return
+        book = self.order_books.get(symbol)
+        if book is not None:
+            spread = book.spread
+            depth = book.depth("bids", self.depth_bps)
+        else:
+            order_book = await self.client.exchange.fetch_order_book(symbol, limit=5)
+            bid = float(order_book["bids"][0][0])
+            ask = float(order_book["asks"][0][0])
+            spread = (ask - bid) / bid
+            depth = float(order_book["bids"][0][1])
         if spread > 0.002:
             logger.warning("High spread %.2f%% for %s", spread * 100, symbol)
             return
-        depth_ok = float(order_book["bids"][0][1]) > qty * 3
+        depth_ok = depth > qty * 3
         if not depth_ok:
             logger.warning("Low liquidity for %s", symbol)
             return
@@ -132,19 +149,75 @@ class AsyncMultiMAStrategy:
         logger.info("OPEN %s %s qty %.6f @ %.2f", side, symbol, qty, price)
         # Actual order logic would go here
 
+    async def ai_accepts_batch(self, candidates: dict) -> dict:
+        """Score ``{(symbol, tf): (direction, feature_row)}`` in one model call."""
+        if self.signal_engine.model is None:
+            return {key: not self.model_required for key in candidates}
+        rows = {key: row for key, (_, row) in candidates.items() if not np.isnan(row).any()}
+        results = await self.executor.submit_local(None, self.signal_engine.score_batch, rows)
+        accepted = {}
+        for key, (direction, _) in candidates.items():
+            if key not in results:
+                accepted[key] = False
+                continue
+            prob = results[key]["confidence"]
+            logger.debug("AI probability %.2f for %s", prob, direction)
+            if direction == "long":
+                accepted[key] = prob >= self.min_ai_confidence
+            elif direction == "short":
+                accepted[key] = prob <= (1 - self.min_ai_confidence)
+            else:
+                accepted[key] = False
+        return accepted
+
     async def run(self):
+        watcher = None
+        if self.model_reload_interval:
+            watcher = asyncio.create_task(self.signal_engine.watch_model(self.model_reload_interval))
+        metadata_refresh = asyncio.create_task(self.metadata.run_refresh())
+        try:
+            await self._run_cycles()
+        finally:
+            if watcher:
+                watcher.cancel()
+            metadata_refresh.cancel()
+            self.executor.shutdown()
+
+    async def evaluate(self, symbol: str, tf: str):
+        """Score one timeframe in the compute executor.
+
+        Returns ``(direction, feature_row)``; the row is ``None`` without a
+        signal.  Both callables are top-level functions so this also works
+        with ``compute_mode: process``.
+        """
+        df = self.data[symbol][tf]
+        indicators = await self.executor.submit((symbol, tf), calculate_indicators, df, self.config, symbol)
+        direction, _ = calculate_score(indicators)
+        if not direction:
+            return None, None
+        return direction, await self.executor.submit((symbol, tf), latest_features, df)
+
+    async def _run_cycles(self):
         while True:
+            jobs = {}
             for symbol in self.symbols:
                 for tf in self.timeframes:
                     df = self.data[symbol][tf]
                     if df.empty or len(df) < 30:
                         continue
-                    direction, score = self.get_signal_for_timeframe(symbol, tf)
-                    if direction:
-                        feats = extract_features(df.copy())
-                        if not self.ai_accepts_trade(feats, direction):
-                            logger.info("Signal rejected by AI: %s %s", symbol, tf)
-                            continue
-                        await self.try_enter(symbol, tf, direction, df.iloc[-1])
+                    jobs[(symbol, tf)] = self.evaluate(symbol, tf)
+            results = await asyncio.gather(*jobs.values())
+            candidates = {
+                key: (direction, row)
+                for key, (direction, row) in zip(jobs, results)
+                if direction
+            }
+            accepted = await self.ai_accepts_batch(candidates)
+            for (symbol, tf), (direction, _) in candidates.items():
+                if not accepted[(symbol, tf)]:
+                    logger.info("Signal rejected by AI: %s %s", symbol, tf)
+                    continue
+                df = self.data[symbol][tf]
+                await self.try_enter(symbol, tf, direction, df.iloc[-1])
             await asyncio.sleep(15)
 
@@ -3,7 +3,6 @@
 import pandas as pd
 import numpy as np
 import ccxt
-import joblib
 import xgboost as xgb
 import talib
 import time
@@ -11,17 +10,63 @@ import os
 import logging
 import json
 from sklearn.utils.class_weight import compute_class_weight
-from features import extract_features
+from features import FEATURE_COLUMNS, latest_features
+from signal_engine import dump_model
+from backtest_engine import resample_candles
+from candle_aggregator import period_start
+from candle_store import timeframe_to_ms
+from ohlcv_store import OHLCVStore
 
 logger = logging.getLogger(__name__)
 
-def fetch_ohlcv(symbol, timeframe, since, limit=300):
+def _covering(df, timeframe, since, limit, now_ms):
+    """``df`` if it is what the exchange would return for ``since``/``limit``.
+
+    That is a gap-free run opening within one candle of ``since`` that holds
+    ``limit`` candles or reaches the newest closed one.
+    """
+    df = df.iloc[:limit]
+    if not len(df):
+        return None
+    step = timeframe_to_ms(timeframe)
+    ts = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    complete = len(df) == limit or ts[-1] + 2 * step > now_ms
+    if complete and ts[0] - since < step and (np.diff(ts) == step).all():
+        return df.reset_index(drop=True)
+    return None
+
+def _resampled_frame(store, symbol, timeframe, since, limit, base):
+    """``timeframe`` candles built from the stored ``base`` candles."""
+    step = timeframe_to_ms(timeframe)
+    start = period_start(since + step - 1, timeframe)
+    timestamps, values = store.read(symbol, base, start=start, end=start + limit * step)
+    timestamps, values = resample_candles(timestamps, values, base, timeframe)
+    df = pd.DataFrame(values.T, columns=['open', 'high', 'low', 'close', 'volume'])
+    df.insert(0, 'timestamp', pd.to_datetime(timestamps, unit='ms'))
+    return df
+
+def fetch_ohlcv(symbol, timeframe, since, limit=300, store=None, base='5m'):
+    """``limit`` candles from ``since``, from the local store when it has them all.
+
+    Timeframes missing from the store are aggregated from its ``base``
+    candles; only when neither covers the period is the exchange asked.
+    """
+    store = store or OHLCVStore()
+    now_ms = int(time.time() * 1000)
+    df = _covering(store.read_frame(symbol, timeframe, start=since), timeframe, since, limit, now_ms)
+    if df is None and timeframe_to_ms(timeframe) > timeframe_to_ms(base):
+        df = _resampled_frame(store, symbol, timeframe, since, limit, base)
+        df = _covering(df, timeframe, since, limit, now_ms)
+    if df is not None:
+        return df
     binance = ccxt.binance({
         'enableRateLimit': True,
     })
     binance.options['defaultType'] = 'future'
     try:
         data = binance.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        # Only exchange requests need spacing out.
+        time.sleep(0.1)
         df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         return df
@@ -66,6 +111,7 @@ def train_from_log(trade_log='data/trade_log.csv', config_file='config.json'):
         return
 
     X, y = [], []
+    store = OHLCVStore(cfg.get('ohlcv_store') or 'data/ohlcv')
 
     for _, row in trades.iterrows():
         symbol = row['symbol']
@@ -73,7 +119,7 @@ def train_from_log(trade_log='data/trade_log.csv', config_file='config.json'):
         timestamp = pd.to_datetime(row['timestamp'])
         since = int((timestamp - pd.Timedelta(minutes=600)).timestamp() * 1000)
 
-        df = fetch_ohlcv(symbol, timeframe, since)
+        df = fetch_ohlcv(symbol, timeframe, since, store=store)
         if df is None or df.empty:
             logger.warning(f"Dados vazios para {symbol} {timeframe}, pulando...")
             continue
@@ -84,7 +130,7 @@ def train_from_log(trade_log='data/trade_log.csv', config_file='config.json'):
         macd_fast = cfg.get('macd_fast', 12)
         macd_slow = cfg.get('macd_slow', 26)
         macd_signal = cfg.get('macd_signal', 9)
-        feats = extract_features(
+        feats = latest_features(
             df,
             bb_period=bb_period,
             bb_k=bb_k,
@@ -96,15 +142,13 @@ def train_from_log(trade_log='data/trade_log.csv', config_file='config.json'):
             macd_slow=macd_slow,
             macd_signal=macd_signal,
         )
-        if feats.empty:
+        if np.isnan(feats).any():
             logger.warning(f"Features vazias para {symbol} {timeframe}, pulando...")
             continue
 
-        X.append(feats.iloc[-1])
+        X.append(feats)
         y.append(1 if row['result'].lower() == 'win' else 0)
 
-        time.sleep(0.1)
-
     if not X:
         logger.error("Nenhum dado válido coletado para treino.")
         return
@@ -115,13 +159,13 @@ def train_from_log(trade_log='data/trade_log.csv', config_file='config.json'):
         logger.error("ERRO: Apenas uma classe detectada no vetor y. Adicione mais trades de tipos diferentes (win/loss).")
         return
 
-    df_X = pd.DataFrame(X)
+    df_X = pd.DataFrame(X, columns=FEATURE_COLUMNS)
     # Compute class weights for balancing
     class_weights = compute_class_weight('balanced', classes=np.unique(y), y=np.array(y))
     weight_dict = {0: class_weights[0], 1: class_weights[1]}
     model = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss', scale_pos_weight=weight_dict[1]/weight_dict[0])
     model.fit(df_X, y)
-    joblib.dump(model, "model_xgb.pkl")
+    dump_model(model, "model_xgb.pkl")
     logger.info("Modelo treinado e salvo como model_xgb.pkl")
 
 if __name__ == "__main__":
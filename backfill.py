@@ -0,0 +1,76 @@
+"""Fetch only the candles missed while the market-data streams were down."""
+
+import asyncio
+import logging
+import time
+
+from candle_store import timeframe_to_ms
+from rate_limit import klines_weight
+
+logger = logging.getLogger(__name__)
+
+
+def missing_range(last_ts, timeframe, now_ms, max_candles=None):
+    """Return ``(since, count)`` of closed candles after ``last_ts`` or ``None``.
+
+    ``max_candles`` caps the range to the newest candles, since anything
+    older would be evicted from a fixed-size buffer anyway.
+    """
+    step = timeframe_to_ms(timeframe)
+    last_closed = (now_ms // step - 1) * step
+    count = (last_closed - last_ts) // step
+    if count <= 0:
+        return None
+    if max_candles is not None and count > max_candles:
+        count = max_candles
+    return last_closed - (count - 1) * step, count
+
+
+async def fetch_range(fetch_ohlcv, symbol, timeframe, since, count, budget=None, page_limit=1000):
+    """Page through ``count`` candles from ``since`` with ``fetch_ohlcv``."""
+    step = timeframe_to_ms(timeframe)
+    until = since + (count - 1) * step
+    rows = []
+    while since <= until:
+        limit = min(page_limit, (until - since) // step + 1)
+        if budget is not None:
+            await budget.acquire(klines_weight(limit))
+        page = await fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        page = [row for row in page if since <= row[0] <= until]
+        if not page:
+            break
+        rows.extend(page)
+        since = page[-1][0] + step
+    return rows
+
+
+async def backfill_gaps(fetch_ohlcv, targets, max_candles=None, budget=None, concurrency=8, now_ms=None):
+    """Fetch the gap after each ``{(symbol, timeframe): last_ts}`` target.
+
+    Ranges are fetched concurrently, at most ``concurrency`` at a time and
+    within ``budget``.  Returns ``{(symbol, timeframe): rows}`` for targets
+    that had a gap, each list sorted and free of duplicates; failures are
+    logged and left out.
+    """
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(symbol, timeframe, since, count):
+        async with slots:
+            try:
+                rows = await fetch_range(fetch_ohlcv, symbol, timeframe, since, count, budget)
+            except Exception as e:
+                logger.error(f"Backfill failed for {symbol} {timeframe}: {e}")
+                return None
+        return sorted({row[0]: row for row in rows}.values())
+
+    jobs = {}
+    for (symbol, timeframe), last_ts in targets.items():
+        gap = missing_range(last_ts, timeframe, now_ms, max_candles)
+        if gap is not None:
+            jobs[(symbol, timeframe)] = one(symbol, timeframe, *gap)
+    results = await asyncio.gather(*jobs.values())
+    filled = {key: rows for key, rows in zip(jobs, results) if rows}
+    if jobs:
+        logger.info(f"Backfilled {sum(map(len, filled.values()))} candles for {len(filled)}/{len(jobs)} gaps")
+    return filled
@@ -1,8 +1,22 @@
-"""Simple backtesting engine that replays trades from the log."""
+"""Backtests: trade-log replay and a bar-by-bar simulation of the live strategy."""
+
+import os
+from collections import deque
 
 import pandas as pd
 import numpy as np
 
+from candle_aggregator import period_start
+from candle_archive import CandleArchive
+from candle_store import frame_to_arrays, timeframe_to_ms, to_millis
+from indicators import indicator_params, score_arrays
+from ohlcv_store import OHLCVStore
+
+TIMEFRAMES = ['5m', '15m', '30m', '1h', '4h', '1d']
+# Mirrors LiveMAStrategy.calculate_cooldown.
+COOLDOWN_MINUTES = {'5m': 15, '15m': 30, '30m': 45, '1h': 30, '4h': 45, '1d': 60}
+DAY_MS = 86_400_000
+
 # Simples motor de backtest baseado nos logs + sinais simulados
 
 def simulate_trades(trade_log_path='data/trade_log.csv', initial_balance=1000):
@@ -62,6 +76,251 @@ def simulate_trades(trade_log_path='data/trade_log.csv', initial_balance=1000):
 
     return metrics, equity_curve
 
+def load_candles(symbol, timeframe, start=None, end=None, root='data/ohlcv'):
+    """Stored candles of ``symbol``/``timeframe`` between ``start`` and ``end``.
+
+    Bounds accept anything ``pd.Timestamp`` understands; no exchange calls.
+    """
+    start = None if start is None else to_millis(start)
+    end = None if end is None else to_millis(end)
+    return OHLCVStore(root).read_frame(symbol, timeframe, start, end)
+
+def open_archive(symbol, timeframe, root='data/archive', store_root='data/ohlcv', dtype=np.float64):
+    """Memory-mapped archive of ``symbol``/``timeframe`` in sync with the OHLCV store.
+
+    The archive is built from the store on first use and rebuilt when the
+    store's candle count or newest candle no longer match it.  Pass
+    ``dtype=np.float32`` to halve the footprint of multi-year runs.
+    """
+    path = os.path.join(root, f"{symbol.replace('/', '')}_{timeframe}")
+    store = OHLCVStore(store_root)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        archive = CandleArchive(path)
+        last = int(archive.timestamps[-1]) if len(archive) else None
+        if (archive.dtype == np.dtype(dtype) and last == store.last_timestamp(symbol, timeframe)
+                and len(archive) == store.count(symbol, timeframe)):
+            return archive
+    return CandleArchive.from_store(store, symbol, timeframe, path, dtype)
+
+def candle_arrays(candles):
+    """Int64 ms timestamps and a ``(5, n)`` OHLCV array of a candle frame,
+    a dict of columns or a ``CandleWindow``."""
+    if isinstance(candles, pd.DataFrame):
+        return frame_to_arrays(candles)
+    if isinstance(candles, dict):
+        columns = candles
+    else:
+        columns = {name: getattr(candles, name) for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume')}
+    timestamps = np.asarray(columns['timestamp'])
+    if timestamps.dtype.kind == 'M':
+        timestamps = timestamps.astype('datetime64[ms]')
+    values = np.vstack([np.asarray(columns[name], dtype=float) for name in ('open', 'high', 'low', 'close', 'volume')])
+    return timestamps.astype(np.int64), values
+
+def resample_candles(timestamps, values, base, timeframe):
+    """Aggregate ``base`` candles into complete ``timeframe`` candles.
+
+    Periods missing base candles, including a trailing forming one, are
+    dropped rather than reported with partial OHLCV.
+    """
+    n = len(timestamps)
+    if not n:
+        return timestamps[:0], values[:, :0]
+    starts = period_start(timestamps, timeframe)
+    bounds = np.flatnonzero(np.diff(starts)) + 1
+    first = np.concatenate(([0], bounds))
+    last = np.concatenate((bounds, [n])) - 1
+    complete = last - first + 1 == timeframe_to_ms(timeframe) // timeframe_to_ms(base)
+    out = np.vstack([
+        values[0, first],
+        np.maximum.reduceat(values[1], first),
+        np.minimum.reduceat(values[2], first),
+        values[3, last],
+        np.add.reduceat(values[4], first),
+    ])
+    return starts[first][complete], out[:, complete]
+
+def cooldown_minutes(close, timeframe, capacity=300):
+    """``LiveMAStrategy.calculate_cooldown`` after every candle of ``close``."""
+    close = np.asarray(close, dtype=float)
+    returns = pd.Series(np.diff(close, prepend=np.nan) / np.concatenate(([np.nan], close[:-1])))
+    # The live buffer holds ``capacity`` closes, i.e. ``capacity - 1`` returns.
+    vol = returns.rolling(capacity - 1, min_periods=9).std().to_numpy() * 100
+    minutes = np.minimum(COOLDOWN_MINUTES.get(timeframe, 30) * (1 + vol), 1440)
+    return np.where(np.isnan(minutes), 30.0, minutes)
+
+def _timeframe_arrays(candles, timeframe, timeframes):
+    if isinstance(candles, dict) and 'close' not in candles:
+        frames = {tf: candle_arrays(c) for tf, c in candles.items()}
+    else:
+        ts, values = candle_arrays(candles)
+        frames = {timeframe: (ts, values)}
+        base_ms = timeframe_to_ms(timeframe)
+        for tf in timeframes or TIMEFRAMES:
+            if timeframe_to_ms(tf) > base_ms:
+                frames[tf] = resample_candles(ts, values, timeframe, tf)
+    return dict(sorted(frames.items(), key=lambda item: timeframe_to_ms(item[0])))
+
+def strategy_signals(frames, params, capacity=300):
+    """Entry signals of ``LiveMAStrategy.check_multi_timeframe_signal`` at every base candle close.
+
+    ``frames`` maps timeframes, shortest first, to ``(timestamps, values)``;
+    the first one is the base.  At each base close only the higher-timeframe
+    candles closed by then are visible.  Returns ``(side, tf_index,
+    cooldown_ms)`` arrays aligned with the base candles, where ``side`` is
+    ``1`` (long), ``-1`` (short) or ``0``.
+    """
+    tfs = list(frames)
+    base_ts = frames[tfs[0]][0]
+    base_close = base_ts + timeframe_to_ms(tfs[0])
+    n = len(base_ts)
+    scores = np.zeros((len(tfs), n))
+    cooldown = np.full((len(tfs), n), 30.0)
+    for k, tf in enumerate(tfs):
+        ts, values = frames[tf]
+        if not len(ts):
+            continue
+        # Index of the newest candle closed at each base close.
+        idx = np.searchsorted(ts + timeframe_to_ms(tf), base_close, side='right') - 1
+        seen = idx >= 0
+        scores[k, seen] = score_arrays(values[1], values[2], values[3], **params)[idx[seen]]
+        cooldown[k, seen] = cooldown_minutes(values[3], tf, capacity)[idx[seen]]
+    direction = np.where(scores >= 1.5, 1, np.where(scores <= -1.5, -1, 0)).astype(np.int8)
+
+    side = np.zeros(n, dtype=np.int8)
+    tf_index = np.full(n, -1)
+    active = direction != 0
+    longs = (direction > 0).sum(axis=0)
+    shorts = (direction < 0).sum(axis=0)
+    agree = (active.sum(axis=0) >= 2) & ((longs == 0) | (shorts == 0))
+    side[agree] = np.sign(longs - shorts)[agree]
+    tf_index[agree] = np.argmax(active, axis=0)[agree]
+    # A strong 1h/4h/1d score wins, checked in that order.
+    for tf in reversed(['1h', '4h', '1d']):
+        if tf in frames:
+            k = tfs.index(tf)
+            strong = np.abs(scores[k]) >= 3
+            side[strong] = direction[k, strong]
+            tf_index[strong] = k
+    cooldown_ms = np.zeros(n)
+    entries = tf_index >= 0
+    cooldown_ms[entries] = cooldown[tf_index[entries], np.flatnonzero(entries)] * 60_000
+    return side, tf_index, cooldown_ms
+
+def _first_exit(high, low, close, start, side, tp, sl, chunk=256):
+    """Index and price of the first candle from ``start`` touching ``tp`` or ``sl``."""
+    n = len(close)
+    i = start
+    while i < n:
+        j = min(i + chunk, n)
+        if side > 0:
+            hit_sl, hit_tp = low[i:j] <= sl, high[i:j] >= tp
+        else:
+            hit_sl, hit_tp = high[i:j] >= sl, low[i:j] <= tp
+        hit = hit_sl | hit_tp
+        if hit.any():
+            k = int(np.argmax(hit))
+            # Both levels inside one candle: assume the stop filled first.
+            return i + k, (sl if hit_sl[k] else tp)
+        i = j
+        chunk *= 2
+    return n - 1, close[n - 1]
+
+def simulate_strategy(candles, config, symbol, timeframe='5m', timeframes=None,
+                      initial_balance=1000, fee=0.0004, margin=50):
+    """Simulate ``LiveMAStrategy`` entries and TP/SL exits over historical candles.
+
+    ``candles`` is one candle source (frame, dict of columns or archive
+    window) of ``timeframe``, from which the other ``timeframes`` (default the
+    live ones) are aggregated, or a dict mapping timeframes to sources.
+    Entries fill at the signal candle's close with ``margin`` times leverage
+    notional, TP/SL follow ``calculate_tp_sl`` (capped at 5% like
+    ``set_tp``/``set_sl``) and are checked on the following base candles,
+    ``fee`` is charged on both sides, and cooldowns and
+    ``max_trades_per_day`` gate entries.  The AI and liquidity checks are
+    not simulated.
+
+    Returns a DataFrame of trades and the balance after every base candle.
+    """
+    frames = _timeframe_arrays(candles, timeframe, timeframes)
+    tfs = list(frames)
+    side, tf_index, cooldown_ms = strategy_signals(
+        frames, indicator_params(config, symbol), config.get('candle_capacity', 300))
+    ts, values = frames[tfs[0]]
+    _, high, low, close, _ = values
+    close_time = ts + timeframe_to_ms(tfs[0])
+    leverage = config.get('leverage', 10)
+    tp_pct = min(config.get('tp', {}).get(symbol, 0.04) / leverage, 0.05)
+    sl_pct = min(config.get('sl', {}).get(symbol, 0.025) / leverage, 0.05)
+    max_trades = config.get('max_trades_per_day', 5)
+    notional = margin * leverage
+
+    # A signal on the last candle has no later candle to exit on.
+    candidates = np.flatnonzero(side[:-1])
+    trades = []
+    recent = deque()
+    balance = initial_balance
+    ready_at = None
+    i = 0
+    while balance >= margin:
+        k = np.searchsorted(candidates, i)
+        if k == len(candidates):
+            break
+        i = candidates[k]
+        now = close_time[i]
+        if ready_at is not None and now < ready_at:
+            i = np.searchsorted(close_time, ready_at)
+            continue
+        while recent and recent[0] <= now - DAY_MS:
+            recent.popleft()
+        if len(recent) >= max_trades:
+            i = np.searchsorted(close_time, recent[0] + DAY_MS)
+            continue
+        direction = int(side[i])
+        entry = close[i]
+        tp = entry * (1 + direction * tp_pct)
+        sl = entry * (1 - direction * sl_pct)
+        exit_i, exit_price = _first_exit(high, low, close, i + 1, direction, tp, sl)
+        ratio = exit_price / entry
+        fees = fee * notional * (1 + ratio)
+        pnl = direction * notional * (ratio - 1) - fees
+        balance += pnl
+        trades.append((ts[i], ts[exit_i], tfs[tf_index[i]], 'long' if direction > 0 else 'short',
+                       entry, exit_price, pnl, fees, i, exit_i))
+        recent.append(now)
+        ready_at = now + cooldown_ms[i]
+        # The position is flat again at the close of the exit candle.
+        i = max(exit_i, i + 1)
+
+    trades = pd.DataFrame(trades, columns=['entry_time', 'exit_time', 'timeframe', 'side', 'entry_price',
+                                           'exit_price', 'pnl', 'fees', 'entry_index', 'exit_index'])
+    trades['result'] = np.where(trades['pnl'] > 0, 'win', 'loss')
+    for column in ('entry_time', 'exit_time'):
+        trades[column] = pd.to_datetime(trades[column].astype(np.int64), unit='ms')
+    realized = np.bincount(trades['exit_index'].to_numpy(dtype=np.int64), weights=trades['pnl'].to_numpy(dtype=float),
+                           minlength=len(ts))
+    equity = pd.Series(initial_balance + np.cumsum(realized), index=pd.to_datetime(ts, unit='ms'))
+    return trades, equity
+
+def backtest_strategy(candles, config, symbol, timeframe='5m', timeframes=None,
+                      initial_balance=1000, fee=0.0004, margin=50):
+    """Backtest the live strategy on ``candles``; see ``simulate_strategy``.
+
+    Returns the ``simulate_trades`` metrics and the per-candle equity curve.
+    """
+    trades, equity = simulate_strategy(candles, config, symbol, timeframe, timeframes,
+                                       initial_balance, fee, margin)
+    balances = [initial_balance] + (initial_balance + trades['pnl'].cumsum()).tolist()
+    total = len(trades)
+    metrics = {
+        'Total Trades': total,
+        'Win Rate': round((trades['result'] == 'win').mean() * 100, 2) if total else 0,
+        'Final Balance': round(balances[-1], 2),
+        'Max Drawdown': round(max_drawdown_calc(balances), 2) if total else 0,
+        'Sharpe Ratio': round(calc_sharpe(np.array(balances)), 2) if total > 1 else 0,
+    }
+    return metrics, equity
+
 def max_drawdown_calc(equity):
     peak = equity[0]
     drawdowns = []
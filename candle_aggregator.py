@@ -0,0 +1,100 @@
+"""Higher-timeframe candles built locally from one base kline stream."""
+
+import numpy as np
+
+from candle_store import timeframe_to_ms
+
+# Binance weeks open on Monday; the epoch fell on a Thursday.
+_WEEK_OFFSET = 4 * 86_400_000
+
+
+def period_start(ts, timeframe):
+    """Open time of the ``timeframe`` bar containing ``ts`` (ms, UTC)."""
+    duration = timeframe_to_ms(timeframe)
+    offset = _WEEK_OFFSET if timeframe.endswith('w') else 0
+    return ts - (ts - offset) % duration
+
+
+class CandleAggregator:
+    """Fold closed ``base`` candles into every higher timeframe of one symbol.
+
+    ``update`` takes one closed base candle ``(ts, open, high, low, close,
+    volume)`` and returns the higher-timeframe candles it completed.  A bar
+    is only emitted if every base candle of its period was seen, so its
+    OHLCV matches the exchange kline; periods with missing base candles
+    (startup, outages) are reported in ``incomplete`` instead.
+    """
+
+    def __init__(self, base, timeframes):
+        self.base = base
+        self.base_ms = timeframe_to_ms(base)
+        self.timeframes = [tf for tf in timeframes if timeframe_to_ms(tf) > self.base_ms]
+        for tf in self.timeframes:
+            if timeframe_to_ms(tf) % self.base_ms:
+                raise ValueError(f"{tf} is not a multiple of the base interval {base}")
+        self._index = {tf: i for i, tf in enumerate(self.timeframes)}
+        self._duration = np.array([timeframe_to_ms(tf) for tf in self.timeframes], dtype=np.int64)
+        self._offset = np.array([_WEEK_OFFSET if tf.endswith('w') else 0 for tf in self.timeframes], dtype=np.int64)
+        self._expected = self._duration // self.base_ms
+        n = len(self.timeframes)
+        self.start = np.full(n, -1, dtype=np.int64)
+        self.open = np.full(n, np.nan)
+        self.high = np.full(n, np.nan)
+        self.low = np.full(n, np.nan)
+        self.close = np.full(n, np.nan)
+        self.volume = np.zeros(n)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.last_ts = None
+        self.incomplete = []
+
+    def update(self, candle):
+        """Add a closed base candle; return ``[(timeframe, candle), ...]`` it completed."""
+        ts, o, h, l, c, v = candle
+        ts = int(ts)
+        if self.last_ts is not None and ts <= self.last_ts:
+            return []  # duplicate or out of order
+        self.last_ts = ts
+        starts = ts - (ts - self._offset) % self._duration
+        rolled = starts != self.start
+        if rolled.any():
+            for i in np.flatnonzero(rolled & (self.count > 0)):
+                # A period is only left without being emitted if base candles were missing.
+                self.incomplete.append((self.timeframes[i], int(self.start[i])))
+            self.start[rolled] = starts[rolled]
+            self.open[rolled] = o
+            self.high[rolled] = h
+            self.low[rolled] = l
+            self.volume[rolled] = 0.0
+            self.count[rolled] = 0
+        np.fmax(self.high, h, out=self.high)
+        np.fmin(self.low, l, out=self.low)
+        self.close[:] = c
+        self.volume += v
+        self.count += 1
+
+        done = []
+        period_end = ts + self.base_ms
+        for i in np.flatnonzero(starts + self._duration == period_end):
+            tf = self.timeframes[i]
+            if self.count[i] == self._expected[i]:
+                # Summing decimal volumes in binary floats drifts in the last
+                # digits; exchange quantities never carry more than 8 decimals.
+                done.append((tf, (int(self.start[i]), float(self.open[i]), float(self.high[i]),
+                                  float(self.low[i]), float(self.close[i]), round(float(self.volume[i]), 8))))
+            else:
+                self.incomplete.append((tf, int(self.start[i])))
+            self.count[i] = 0
+        return done
+
+    def forming(self, timeframe):
+        """Return the partial ``(start, open, high, low, close, volume)`` of ``timeframe`` or ``None``."""
+        i = self._index.get(timeframe)
+        if i is None or not self.count[i]:
+            return None
+        return (int(self.start[i]), float(self.open[i]), float(self.high[i]),
+                float(self.low[i]), float(self.close[i]), float(self.volume[i]))
+
+    def pop_incomplete(self):
+        """Return and clear the ``(timeframe, start)`` periods dropped since the last call."""
+        dropped, self.incomplete = self.incomplete, []
+        return dropped
@@ -0,0 +1,127 @@
+"""Read-only, memory-mapped candle archive for long backtests."""
+
+import json
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+from ohlcv_store import _month_bounds
+
+ARCHIVE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+# Zero-copy views of consecutive archived candles; works anywhere a candle
+# buffer with ``high``/``low``/``close``/``volume`` attributes does.
+CandleWindow = namedtuple('CandleWindow', ARCHIVE_COLUMNS)
+
+
+class CandleArchive:
+    """Fixed-schema columnar candles opened with ``np.memmap``.
+
+    A directory holds one raw file per column (``timestamp`` as int64 ms,
+    OHLCV as float64 or float32) plus ``meta.json``.  Nothing is read
+    until a slice is touched, time ranges are located by binary search on
+    the timestamps, and pickling only carries the path, so worker
+    processes map the same pages instead of receiving copies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        self.dtype = np.dtype(meta['dtype'])
+        self.count = int(meta['count'])
+        self.symbol = meta.get('symbol')
+        self.timeframe = meta.get('timeframe')
+        self._maps = {}
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        data = self._maps.get(name)
+        if data is None:
+            dtype = np.int64 if name == 'timestamp' else self.dtype
+            if self.count:
+                data = np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode='r', shape=(self.count,))
+            else:
+                data = np.empty(0, dtype=dtype)
+            self._maps[name] = data
+        return data
+
+    @property
+    def timestamps(self):
+        return self.column('timestamp')
+
+    def index_range(self, start=None, end=None):
+        """Row indices ``(i, j)`` of the candles with ``start <= ts < end`` (ms)."""
+        ts = self.timestamps
+        i = int(np.searchsorted(ts, start)) if start is not None else 0
+        j = int(np.searchsorted(ts, end)) if end is not None else self.count
+        return i, j
+
+    def rows(self, i, j):
+        """``CandleWindow`` of rows ``i:j``; every field is a view of the mapping."""
+        return CandleWindow(*(self.column(name)[i:j] for name in ARCHIVE_COLUMNS))
+
+    def window(self, start=None, end=None):
+        return self.rows(*self.index_range(start, end))
+
+    @classmethod
+    def write(cls, path, timestamps, values, dtype=np.float64, symbol=None, timeframe=None):
+        """Create an archive from int64 ``timestamps`` and a ``(5, n)`` OHLCV array."""
+        return cls._write(path, [(np.asarray(timestamps), np.asarray(values))], dtype, symbol, timeframe)
+
+    @classmethod
+    def from_store(cls, store, symbol, timeframe, path, dtype=np.float64):
+        """Archive everything an ``OHLCVStore`` holds, one month in memory at a time."""
+        chunks = (store.read(symbol, timeframe, *_month_bounds(month)) for month in store.months(symbol, timeframe))
+        return cls._write(path, chunks, dtype, symbol, timeframe)
+
+    @classmethod
+    def _write(cls, path, chunks, dtype, symbol, timeframe):
+        os.makedirs(path, exist_ok=True)
+        # Columns are written beside the old ones and swapped in, so archives
+        # already mapped from ``path`` keep reading their own files.
+        files = {name: open(os.path.join(path, f"{name}.bin.tmp"), 'wb') for name in ARCHIVE_COLUMNS}
+        count, last = 0, None
+        try:
+            for timestamps, values in chunks:
+                if not len(timestamps):
+                    continue
+                if np.any(np.diff(timestamps) <= 0) or (last is not None and timestamps[0] <= last):
+                    raise ValueError("timestamps must be strictly increasing")
+                files['timestamp'].write(np.ascontiguousarray(timestamps, dtype=np.int64).tobytes())
+                for name, column in zip(ARCHIVE_COLUMNS[1:], values):
+                    files[name].write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+                count += len(timestamps)
+                last = timestamps[-1]
+        except BaseException:
+            for f in files.values():
+                f.close()
+                os.remove(f.name)
+            raise
+        finally:
+            for f in files.values():
+                f.close()
+        for name in ARCHIVE_COLUMNS:
+            os.replace(os.path.join(path, f"{name}.bin.tmp"), os.path.join(path, f"{name}.bin"))
+        # meta.json last: an interrupted build leaves no readable archive.
+        fd, tmp = tempfile.mkstemp(dir=path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'dtype': np.dtype(dtype).name, 'count': count, 'symbol': symbol, 'timeframe': timeframe}, f)
+            os.replace(tmp, os.path.join(path, 'meta.json'))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return cls(path)
+
@@ -0,0 +1,273 @@
+"""Fixed-capacity, array-backed OHLCV storage for live candle streams."""
+
+import time
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+_FIELDS = {"open": 0, "high": 1, "low": 2, "close": 3, "volume": 4}
+_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_to_ms(timeframe):
+    """Duration of a Binance interval such as ``"5m"`` or ``"4h"`` in ms."""
+    return int(timeframe[:-1]) * _UNIT_MS[timeframe[-1]]
+
+
+def to_millis(value):
+    """Convert a candle timestamp (ms, ``pd.Timestamp`` or datetime64) to int ms."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+def frame_to_arrays(df):
+    """Split an OHLCV frame into int64 ms timestamps and a (5, n) float array."""
+    if "timestamp" in df:
+        ts = df["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(ts):
+            timestamps = ts.to_numpy().astype("datetime64[ms]").astype(np.int64)
+        elif pd.api.types.is_numeric_dtype(ts):
+            timestamps = ts.to_numpy(dtype=np.int64)
+        else:
+            timestamps = np.array([to_millis(t) for t in ts], dtype=np.int64)
+    else:
+        timestamps = np.arange(len(df), dtype=np.int64)
+    values = np.vstack([df[c].to_numpy(dtype=float) for c in COLUMNS[1:]])
+    return timestamps, values
+
+
+class CandleBuffer:
+    """Ring buffer of the most recent ``capacity`` candles.
+
+    Every candle is written twice, ``capacity`` slots apart, so the live window
+    is always one contiguous slice and the column properties are zero-copy
+    views.  Appending, and replacing the last candle, are O(1).
+    """
+
+    def __init__(self, capacity=300):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros((5, 2 * capacity), dtype=float)
+        self._start = 0
+        self._len = 0
+        self.version = 0
+        self._frame = None
+        self._frame_version = -1
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def last_timestamp(self):
+        """Open time (ms) of the newest candle or ``None`` when empty."""
+        if not self._len:
+            return None
+        return int(self._ts[self._start + self._len - 1])
+
+    def _write(self, pos, ts, values):
+        self._ts[pos] = ts
+        self._ts[pos + self.capacity] = ts
+        self._values[:, pos] = values
+        self._values[:, pos + self.capacity] = values
+
+    def append(self, ts, open_, high, low, close, volume):
+        """Store a candle and return ``"append"``, ``"replace"`` or ``"stale"``.
+
+        A candle with the newest timestamp replaces the stored copy; older
+        timestamps that are still in the window are replaced in place and
+        anything older than that is ignored as ``"stale"``.
+        """
+        ts = int(ts)
+        values = (open_, high, low, close, volume)
+        last = self.last_timestamp
+        if last is None or ts > last:
+            pos = (self._start + self._len) % self.capacity
+            self._write(pos, ts, values)
+            if self._len < self.capacity:
+                self._len += 1
+            else:
+                self._start = (self._start + 1) % self.capacity
+            status = "append"
+        else:
+            idx = int(np.searchsorted(self.timestamps, ts))
+            if idx >= self._len or self.timestamps[idx] != ts:
+                return "stale"
+            self._write((self._start + idx) % self.capacity, ts, values)
+            status = "replace"
+        self.version += 1
+        return status
+
+    def load(self, timestamps, values):
+        """Replace the contents with the last ``capacity`` rows of the arrays."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)[-self.capacity:]
+        values = np.asarray(values, dtype=float)[:, -self.capacity:]
+        n = len(timestamps)
+        self._ts[:n] = timestamps
+        self._ts[self.capacity:self.capacity + n] = timestamps
+        self._values[:, :n] = values
+        self._values[:, self.capacity:self.capacity + n] = values
+        self._start = 0
+        self._len = n
+        self.version += 1
+
+    def merge(self, timestamps, values):
+        """Insert candles at their place in time, keeping the newest ``capacity``.
+
+        Unlike ``append`` this accepts candles older than the last one, e.g. a
+        backfill finishing after newer candles arrived; rows for stored
+        timestamps replace them.  O(capacity).
+        """
+        ts = np.concatenate((np.asarray(timestamps, dtype=np.int64), self.timestamps))
+        merged = np.concatenate(
+            (np.asarray(values, dtype=float), self._values[:, self._start:self._start + self._len]), axis=1)
+        ts, first = np.unique(ts, return_index=True)
+        self.load(ts, merged[:, first])
+
+    def load_frame(self, df):
+        self.load(*frame_to_arrays(df))
+
+    def _view(self, row=None):
+        sl = slice(self._start, self._start + self._len)
+        return self._ts[sl] if row is None else self._values[row, sl]
+
+    @property
+    def timestamps(self):
+        return self._view()
+
+    @property
+    def open(self):
+        return self._view(0)
+
+    @property
+    def high(self):
+        return self._view(1)
+
+    @property
+    def low(self):
+        return self._view(2)
+
+    @property
+    def close(self):
+        return self._view(3)
+
+    @property
+    def volume(self):
+        return self._view(4)
+
+    def frame(self):
+        """DataFrame copy of the window, rebuilt only after the buffer changes."""
+        if self._frame_version != self.version:
+            data = {"timestamp": self.timestamps.astype("datetime64[ms]")}
+            for name, row in _FIELDS.items():
+                data[name] = self._view(row)
+            self._frame = pd.DataFrame(data, columns=COLUMNS)
+            self._frame_version = self.version
+        return self._frame
+
+
+class CandleStore(MutableMapping):
+    """Timeframe -> :class:`CandleBuffer` mapping that reads back as DataFrames.
+
+    Item access keeps working for code written against ``{tf: DataFrame}``;
+    assigning a frame loads it into a buffer and ``buffer`` exposes the arrays.
+    """
+
+    def __init__(self, capacity=300, frames=None):
+        self.capacity = capacity
+        self._buffers = {}
+        for tf, df in (frames or {}).items():
+            self[tf] = df
+
+    def buffer(self, timeframe):
+        """Return the buffer for ``timeframe``, creating an empty one."""
+        buf = self._buffers.get(timeframe)
+        if buf is None:
+            buf = self._buffers[timeframe] = CandleBuffer(self.capacity)
+        return buf
+
+    def buffers(self):
+        return self._buffers.items()
+
+    def __getitem__(self, timeframe):
+        return self._buffers[timeframe].frame()
+
+    def __setitem__(self, timeframe, df):
+        buf = CandleBuffer(self.capacity)
+        buf.load_frame(df)
+        self._buffers[timeframe] = buf
+
+    def __delitem__(self, timeframe):
+        del self._buffers[timeframe]
+
+    def __iter__(self):
+        return iter(self._buffers)
+
+    def __len__(self):
+        return len(self._buffers)
+
+
+class FormingBars:
+    """Still-open candle of every timeframe for one symbol.
+
+    Ticks (ticker or aggTrade prices) update close/high/low/volume for all
+    timeframes with a handful of vectorized NumPy operations; a tick past a
+    bar boundary starts a new bar for that timeframe.  Volume only grows
+    from ticks that carry a traded quantity (aggTrade).
+    """
+
+    def __init__(self, timeframes):
+        self.timeframes = list(timeframes)
+        self._index = {tf: i for i, tf in enumerate(self.timeframes)}
+        self._duration = np.array([timeframe_to_ms(tf) for tf in self.timeframes], dtype=np.int64)
+        n = len(self.timeframes)
+        self.start = np.full(n, -1, dtype=np.int64)
+        self.open = np.full(n, np.nan)
+        self.high = np.full(n, np.nan)
+        self.low = np.full(n, np.nan)
+        self.close = np.full(n, np.nan)
+        self.volume = np.zeros(n)
+
+    def update(self, price, qty=0.0, ts=None, high=None, low=None):
+        """Apply a trade or ticker price observed at ``ts`` (ms, default now).
+
+        ``high``/``low`` let callers pass the range of several coalesced ticks.
+        """
+        if ts is None:
+            ts = int(time.time() * 1000)
+        starts = ts - ts % self._duration
+        rolled = starts > self.start
+        if rolled.any():
+            self.start[rolled] = starts[rolled]
+            self.open[rolled] = price
+            self.high[rolled] = price
+            self.low[rolled] = price
+            self.volume[rolled] = 0.0
+        np.fmax(self.high, price if high is None else high, out=self.high)
+        np.fmin(self.low, price if low is None else low, out=self.low)
+        self.close[:] = price
+        if qty:
+            self.volume += qty
+
+    def close_bar(self, timeframe, ts):
+        """Forget the forming bar of ``timeframe`` once the candle at ``ts`` closed."""
+        i = self._index.get(timeframe)
+        if i is not None and self.start[i] <= ts:
+            # Keep the start so late ticks of the closed bar do not reopen it.
+            self.start[i] = ts
+            self.open[i] = self.high[i] = self.low[i] = np.nan
+            self.volume[i] = 0.0
+
+    def bar(self, timeframe):
+        """Return ``(start, open, high, low, close, volume)`` or ``None``."""
+        i = self._index.get(timeframe)
+        if i is None or np.isnan(self.open[i]):
+            return None
+        return (
+            int(self.start[i]), float(self.open[i]), float(self.high[i]),
+            float(self.low[i]), float(self.close[i]), float(self.volume[i]),
+        )
@@ -0,0 +1,97 @@
+"""Run CPU-bound indicator, feature and inference work off the event loop."""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MODES = ('thread', 'process', 'inline')
+
+
+class ComputeExecutor:
+    """Dispatch work to a thread or process pool keyed by ``(symbol, timeframe)``.
+
+    * Jobs whose keys share a symbol run one after another in submission
+      order, so a newer candle is never evaluated before an older one.
+    * At most ``max_pending`` jobs are in the pool at once; further
+      ``submit`` calls wait, which throttles producers instead of letting a
+      backlog build up.
+    * ``process`` mode needs picklable top-level callables and arguments.
+      Work bound to in-process state (a loaded model, strategy methods) goes
+      through ``submit_local``, which always uses threads.
+    * ``inline`` runs everything on the calling thread, handy for tests and
+      debugging.
+    """
+
+    def __init__(self, mode='thread', max_workers=None, max_pending=32):
+        if mode not in MODES:
+            raise ValueError(f"compute mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._threads = None
+        self._slots = asyncio.Semaphore(max_pending)
+        self._tails = {}
+        self.pending = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('compute_mode', 'thread'),
+            config.get('compute_workers'),
+            config.get('compute_max_pending', 32),
+        )
+
+    def _executor(self, local):
+        if self.mode == 'inline':
+            return None
+        if self.mode == 'process' and not local:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.max_workers)
+            return self._pool
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.max_workers, thread_name_prefix='compute')
+        return self._threads
+
+    async def submit(self, key, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the pool and return its result.
+
+        ``key`` is ``(symbol, timeframe)``, a bare symbol or ``None`` for work
+        that needs no ordering (e.g. a batch spanning many symbols).
+        """
+        return await self._submit(key, False, fn, args, kwargs)
+
+    async def submit_local(self, key, fn, *args, **kwargs):
+        """Like ``submit`` but never leaves the process."""
+        return await self._submit(key, True, fn, args, kwargs)
+
+    async def _submit(self, key, local, fn, args, kwargs):
+        symbol = key[0] if isinstance(key, tuple) else key
+        loop = asyncio.get_running_loop()
+        prev = self._tails.get(symbol) if symbol is not None else None
+        done = loop.create_future()
+        if symbol is not None:
+            self._tails[symbol] = done
+        self.pending += 1
+        try:
+            if prev is not None:
+                await asyncio.shield(prev)
+            async with self._slots:
+                executor = self._executor(local)
+                if executor is None:
+                    return fn(*args, **kwargs)
+                return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+            done.set_result(None)
+            if self._tails.get(symbol) is done:
+                del self._tails[symbol]
+
+    def shutdown(self, wait=False):
+        for pool in (self._pool, self._threads):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = self._threads = None
@@ -0,0 +1,173 @@
+"""Exchange metadata (precision and trading filters) fetched once and shared."""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+SymbolInfo = namedtuple(
+    'SymbolInfo',
+    'symbol price_precision quantity_precision tick_size step_size min_qty max_qty min_notional',
+)
+
+
+def market_id(symbol):
+    """``BTC/USDT`` or ``BTC/USDT:USDT`` -> ``BTCUSDT``."""
+    return symbol.split(':')[0].replace('/', '')
+
+
+def parse_exchange_info(info):
+    """Index a raw ``exchangeInfo`` payload by symbol."""
+    symbols = {}
+    for m in info.get('symbols', []):
+        filters = {f.get('filterType'): f for f in m.get('filters', [])}
+        price = filters.get('PRICE_FILTER', {})
+        lot = filters.get('LOT_SIZE', {})
+        notional = filters.get('MIN_NOTIONAL', {})
+        symbols[m['symbol']] = SymbolInfo(
+            m['symbol'],
+            int(m.get('pricePrecision', 2)),
+            int(m.get('quantityPrecision', 4)),
+            float(price.get('tickSize', 0)),
+            float(lot.get('stepSize', 0)),
+            float(lot.get('minQty', 0)),
+            float(lot.get('maxQty', 0)),
+            # futures call it ``notional``, spot ``minNotional``
+            float(notional.get('notional', notional.get('minNotional', 0))),
+        )
+    return symbols
+
+
+def _floor_to_step(value, step):
+    if not step:
+        return value
+    # The epsilon keeps 0.3 / 0.1 from flooring to 2 steps.
+    return math.floor(value / step + 1e-9) * step
+
+
+class ExchangeMetadata:
+    """Symbol metadata from one ``exchangeInfo`` download.
+
+    The parsed index is persisted to ``path`` and reused while younger than
+    ``ttl`` seconds, so restarts do not download the payload again.
+    Concurrent ``load`` calls share one request.  If the exchange cannot be
+    reached, a stale file is used rather than nothing.
+    """
+
+    def __init__(self, fetch, path='data/exchange_info.json', ttl=6 * 3600):
+        self._fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        self.symbols = {}
+        self.fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __contains__(self, symbol):
+        return market_id(symbol) in self.symbols
+
+    def get(self, symbol):
+        return self.symbols.get(market_id(symbol))
+
+    @property
+    def fresh(self):
+        return bool(self.symbols) and time.time() - self.fetched_at < self.ttl
+
+    async def load(self):
+        """Make metadata available, from memory, disk or the exchange."""
+        if self.fresh:
+            return
+        async with self._lock:
+            if self.fresh:
+                return
+            if not self.symbols:
+                self._read_file()
+                if self.fresh:
+                    return
+            try:
+                await self._refresh()
+            except Exception as e:
+                if not self.symbols:
+                    raise
+                logger.warning(f"exchangeInfo refresh failed ({e}); using data from {self.path}")
+
+    async def refresh(self):
+        async with self._lock:
+            await self._refresh()
+
+    async def _refresh(self):
+        info = await self._fetch()
+        self.symbols = parse_exchange_info(info)
+        self.fetched_at = time.time()
+        logger.info(f"Loaded exchange metadata for {len(self.symbols)} symbols")
+        if self.path:
+            self._write_file()
+
+    async def run_refresh(self, interval=None, on_refresh=None):
+        """Refresh in the background every ``interval`` (default ``ttl``) seconds.
+
+        ``on_refresh`` is called after every successful refresh.
+        """
+        while True:
+            await asyncio.sleep(interval or self.ttl)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"exchangeInfo refresh failed: {e}")
+                continue
+            if on_refresh is not None:
+                on_refresh()
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.symbols = {s: SymbolInfo(**v) for s, v in data['symbols'].items()}
+            self.fetched_at = float(data['fetched_at'])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable {self.path}: {e}")
+
+    def _write_file(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'fetched_at': self.fetched_at,
+                           'symbols': {s: i._asdict() for s, i in self.symbols.items()}}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def round_price(self, symbol, price):
+        info = self.get(symbol)
+        if info is None:
+            return price
+        if info.tick_size:
+            price = round(price / info.tick_size) * info.tick_size
+        return round(price, info.price_precision)
+
+    def round_qty(self, symbol, qty):
+        """Floor ``qty`` to the symbol's LOT_SIZE step."""
+        info = self.get(symbol)
+        if info is None:
+            return qty
+        return round(_floor_to_step(qty, info.step_size), info.quantity_precision)
+
+    def check_order(self, symbol, qty, price):
+        """Return ``True`` if ``qty`` at ``price`` passes LOT_SIZE and MIN_NOTIONAL."""
+        info = self.get(symbol)
+        if info is None:
+            return qty > 0
+        if qty < info.min_qty or (info.max_qty and qty > info.max_qty):
+            return False
+        return qty * price >= info.min_notional
@@ -0,0 +1,57 @@
+"""LRU cache of per-candle features and signal scores."""
+
+from collections import OrderedDict
+
+
+class FeatureCache:
+    """Bounded cache keyed by ``(symbol, timeframe, candle_ts, config_key)``.
+
+    Entries are small dicts (``{"signal": ..., "features": ...}``) filled by
+    whoever computes a value first and read by every later consumer of the
+    same closed candle.  The least recently used entry is evicted once
+    ``maxsize`` is exceeded.
+    """
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._by_series = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, field):
+        """Return ``field`` of the entry at ``key`` or ``None``."""
+        entry = self._entries.get(key)
+        if entry is None or field not in entry:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[field]
+
+    def put(self, key, field, value):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {}
+            self._by_series.setdefault(key[:2], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+        else:
+            self._entries.move_to_end(key)
+        entry[field] = value
+
+    def _forget(self, key):
+        keys = self._by_series.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_series[key[:2]]
+
+    def invalidate(self, symbol, timeframe):
+        """Drop every entry of ``symbol``/``timeframe``, e.g. after a revised candle."""
+        for key in self._by_series.pop((symbol, timeframe), ()):
+            self._entries.pop(key, None)
@@ -1,8 +1,146 @@
+from collections.abc import Mapping
+
+import numpy as np
 import pandas as pd
-import ta.trend as trend
-import ta.momentum as momentum
-import ta.volume as volume
-import ta.volatility as volatility
+
+import indicators
+
+# Column order of every feature matrix; models are trained on this order.
+FEATURE_COLUMNS = [
+    'ema_short', 'ema_long', 'macd', 'macdsignal', 'rsi', 'adx', 'obv', 'atr',
+    'bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d', 'vwap', 'volume',
+]
+
+
+def _ohlcv_arrays(candles):
+    """Return float ``high, low, close, volume`` arrays from frames, dicts or buffers."""
+    if isinstance(candles, (pd.DataFrame, Mapping)):
+        return tuple(np.asarray(candles[c], dtype=float) for c in ('high', 'low', 'close', 'volume'))
+    return candles.high, candles.low, candles.close, candles.volume
+
+
+def feature_matrix(
+    candles,
+    bb_period: int = 20,
+    bb_k: float = 2,
+    stoch_k_period: int = 14,
+    stoch_d_period: int = 3,
+    ema_short: int = 9,
+    ema_long: int = 21,
+    macd_fast: int = 12,
+    macd_slow: int = 26,
+    macd_signal: int = 9,
+    dtype=np.float64,
+) -> np.ndarray:
+    """Compute every feature for every candle in one vectorized pass.
+
+    Returns a C-contiguous ``(n, len(FEATURE_COLUMNS))`` array; rows whose
+    indicators are still warming up contain ``nan``.
+    """
+    high, low, close, volume = _ohlcv_arrays(candles)
+    macd, macdsignal = indicators.macd(close, macd_fast, macd_slow, macd_signal)
+    bb_upper, bb_middle, bb_lower = indicators.bollinger(close, bb_period, bb_k)
+    # Features have always been built with ta's StochasticOscillator fed
+    # (close, high, low) as (high, low, close); trained models expect that.
+    stoch_k, stoch_d = indicators.stochastic(close, high, low, stoch_k_period, stoch_d_period)
+    columns = [
+        indicators.ema(close, ema_short),
+        indicators.ema(close, ema_long),
+        macd,
+        macdsignal,
+        indicators.rsi(close, 14),
+        indicators.adx(high, low, close, 14),
+        indicators.obv(close, volume),
+        indicators.atr(high, low, close, 14),
+        bb_upper,
+        bb_middle,
+        bb_lower,
+        stoch_k,
+        stoch_d,
+        indicators.vwap(high, low, close, volume),
+        volume,
+    ]
+    return np.ascontiguousarray(np.column_stack(columns), dtype=dtype)
+
+
+def feature_matrix_batch(histories, params=None, dtype=np.float64, **defaults):
+    """Compute feature matrices for many candle histories at once.
+
+    ``histories`` maps a key such as ``(symbol, timeframe)`` to candles and
+    ``params`` optionally maps the same keys to per-history indicator
+    settings.  Returns one contiguous array with all rows stacked in the
+    iteration order of ``histories`` and a dict of key -> row slice.
+    """
+    params = params or {}
+    blocks, index, start = [], {}, 0
+    for key, candles in histories.items():
+        block = feature_matrix(candles, dtype=dtype, **{**defaults, **params.get(key, {})})
+        blocks.append(block)
+        index[key] = slice(start, start + len(block))
+        start += len(block)
+    if not blocks:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=dtype), index
+    return np.concatenate(blocks), index
+
+
+def archive_features(archive, start=None, end=None, warmup=200, dtype=np.float64, **params):
+    """Feature matrix of the archived candles with ``start <= ts < end`` (ms).
+
+    ``warmup`` earlier candles are fed to the indicators first so rows at
+    ``start`` are settled; they are dropped from the result.  Cumulative
+    features (OBV, VWAP) count from the first candle read.  Returns
+    ``(timestamps, matrix)``; candles are read straight from the mapping.
+    """
+    i, j = archive.index_range(start, end)
+    lo = max(i - warmup, 0)
+    window = archive.rows(lo, j)
+    matrix = feature_matrix(window, dtype=dtype, **params)
+    return np.asarray(window.timestamp[i - lo:]), matrix[i - lo:]
+
+
+def latest_features(
+    candles,
+    bb_period: int = 20,
+    bb_k: float = 2,
+    stoch_k_period: int = 14,
+    stoch_d_period: int = 3,
+    ema_short: int = 9,
+    ema_long: int = 21,
+    macd_fast: int = 12,
+    macd_slow: int = 26,
+    macd_signal: int = 9,
+    dtype=np.float64,
+) -> np.ndarray:
+    """Feature vector of the newest candle only, for live decisions.
+
+    Recursive indicators still walk the history, but window-based ones only
+    look at the trailing window and no DataFrame is built.
+    """
+    high, low, close, volume = _ohlcv_arrays(candles)
+    macd, macdsignal = indicators.macd(close, macd_fast, macd_slow, macd_signal)
+    bb_upper, bb_middle, bb_lower = indicators.bollinger(close[-bb_period:], bb_period, bb_k)
+    tail = stoch_k_period + stoch_d_period - 1
+    stoch_k, stoch_d = indicators.stochastic(
+        close[-tail:], high[-tail:], low[-tail:], stoch_k_period, stoch_d_period
+    )
+    row = [
+        indicators.ema(close, ema_short)[-1],
+        indicators.ema(close, ema_long)[-1],
+        macd[-1],
+        macdsignal[-1],
+        indicators.rsi(close, 14)[-1],
+        indicators.adx(high, low, close, 14)[-1],
+        indicators.obv(close, volume)[-1],
+        indicators.atr(high, low, close, 14)[-1],
+        bb_upper[-1],
+        bb_middle[-1],
+        bb_lower[-1],
+        stoch_k[-1],
+        stoch_d[-1],
+        indicators.vwap(high, low, close, volume)[-1],
+        volume[-1],
+    ]
+    return np.array(row, dtype=dtype)
 
 
 def extract_features(
@@ -35,43 +173,17 @@ def extract_features(
     macd_signal : int, optional
         Signal period for the MACD indicator.
     """
-    features = pd.DataFrame(index=df.index)
-    features['ema_short'] = trend.ema_indicator(df['close'], window=ema_short)
-    features['ema_long'] = trend.ema_indicator(df['close'], window=ema_long)
-    features['macd'] = trend.macd(df['close'], window_fast=macd_fast,
-                                  window_slow=macd_slow)
-    features['macdsignal'] = trend.macd_signal(
-        df['close'], window_slow=macd_slow,
-        window_fast=macd_fast, window_sign=macd_signal
-    )
-    features['rsi'] = momentum.rsi(df['close'], window=14)
-    features['adx'] = trend.adx(df['high'], df['low'], df['close'], window=14)
-    features['obv'] = volume.on_balance_volume(df['close'], df['volume'])
-    features['atr'] = volatility.average_true_range(
-        df['high'], df['low'], df['close'], window=14
-    )
-
-    features['bb_upper'] = volatility.bollinger_hband(
-        df['close'], window=bb_period, window_dev=bb_k
+    matrix = feature_matrix(
+        df,
+        bb_period=bb_period,
+        bb_k=bb_k,
+        stoch_k_period=stoch_k_period,
+        stoch_d_period=stoch_d_period,
+        ema_short=ema_short,
+        ema_long=ema_long,
+        macd_fast=macd_fast,
+        macd_slow=macd_slow,
+        macd_signal=macd_signal,
     )
-    features['bb_middle'] = volatility.bollinger_mavg(
-        df['close'], window=bb_period
-    )
-    features['bb_lower'] = volatility.bollinger_lband(
-        df['close'], window=bb_period, window_dev=bb_k
-    )
-
-    stoch = momentum.StochasticOscillator(
-        df['close'], df['high'], df['low'],
-        window=stoch_k_period, smooth_window=stoch_d_period
-    )
-    features['stoch_k'] = stoch.stoch()
-    features['stoch_d'] = stoch.stoch_signal()
-
-    typical_price = (df['high'] + df['low'] + df['close']) / 3
-    cumulative_vp = (typical_price * df['volume']).cumsum()
-    cumulative_volume = df['volume'].cumsum()
-    features['vwap'] = cumulative_vp / cumulative_volume
-
-    features['volume'] = df['volume']
+    features = pd.DataFrame(matrix, index=df.index, columns=FEATURE_COLUMNS)
     return features.dropna().reset_index(drop=True)
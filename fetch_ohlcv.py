@@ -3,17 +3,26 @@
 import ccxt.async_support as ccxt
 import pandas as pd
 import asyncio
-import os
 import logging
 
+from ohlcv_store import OHLCVStore
+from rate_limit import RateBudget
+
 logger = logging.getLogger(__name__)
 
-async def fetch_candles(symbol, timeframe, limit=300):
-    exchange = ccxt.binance({
-        'enableRateLimit': True,
-        'asyncio_loop': asyncio.get_event_loop()
-    })
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+TIMEFRAMES = ["5m", "15m", "30m", "1h", "4h"]
+
+
+def make_exchange():
+    exchange = ccxt.binance({'enableRateLimit': True})
     exchange.options['defaultType'] = 'future'
+    return exchange
+
+
+async def fetch_candles(symbol, timeframe, limit=300, exchange=None):
+    own = exchange is None
+    exchange = exchange or make_exchange()
     try:
         since = int((pd.Timestamp.now() - pd.Timedelta(days=30)).timestamp() * 1000)
         data = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
@@ -24,19 +33,39 @@ async def fetch_candles(symbol, timeframe, limit=300):
         logger.error(f"Error fetching candles for {symbol} {timeframe}: {e}")
         return None
     finally:
-        await exchange.close()
+        if own:
+            await exchange.close()
+
 
-async def fetch_and_save_all():
-    symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
-    timeframes = ["5m", "15m", "30m", "1h", "4h"]
-    os.makedirs("data", exist_ok=True)
-    for symbol in symbols:
-        for tf in timeframes:
-            df = await fetch_candles(symbol, tf, limit=1000)
-            if df is not None and not df.empty:
-                df.to_csv(f"data/{symbol}_{tf}.csv", index=False)
-                logger.info(f"Saved {len(df)} candles for {symbol} {tf}")
-            await asyncio.sleep(0.1)
+async def fetch_and_save_all(symbols=SYMBOLS, timeframes=TIMEFRAMES, days=365, root='data/ohlcv',
+                             weight_per_minute=1200, concurrency=4):
+    """Bring the on-disk store up to date for every symbol and timeframe.
+
+    Only candles newer than the stored ones are downloaded (or the last
+    ``days`` for a new series), over one client and within the request
+    weight budget.  Interrupted runs resume from the last saved page.
+    """
+    store = OHLCVStore(root)
+    budget = RateBudget(weight_per_minute)
+    slots = asyncio.Semaphore(concurrency)
+    since = int((pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days)).timestamp() * 1000)
+    exchange = make_exchange()
+
+    async def one(symbol, tf):
+        async with slots:
+            try:
+                return await store.download(exchange.fetch_ohlcv, symbol, tf, since, budget=budget)
+            except Exception as e:
+                logger.error(f"Download failed for {symbol} {tf}: {e}")
+                return 0
+
+    try:
+        added = await asyncio.gather(*(one(s, tf) for s in symbols for tf in timeframes))
+    finally:
+        await exchange.close()
+    logger.info(f"Stored {sum(added)} new candles under {root}")
+    return sum(added)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(fetch_and_save_all())
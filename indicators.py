@@ -0,0 +1,354 @@
+"""Indicator kernels and incremental indicator state for candle scoring.
+
+The array functions take NumPy arrays and reproduce the ``ta`` package
+(including its warm-up conventions) so whole histories can be processed in
+one vectorized pass; :class:`StreamingIndicators` advances the same values
+one candle at a time.
+"""
+
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+# Streaming values follow the exact recurrences used by the ``ta`` package, so
+# after the same candles they agree with ``ta`` up to float rounding.  The
+# parity tests hold them to this relative tolerance.
+PARITY_RTOL = 1e-9
+
+
+class StreamingIndicators:
+    """EMA short/long, MACD, Wilder RSI and ADX kept up to date per closed candle.
+
+    ``update`` is O(1).  Values are ``nan`` until ``ta`` would report them,
+    except ADX which ``ta`` reports as ``0`` during its warm-up.
+    """
+
+    def __init__(self, ema_short=12, ema_long=26, macd_fast=12, macd_slow=26,
+                 macd_signal=9, rsi=14, adx=14):
+        self.params = dict(ema_short=ema_short, ema_long=ema_long, macd_fast=macd_fast,
+                           macd_slow=macd_slow, macd_signal=macd_signal, rsi=rsi, adx=adx)
+        self.ema_short_window = ema_short
+        self.ema_long_window = ema_long
+        self.macd_fast_window = macd_fast
+        self.macd_slow_window = macd_slow
+        self.macd_signal_window = macd_signal
+        self.rsi_window = rsi
+        self.adx_window = adx
+        self.count = 0
+        self.last_timestamp = None
+        self._ema = {}
+        self._macd_signal = None
+        self._macd_count = 0
+        self._rsi_up = 0.0
+        self._rsi_down = 0.0
+        self._prev_high = self._prev_low = self._prev_close = None
+        self._tr = self._pdm = self._ndm = 0.0
+        self._dx_seed = []
+        self._adx = None
+
+    @classmethod
+    def from_frame(cls, df, **params):
+        """Build the state by replaying every candle of ``df``."""
+        timestamps = df['timestamp'].tolist() if 'timestamp' in df else None
+        return cls.from_arrays(df['high'], df['low'], df['close'], timestamps, **params)
+
+    @classmethod
+    def from_arrays(cls, high, low, close, timestamps=None, **params):
+        """Build the state by replaying aligned high/low/close arrays."""
+        engine = cls(**params)
+        if timestamps is None:
+            timestamps = [None] * len(close)
+        for ts, h, l, c in zip(timestamps, high, low, close):
+            engine.update(h, l, c, ts)
+        return engine
+
+    def _step_ema(self, window, value):
+        alpha = 2.0 / (window + 1)
+        prev = self._ema.get(window)
+        cur = value if prev is None else prev + alpha * (value - prev)
+        self._ema[window] = cur
+        return cur
+
+    def update(self, high, low, close, timestamp=None):
+        """Advance every indicator by one closed candle."""
+        high, low, close = float(high), float(low), float(close)
+        self.count += 1
+        self.last_timestamp = timestamp
+
+        for window in {self.ema_short_window, self.ema_long_window,
+                       self.macd_fast_window, self.macd_slow_window}:
+            self._step_ema(window, close)
+
+        if self.count >= self.macd_slow_window:
+            macd = self._ema[self.macd_fast_window] - self._ema[self.macd_slow_window]
+            self._macd_count += 1
+            if self._macd_signal is None:
+                self._macd_signal = macd
+            else:
+                alpha = 2.0 / (self.macd_signal_window + 1)
+                self._macd_signal += alpha * (macd - self._macd_signal)
+
+        if self._prev_close is not None:
+            diff = close - self._prev_close
+            alpha = 1.0 / self.rsi_window
+            self._rsi_up += alpha * (max(diff, 0.0) - self._rsi_up)
+            self._rsi_down += alpha * (max(-diff, 0.0) - self._rsi_down)
+            self._update_adx(high, low, close)
+
+        self._prev_high, self._prev_low, self._prev_close = high, low, close
+
+    def _update_adx(self, high, low, close):
+        window = self.adx_window
+        prev_close = self._prev_close
+        tr = max(high, prev_close) - min(low, prev_close)
+        up = high - self._prev_high
+        down = self._prev_low - low
+        pdm = up if up > down and up > 0 else 0.0
+        ndm = down if down > up and down > 0 else 0.0
+
+        # ``count - 1`` true ranges exist so far; the first ``window`` of them
+        # are summed, later ones use Wilder's smoothing of the sums.
+        n = self.count - 1
+        if n <= window:
+            self._tr += tr
+            self._pdm += pdm
+            self._ndm += ndm
+            if n < window:
+                return
+        else:
+            self._tr += tr - self._tr / window
+            self._pdm += pdm - self._pdm / window
+            self._ndm += ndm - self._ndm / window
+
+        dip = 100 * self._pdm / self._tr if self._tr != 0 else 0.0
+        din = 100 * self._ndm / self._tr if self._tr != 0 else 0.0
+        dx = 100 * abs(dip - din) / (dip + din) if dip + din != 0 else 0.0
+        if self._adx is None:
+            self._dx_seed.append(dx)
+            if len(self._dx_seed) == window:
+                self._adx = sum(self._dx_seed) / window
+                self._dx_seed = []
+        else:
+            self._adx = (self._adx * (window - 1) + dx) / window
+
+    def _ema_value(self, window):
+        return self._ema[window] if self.count >= window else NAN
+
+    @property
+    def ema_short(self):
+        return self._ema_value(self.ema_short_window)
+
+    @property
+    def ema_long(self):
+        return self._ema_value(self.ema_long_window)
+
+    @property
+    def macd(self):
+        if self.count < self.macd_slow_window:
+            return NAN
+        return self._ema[self.macd_fast_window] - self._ema[self.macd_slow_window]
+
+    @property
+    def macd_signal(self):
+        if self._macd_count < self.macd_signal_window:
+            return NAN
+        return self._macd_signal
+
+    @property
+    def rsi(self):
+        if self.count < self.rsi_window:
+            return NAN
+        if self._rsi_down == 0:
+            return 100.0
+        return 100 - 100 / (1 + self._rsi_up / self._rsi_down)
+
+    @property
+    def adx(self):
+        return self._adx if self._adx is not None else 0.0
+
+    def values(self):
+        return {
+            'ema_short': self.ema_short,
+            'ema_long': self.ema_long,
+            'macd': self.macd,
+            'macd_signal': self.macd_signal,
+            'rsi': self.rsi,
+            'adx': self.adx,
+        }
+
+
+def indicator_params(config, symbol):
+    """Indicator windows configured for ``symbol`` in ``config['indicators']``."""
+    ind = config.get('indicators', {}).get(symbol, {})
+    return {
+        'ema_short': ind.get('ema_short', 12),
+        'ema_long': ind.get('ema_long', 26),
+        'macd_fast': ind.get('macd_fast', 12),
+        'macd_slow': ind.get('macd_slow', 26),
+        'macd_signal': ind.get('macd_signal', 9),
+        'rsi': ind.get('rsi', 14),
+        'adx': 14,
+    }
+
+
+def score_indicators(values):
+    """Return the long-minus-short score used by ``LiveMAStrategy``."""
+    long = short = 0
+    ema_s, ema_l = values['ema_short'], values['ema_long']
+    if ema_s > ema_l:
+        long += 2
+    elif ema_s < ema_l:
+        short += 2
+    if values['macd'] > values['macd_signal']:
+        long += 1
+    elif values['macd'] < values['macd_signal']:
+        short += 1
+    if values['rsi'] > 70:
+        short += 1
+    elif values['rsi'] < 30:
+        long += 1
+    if values['adx'] > 25:
+        if ema_s > ema_l:
+            long += 1.5
+        else:
+            short += 1.5
+    return long - short
+
+
+def score_arrays(high, low, close, min_candles=30, **params):
+    """``score_indicators`` for every candle of a history in one vectorized pass.
+
+    ``params`` are the ``StreamingIndicators`` windows.  Candles with fewer
+    than ``min_candles`` predecessors (inclusive) score ``0``, as
+    ``LiveMAStrategy.score_timeframe`` does.
+    """
+    p = StreamingIndicators(**params).params
+    close = np.asarray(close, dtype=float)
+    ema_s = ema(close, p['ema_short'])
+    ema_l = ema(close, p['ema_long'])
+    line, signal = macd(close, p['macd_fast'], p['macd_slow'], p['macd_signal'])
+    rsi_values = rsi(close, p['rsi'])
+    strong = adx(high, low, close, p['adx']) > 25
+    with np.errstate(invalid='ignore'):
+        up = ema_s > ema_l
+        score = (2.0 * up - 2.0 * (ema_s < ema_l)
+                 + (line > signal) - (line < signal)
+                 + (rsi_values < 30) - (rsi_values > 70)
+                 + 1.5 * (strong & up) - 1.5 * (strong & ~up))
+    score[:min_candles - 1] = 0.0
+    return score
+
+
+def _ewm(values, min_periods=0, **kwargs):
+    return pd.Series(values, dtype=float).ewm(min_periods=min_periods, adjust=False, **kwargs).mean().to_numpy()
+
+
+def ema(values, window):
+    return _ewm(values, span=window, min_periods=window)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Return the MACD line and its signal line."""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal)
+
+
+def rsi(close, window=14):
+    diff = np.diff(np.asarray(close, dtype=float), prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    avg_up = _ewm(up, alpha=1 / window, min_periods=window)
+    avg_down = _ewm(down, alpha=1 / window, min_periods=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+
+
+def true_range(high, low, close):
+    """True range; the first candle uses ``high - low`` like ``ta``."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    prev_close = np.concatenate(([np.nan], np.asarray(close, dtype=float)[:-1]))
+    tr = np.fmax(high, prev_close) - np.fmin(low, prev_close)
+    return tr
+
+
+def atr(high, low, close, window=14):
+    """Wilder ATR; ``0`` before the first full window, as in ``ta``."""
+    tr = true_range(high, low, close)
+    out = np.zeros(len(tr))
+    if len(tr) >= window:
+        seed = tr[:window].mean()
+        out[window - 1:] = _ewm(np.concatenate(([seed], tr[window:])), alpha=1 / window)
+    return out
+
+
+def _wilder_sum(values, window):
+    """Wilder-smoothed running sum seeded with the sum of the first window."""
+    seed = values[:window].mean()
+    return window * _ewm(np.concatenate(([seed], values[window:])), alpha=1 / window)
+
+
+def adx(high, low, close, window=14):
+    """Wilder ADX; ``0`` until ``2 * window - 1`` candles exist, as in ``ta``."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    n = len(high)
+    out = np.zeros(n)
+    if n < 2 * window:
+        return out
+    tr = true_range(high, low, close)[1:]
+    up = np.diff(high)
+    down = -np.diff(low)
+    pdm = np.where((up > down) & (up > 0), up, 0.0)
+    ndm = np.where((down > up) & (down > 0), down, 0.0)
+    s_tr = _wilder_sum(tr, window)
+    s_pdm = _wilder_sum(pdm, window)
+    s_ndm = _wilder_sum(ndm, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dip = np.where(s_tr != 0, 100 * s_pdm / s_tr, 0.0)
+        din = np.where(s_tr != 0, 100 * s_ndm / s_tr, 0.0)
+        total = dip + din
+        dx = np.where(total != 0, 100 * np.abs(dip - din) / total, 0.0)
+    seed = dx[:window].mean()
+    out[2 * window - 1:] = _ewm(np.concatenate(([seed], dx[window:])), alpha=1 / window)
+    return out
+
+
+def obv(close, volume):
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    signed = volume.copy()
+    signed[1:][close[1:] < close[:-1]] *= -1
+    return np.cumsum(signed)
+
+
+def _windows(values, window):
+    """Trailing windows as rows of a zero-copy view, padded with ``nan``."""
+    values = np.asarray(values, dtype=float)
+    padded = np.concatenate((np.full(window - 1, np.nan), values))
+    return np.lib.stride_tricks.sliding_window_view(padded, window)
+
+
+def bollinger(close, window=20, k=2):
+    """Return upper, middle and lower Bollinger bands (population std)."""
+    windows = _windows(close, window)
+    middle = windows.mean(axis=1)
+    std = windows.std(axis=1)
+    return middle + k * std, middle, middle - k * std
+
+
+def stochastic(high, low, close, k_window=14, d_window=3):
+    lowest = _windows(low, k_window).min(axis=1)
+    highest = _windows(high, k_window).max(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100 * (np.asarray(close, dtype=float) - lowest) / (highest - lowest)
+    d = _windows(k, d_window).mean(axis=1)
+    return k, d
+
+
+def vwap(high, low, close, volume):
+    typical = (np.asarray(high, dtype=float) + np.asarray(low, dtype=float) + np.asarray(close, dtype=float)) / 3
+    volume = np.asarray(volume, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.cumsum(typical * volume) / np.cumsum(volume)
@@ -1,19 +1,36 @@
 """Implementation of a moving average based trading strategy."""
 
 import pandas as pd
+import numpy as np
 import ccxt.async_support as ccxt
 import asyncio
 import logging
-import ta.trend as trend
-import ta.momentum as momentum
+import json
+import time
 from datetime import datetime, timedelta
 import traceback
+from collections import namedtuple
 from auto_retrain import train_from_log
+from backtest_engine import simulate_strategy
 from signal_engine import SignalEngine
-from features import extract_features
+from features import FEATURE_COLUMNS, extract_features, latest_features
+from feature_cache import FeatureCache
+from compute_executor import ComputeExecutor
+from rate_limit import DEPTH_SNAPSHOT_LIMIT, RateBudget, WEIGHTS, depth_weight, klines_weight
+from exchange_metadata import ExchangeMetadata, market_id
+from order_book import OrderBookManager
+from backfill import backfill_gaps
+from ohlcv_store import OHLCVStore
+from candle_aggregator import CandleAggregator
+from indicators import StreamingIndicators, indicator_params, score_indicators
+from candle_store import COLUMNS, CandleStore, FormingBars, frame_to_arrays, timeframe_to_ms, to_millis
 
 logger = logging.getLogger(__name__)
 
+# Positions and open orders of the whole account, keyed by exchange symbol id.
+AccountSnapshot = namedtuple('AccountSnapshot', 'positions orders taken_at')
+
+
 class LiveMAStrategy:
     def __init__(self, client, config):
         self.client = client
@@ -30,7 +47,43 @@ class LiveMAStrategy:
             raise ValueError("Config must include 'indicators' with at least one symbol")
         self.leverage = {symbol: config.get('leverage', 10) for symbol in self.symbols}
         self.timeframes = ['5m', '15m', '30m', '1h', '4h', '1d']
-        self.data = {symbol: {} for symbol in self.symbols}
+        self.candle_capacity = config.get('candle_capacity', 300)
+        store_root = config.get('ohlcv_store', 'data/ohlcv')
+        self.ohlcv_store = OHLCVStore(store_root) if store_root else None
+        self.data = {symbol: CandleStore(self.candle_capacity) for symbol in self.symbols}
+        self.forming = {symbol: FormingBars(self.timeframes) for symbol in self.symbols}
+        # With ws_base_interval set only that kline stream is subscribed and
+        # the other timeframes are aggregated from it.
+        self.base_interval = config.get('ws_base_interval')
+        self.aggregators = {}
+        for symbol in self.symbols:
+            self._init_aggregator(symbol)
+        self.indicators = {symbol: {} for symbol in self.symbols}
+        self.feature_cache = FeatureCache(config.get('feature_cache_size', 2048))
+        self.executor = ComputeExecutor.from_config(config)
+        self._feature_tasks = {}
+        self.rate_budget = RateBudget(config.get('rate_limit_weight', 1200))
+        self._warmup_slots = asyncio.Semaphore(config.get('warmup_concurrency', 8))
+        self.warmup_timings = {}
+        self.ready = {symbol: False for symbol in self.symbols}
+        self.account_snapshot = config.get('account_snapshot', True)
+        self._warmup_snapshot = None
+        self.account = None
+        self.user_stream = None
+        self.rest_sync_interval = config.get('rest_sync_interval', 300)
+        self.order_books = OrderBookManager(self._fetch_depth_snapshot, config.get('order_book_max_age', 5))
+        self.depth_bps = config.get('depth_bps', 10)
+        self.signal_debounce = config.get('signal_debounce_ms', 250) / 1000
+        self.sweep_interval = config.get('sweep_interval', 300)
+        self.rest_poll_interval = config.get('rest_poll_interval', 60)
+        self._dirty = set()
+        self._wakeup = asyncio.Event()
+        self.stream_manager = None
+        self._symbol_tasks = {}
+        # Symbols removed from the config that still hold a position: they
+        # are managed until flat but never entered again.
+        self.closing_only = set()
+        self._backfill_tasks = {}
         self.position_side = {symbol: None for symbol in self.symbols}
         self.entry_price = {symbol: None for symbol in self.symbols}
         self.quantity = {symbol: None for symbol in self.symbols}
@@ -40,30 +93,155 @@ class LiveMAStrategy:
         self.cooldown = {symbol: None for symbol in self.symbols}
         self.max_trades = config.get('max_trades_per_day', 5)
         self.daily_trades = {symbol: [] for symbol in self.symbols}
-        self.min_qty = {'BTCUSDT': 0.001, 'ETHUSDT': 0.01, 'SOLUSDT': 0.1}
+        self.min_qty = {}
+        self.min_notional = {}
+        self.metadata = ExchangeMetadata(
+            self._fetch_exchange_info,
+            config.get('exchange_info_path', 'data/exchange_info.json'),
+            config.get('exchange_info_ttl', 6 * 3600),
+        )
         self.sl_order_id = {symbol: None for symbol in self.symbols}
         self.tp_order_id = {symbol: None for symbol in self.symbols}
         self.entry_tf = {symbol: None for symbol in self.symbols}
-        self.signal_engine = SignalEngine()
+        self.signal_engine = SignalEngine(config.get('model_path', 'model_xgb.pkl'))
+        self.model_reload_interval = config.get('model_reload_interval', 30)
         self.min_ai_confidence = config.get('min_ai_confidence', 0.5)
         self.maker_offset = config.get('maker_offset', 0)
         logger.info(f"Initialized with symbols: {self.symbols}")
 
-    async def initialize(self):
-        for symbol in self.symbols:
-            await self.set_leverage(symbol)
-            await self.load_precision(symbol)
-            for timeframe in self.timeframes:
-                df = await self.client.fetch_candles(symbol, timeframe, limit=300)
-                if df is not None and not df.empty:
-                    self.data[symbol][timeframe] = df
-                    logger.info(f"Loaded {len(df)} candles for {symbol} {timeframe}")
-                else:
-                    logger.warning(f"No data loaded for {symbol} {timeframe}")
-        for symbol in self.symbols:
-            self.cooldown[symbol] = None
-            self.daily_trades[symbol] = []
-            await self.sync_position(symbol)
+    async def initialize(self, wait=True):
+        """Load leverage, precision, candles and positions for every symbol.
+
+        Requests run concurrently, at most ``warmup_concurrency`` at a time
+        and within the shared request-weight budget.  Each symbol is marked
+        in ``self.ready`` as soon as its own data is loaded; with
+        ``wait=False`` this returns immediately and ``run`` starts trading
+        symbols as they become ready.
+        """
+        started = time.perf_counter()
+        self.warmup_timings = {}
+        if self.account_snapshot:
+            # One account-wide request instead of one per symbol; the budget
+            # is taken inside fetch_account_snapshot.
+            self._warmup_snapshot = asyncio.ensure_future(
+                self._timed('positions', 0, self.fetch_account_snapshot)
+            )
+        tasks = [asyncio.create_task(self._warm_up_symbol(symbol)) for symbol in self.symbols]
+        done = asyncio.gather(*tasks)
+
+        def report(_):
+            summary = ", ".join(
+                f"{stage} {t['total']:.2f}s/{t['calls']} calls (max {t['max']:.2f}s)"
+                for stage, t in self.warmup_timings.items()
+            )
+            logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s: {summary}")
+
+        done.add_done_callback(report)
+        self._warmup = done
+        if wait:
+            await done
+
+    async def _timed(self, stage, weight, coro_fn, *args):
+        """Run one warm-up request under the concurrency limit and weight budget."""
+        async with self._warmup_slots:
+            await self.rate_budget.acquire(weight)
+            start = time.perf_counter()
+            try:
+                return await coro_fn(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                t = self.warmup_timings.setdefault(stage, {'calls': 0, 'total': 0.0, 'max': 0.0})
+                t['calls'] += 1
+                t['total'] += elapsed
+                t['max'] = max(t['max'], elapsed)
+
+    async def _load_candles(self, symbol, timeframe):
+        limit = self.candle_capacity
+        if self.ohlcv_store is not None:
+            stored = self.ohlcv_store.read_frame(symbol, timeframe, last=limit)
+            if len(stored):
+                # Only the candles closed since the last download come from the exchange.
+                self.data[symbol][timeframe] = stored
+                filled = await backfill_gaps(
+                    self.client.exchange.fetch_ohlcv,
+                    {(symbol, timeframe): self._buffer(symbol, timeframe).last_timestamp},
+                    max_candles=limit,
+                    budget=self.rate_budget,
+                )
+                for rows in filled.values():
+                    self.merge_candles(symbol, timeframe, rows)
+                logger.info(f"Loaded {len(stored)} stored candles for {symbol} {timeframe}")
+                return
+        df = await self._timed('candles', klines_weight(limit), self.client.fetch_candles, symbol, timeframe, limit)
+        if df is not None and not df.empty:
+            self.data[symbol][timeframe] = df
+            logger.info(f"Loaded {len(df)} candles for {symbol} {timeframe}")
+        else:
+            logger.warning(f"No data loaded for {symbol} {timeframe}")
+
+    async def backfill(self, symbols=None):
+        """Fetch the candles missed since the last stored one of each timeframe.
+
+        Called after a stream outage; symbols without stored candles are
+        left to the warm-up.
+        """
+        symbols = self.symbols if symbols is None else symbols
+        targets = {}
+        for symbol in symbols:
+            for tf in self.timeframes:
+                last = self._buffer(symbol, tf).last_timestamp
+                if last is not None:
+                    targets[(symbol, tf)] = last
+        filled = await backfill_gaps(
+            self.client.exchange.fetch_ohlcv,
+            targets,
+            max_candles=self.candle_capacity,
+            budget=self.rate_budget,
+            concurrency=self.config.get('warmup_concurrency', 8),
+        )
+        for (symbol, tf), rows in filled.items():
+            self.merge_candles(symbol, tf, rows)
+        return filled
+
+    def merge_candles(self, symbol, timeframe, rows):
+        """Merge fetched ``[ts, o, h, l, c, v]`` rows in time order.
+
+        The streams keep running while missed candles are fetched, so newer
+        candles may already be stored; older rows are then inserted in place
+        and the indicator state is rebuilt instead of dropping them as stale.
+        """
+        buf = self._buffer(symbol, timeframe)
+        last = buf.last_timestamp
+        if last is None or rows[0][0] > last:
+            self.process_timeframe_data(symbol, timeframe, pd.DataFrame(rows, columns=COLUMNS))
+            return
+        rows = np.asarray(rows, dtype=float)
+        buf.merge(rows[:, 0].astype(np.int64), rows[:, 1:].T)
+        self.indicators[symbol].pop(timeframe, None)
+        self.feature_cache.invalidate(symbol, timeframe)
+        self._fill_feature_cache(symbol, timeframe)
+        self.mark_dirty(symbol)
+
+    async def _warm_up_symbol(self, symbol):
+        start = time.perf_counter()
+        self.ready[symbol] = False
+        await asyncio.gather(
+            self._timed('leverage', WEIGHTS['leverage'], self.set_leverage, symbol),
+            self._timed('precision', WEIGHTS['exchange_info'], self.load_precision, symbol),
+            *(self._load_candles(symbol, tf) for tf in self.timeframes),
+        )
+        self.cooldown[symbol] = None
+        self.daily_trades[symbol] = []
+        snapshot = await self._warmup_snapshot if self._warmup_snapshot is not None else None
+        if snapshot is not None:
+            self.account = snapshot
+            await self.sync_position(symbol, snapshot)
+        else:
+            await self._timed('positions', WEIGHTS['position_risk'] + WEIGHTS['open_orders'],
+                              self.sync_position, symbol)
+        self.ready[symbol] = True
+        self.mark_dirty(symbol)
+        logger.info(f"{symbol} ready in {time.perf_counter() - start:.2f}s")
 
     async def set_leverage(self, symbol):
         try:
@@ -75,102 +253,305 @@ class LiveMAStrategy:
         except Exception as e:
             logger.error(f"Failed to set leverage for {symbol}: {e}")
 
+    async def _fetch_exchange_info(self):
+        return await self.client.exchange.fapiPublicGetExchangeInfo()
+
     async def load_precision(self, symbol):
         try:
-            info = await self.client.exchange.fapiPublicGetExchangeInfo()
-            for m in info['symbols']:
-                if m['symbol'] == symbol.replace('/', ''):
-                    self.price_precision[symbol] = int(m['pricePrecision'])
-                    self.quantity_precision[symbol] = int(m['quantityPrecision'])
-                    break
+            await self.metadata.load()
+            self._apply_metadata(symbol)
         except Exception as e:
             logger.error(f"Failed to load precision for {symbol}: {e}")
 
+    def _apply_metadata(self, symbol):
+        info = self.metadata.get(symbol)
+        if info is None:
+            logger.warning(f"No exchange metadata for {symbol}")
+            return
+        self.price_precision[symbol] = info.price_precision
+        self.quantity_precision[symbol] = info.quantity_precision
+        self.min_qty[symbol] = info.min_qty
+        self.min_notional[symbol] = info.min_notional
+
+    def _init_symbol(self, symbol):
+        """Create the per-symbol state of a symbol added while running."""
+        self.leverage[symbol] = self.config.get('leverage', 10)
+        self.data[symbol] = CandleStore(self.candle_capacity)
+        self.forming[symbol] = FormingBars(self.timeframes)
+        self._init_aggregator(symbol)
+        self.indicators[symbol] = {}
+        self.ready[symbol] = False
+        for state in (self.position_side, self.entry_price, self.quantity, self.cooldown,
+                      self.sl_order_id, self.tp_order_id, self.entry_tf):
+            state[symbol] = None
+        self.unrealized_pnl[symbol] = 0
+        self.price_precision[symbol] = 2
+        self.quantity_precision[symbol] = 4
+        self.daily_trades[symbol] = []
+
+    async def update_indicators(self, indicators):
+        """Trade the symbols of a new ``indicators`` config without restarting.
+
+        Added symbols are warmed up in the background and subscribed on the
+        running streams; removed symbols stay until their position is closed.
+        """
+        self.config['indicators'] = indicators
+        # The startup snapshot is stale by now; warm-up syncs new symbols over REST.
+        self._warmup_snapshot = None
+        self.closing_only = {s for s in self.symbols if s not in indicators}
+        for symbol in self._closed_symbols():
+            self._remove_symbol(symbol)
+        for symbol in self.closing_only:
+            logger.info(f"Closing only {symbol} until its position is flat")
+        for symbol in [s for s in indicators if s not in self.symbols]:
+            self._init_symbol(symbol)
+            self.symbols.append(symbol)
+            self._symbol_tasks[symbol] = asyncio.ensure_future(self._warm_up_symbol(symbol))
+            logger.info(f"Started trading {symbol}")
+        if self.stream_manager is not None:
+            await self.stream_manager.set_symbols(self.symbols)
+
+    def _closed_symbols(self):
+        return sorted(s for s in self.closing_only if not self.position_side[s])
+
+    def _remove_symbol(self, symbol):
+        self.closing_only.discard(symbol)
+        self.symbols.remove(symbol)
+        self.ready[symbol] = False
+        logger.info(f"Stopped trading {symbol}")
+
+    async def drop_closed_symbols(self):
+        """Remove closing-only symbols whose position is flat and unsubscribe them."""
+        closed = self._closed_symbols()
+        for symbol in closed:
+            self._remove_symbol(symbol)
+        if closed and self.stream_manager is not None:
+            await self.stream_manager.set_symbols(self.symbols)
+        return closed
+
+    def _refresh_symbols(self):
+        for symbol in self.symbols:
+            self._apply_metadata(symbol)
+
+    def _buffer(self, symbol, timeframe):
+        """Return the ring buffer holding ``symbol``/``timeframe`` candles."""
+        store = self.data[symbol]
+        if not isinstance(store, CandleStore):
+            # Frames assigned directly (tests, train_mode) are adopted as buffers.
+            store = self.data[symbol] = CandleStore(self.candle_capacity, store)
+        return store.buffer(timeframe)
+
+    def _init_aggregator(self, symbol):
+        if self.base_interval:
+            self.aggregators[symbol] = CandleAggregator(self.base_interval, self.timeframes)
+
+    def _aggregate(self, symbol, kline):
+        """Feed a closed base-interval candle to the higher timeframes.
+
+        Periods that could not be built from complete base data (startup,
+        outages) are fetched over REST instead.
+        """
+        aggregator = self.aggregators[symbol]
+        for tf, bar in aggregator.update(kline):
+            self.process_timeframe_data(symbol, tf, bar)
+        if not aggregator.pop_incomplete():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = self._backfill_tasks.get(symbol)
+        if task is None or task.done():
+            self._backfill_tasks[symbol] = loop.create_task(self.backfill([symbol]))
+
     def process_timeframe_data(self, symbol, timeframe, kline):
-        df = self.data[symbol].setdefault(
-            timeframe,
-            pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"]),
-        )
+        if timeframe == self.base_interval and isinstance(kline, tuple) and symbol in self.aggregators:
+            self._aggregate(symbol, kline)
+            if timeframe not in self.timeframes:
+                return
         if isinstance(kline, pd.DataFrame):
             if kline.empty:
                 return
-            new = kline.copy()
-            if not isinstance(new.iloc[0]["timestamp"], pd.Timestamp):
-                new["timestamp"] = pd.to_datetime(new["timestamp"], unit="ms")
+            timestamps, values = frame_to_arrays(kline)
+            rows = zip(timestamps.tolist(), *values.tolist())
+        elif isinstance(kline, tuple):
+            # (timestamp_ms, open, high, low, close, volume) from the stream decoder
+            rows = [kline]
         else:
-            new = pd.DataFrame([
-                {
-                    "timestamp": pd.to_datetime(kline["timestamp"], unit="ms") if not isinstance(kline["timestamp"], pd.Timestamp) else kline["timestamp"],
-                    "open": float(kline["open"]),
-                    "high": float(kline["high"]),
-                    "low": float(kline["low"]),
-                    "close": float(kline["close"]),
-                    "volume": float(kline["volume"]),
-                }
-            ])
-        new[["open", "high", "low", "close", "volume"]] = new[["open", "high", "low", "close", "volume"]].astype(float)
-        df = pd.concat([df, new]).drop_duplicates("timestamp").tail(60)
-        self.data[symbol][timeframe] = df
-
-    def process_tick(self, symbol, tick):
-        for tf, df in self.data[symbol].items():
-            df.iat[-1, df.columns.get_loc('close')] = float(tick)
-
-    def _calculate_macd(self, symbol: str, df: pd.DataFrame):
-        """Return MACD values using configured periods for the symbol."""
-        ind = self.config.get("indicators", {}).get(symbol, {})
-        fast = ind.get("macd_fast", 12)
-        slow = ind.get("macd_slow", 26)
-        signal = ind.get("macd_signal", 9)
-        macd = trend.macd(df["close"], window_fast=fast, window_slow=slow)
-        signal_line = trend.macd_signal(
-            df["close"], window_fast=fast, window_slow=slow, window_sign=signal
+            rows = [(
+                to_millis(kline["timestamp"]),
+                float(kline["open"]),
+                float(kline["high"]),
+                float(kline["low"]),
+                float(kline["close"]),
+                float(kline["volume"]),
+            )]
+        buf = self._buffer(symbol, timeframe)
+        for row in rows:
+            prev_ts = buf.last_timestamp
+            status = buf.append(*row)
+            if status != "stale":
+                self._advance_indicators(symbol, timeframe, row, prev_ts, status)
+        if status == "append":
+            self.forming[symbol].close_bar(timeframe, row[0])
+        if status != "stale":
+            self._fill_feature_cache(symbol, timeframe)
+            self.mark_dirty(symbol)
+
+    def mark_dirty(self, symbol):
+        """Queue ``symbol`` for evaluation and wake the run loop."""
+        self._dirty.add(symbol)
+        self._wakeup.set()
+
+    def _advance_indicators(self, symbol, timeframe, row, prev_ts, status):
+        """Feed a freshly closed candle to the streaming indicators in O(1).
+
+        Revisions of stored candles drop the state (and the memoized score)
+        so both are rebuilt from the buffer on the next evaluation.
+        """
+        engine = self.indicators[symbol].get(timeframe)
+        if status == "append" and engine is not None and engine.last_timestamp == prev_ts:
+            ts, _, high, low, close, _ = row
+            engine.update(high, low, close, ts)
+            return
+        self.indicators[symbol].pop(timeframe, None)
+        if status == "replace":
+            self.feature_cache.invalidate(symbol, timeframe)
+
+    def _indicator_params(self, symbol):
+        return indicator_params(self.config, symbol)
+
+    def _streaming_indicators(self, symbol, timeframe, buf):
+        """Return indicator state in sync with ``buf``, rebuilding it if stale."""
+        engine = self.indicators[symbol].get(timeframe)
+        params = self._indicator_params(symbol)
+        if engine is None or engine.last_timestamp != buf.last_timestamp or engine.params != params:
+            engine = StreamingIndicators.from_arrays(
+                buf.high, buf.low, buf.close, buf.timestamps.tolist(), **params
+            )
+            self.indicators[symbol][timeframe] = engine
+        return engine
+
+    def process_tick(self, symbol, price, qty=0.0, ts=None, high=None, low=None):
+        """Update the forming bar of every timeframe from a ticker or trade."""
+        self.forming[symbol].update(float(price), qty, ts, high, low)
+
+    def forming_bar(self, symbol, timeframe):
+        """Return the still-open ``(start, open, high, low, close, volume)`` bar.
+
+        Without ticks the bar aggregated from closed base candles is used.
+        """
+        bar = self.forming[symbol].bar(timeframe)
+        if bar is None and symbol in self.aggregators:
+            bar = self.aggregators[symbol].forming(timeframe)
+        return bar
+
+    def last_price(self, symbol, timeframe):
+        """Latest traded price, falling back to the last closed candle."""
+        price = self.forming[symbol].close[0]
+        if np.isnan(price):
+            close = self._buffer(symbol, timeframe).close
+            return float(close[-1]) if len(close) else None
+        return float(price)
+
+    def _feature_params(self, symbol):
+        ind = self.config.get('indicators', {}).get(symbol, {})
+        return {
+            'bb_period': self.config.get('bb_period', 20),
+            'bb_k': self.config.get('bb_k', 2),
+            'stoch_k_period': self.config.get('stoch_k_period', 14),
+            'stoch_d_period': self.config.get('stoch_d_period', 3),
+            'ema_short': ind.get('ema_short', 12),
+            'ema_long': ind.get('ema_long', 26),
+            'macd_fast': ind.get('macd_fast', 12),
+            'macd_slow': ind.get('macd_slow', 26),
+            'macd_signal': ind.get('macd_signal', 9),
+        }
+
+    def _feature_key(self, symbol, timeframe):
+        """Cache key of the newest closed candle under the current config."""
+        config_key = json.dumps(
+            [self.config.get("indicators", {}).get(symbol, {}), self._feature_params(symbol)],
+            sort_keys=True,
         )
-        hist = macd - signal_line
-        return macd, signal_line, hist
+        return (symbol, timeframe, self._buffer(symbol, timeframe).last_timestamp, config_key)
 
-    def get_signal_for_timeframe(self, symbol, timeframe):
-        df = self.data[symbol].get(timeframe, pd.DataFrame())
-        if len(df) < 30:
-            return None
-        ema_s = trend.ema_indicator(df['close'], window=self.config['indicators'][symbol].get('ema_short', 12))
-        ema_l = trend.ema_indicator(df['close'], window=self.config['indicators'][symbol].get('ema_long', 26))
-        long = short = 0
-        if ema_s.iloc[-1] > ema_l.iloc[-1]:
-            long += 2
-        elif ema_s.iloc[-1] < ema_l.iloc[-1]:
-            short += 2
-        macd, signal, _ = self._calculate_macd(symbol, df)
-        if macd.iloc[-1] > signal.iloc[-1]:
-            long += 1
-        elif macd.iloc[-1] < signal.iloc[-1]:
-            short += 1
-        rsi = momentum.rsi(df['close'], window=self.config['indicators'][symbol].get('rsi', 14))
-        if rsi.iloc[-1] > 70:
-            short += 1
-        elif rsi.iloc[-1] < 30:
-            long += 1
-        adx = trend.adx(df['high'], df['low'], df['close'], window=14)
-        if adx.iloc[-1] > 25:
-            if ema_s.iloc[-1] > ema_l.iloc[-1]:
-                long += 1.5
-            else:
-                short += 1.5
-        score = long - short
+    def _fill_feature_cache(self, symbol, timeframe):
+        """Compute the score and model features of a just-closed candle once.
+
+        The score is O(1) and done here; the feature row is computed in the
+        compute executor when an event loop is running so the websocket
+        reader is not held up.
+        """
+        buf = self._buffer(symbol, timeframe)
+        if len(buf) < 30:
+            return
+        self.score_timeframe(symbol, timeframe)
+        key = self._feature_key(symbol, timeframe)
+        if self.feature_cache.get(key, 'features') is not None:
+            return
+        # Copy the window: the ring buffer keeps being written while a
+        # worker reads it.
+        candles = {'high': buf.high.copy(), 'low': buf.low.copy(),
+                   'close': buf.close.copy(), 'volume': buf.volume.copy()}
+        params = self._feature_params(symbol)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._store_features(key, latest_features(candles, **params))
+            return
+        self._feature_tasks[(symbol, timeframe)] = loop.create_task(
+            self._compute_features(symbol, timeframe, key, candles, params)
+        )
+
+    async def _compute_features(self, symbol, timeframe, key, candles, params):
+        try:
+            row = await self.executor.submit((symbol, timeframe), latest_features, candles, **params)
+        except Exception as e:
+            logger.error(f"Feature computation failed for {symbol} {timeframe}: {e}")
+            return
+        self._store_features(key, row)
+
+    def _store_features(self, key, row):
+        if not np.isnan(row).any():
+            self.feature_cache.put(key, 'features', dict(zip(FEATURE_COLUMNS, row.tolist())))
+            self.signal_engine.canary_row = row
+
+    def score_timeframe(self, symbol, tf):
+        """Return ``(direction, score)`` for one timeframe in a single pass.
+
+        Results are cached on the last closed candle timestamp and the
+        indicator config, so re-evaluating a timeframe without a new candle
+        is a dict lookup.
+        """
+        buf = self._buffer(symbol, tf)
+        if len(buf) < 30:
+            return None, 0
+        key = self._feature_key(symbol, tf)
+        cached = self.feature_cache.get(key, 'signal')
+        if cached is not None:
+            return cached
+        engine = self._streaming_indicators(symbol, tf, buf)
+        score = score_indicators(engine.values())
+        direction = None
         if score >= 1.5:
-            return 'long'
-        if score <= -1.5:
-            return 'short'
-        return None
+            direction = 'long'
+        elif score <= -1.5:
+            direction = 'short'
+        self.feature_cache.put(key, 'signal', (direction, score))
+        return direction, score
+
+    def get_signal_for_timeframe(self, symbol, timeframe):
+        return self.score_timeframe(symbol, timeframe)[0]
 
     def check_multi_timeframe_signal(self, symbol):
         signals, scores = {}, {}
         for tf in self.timeframes:
-            if tf in self.data[symbol] and not self.data[symbol][tf].empty:
-                sig = self.get_signal_for_timeframe(symbol, tf)
+            if tf in self.data[symbol] and len(self._buffer(symbol, tf)):
+                sig, score = self.score_timeframe(symbol, tf)
                 if sig:
                     signals[tf] = sig
-                    scores[tf] = self.get_signal_for_timeframe_score(symbol, tf)
+                    scores[tf] = score
         for tf in ['1h', '4h', '1d']:
             if tf in signals and abs(scores[tf]) >= 3:
                 return signals[tf], tf
@@ -179,38 +560,20 @@ class LiveMAStrategy:
         return None, None
 
     def get_signal_for_timeframe_score(self, symbol, tf):
-        df = self.data[symbol].get(tf, pd.DataFrame())
-        if len(df) < 30:
-            return 0
-        long = short = 0
-        ema_s = trend.ema_indicator(df['close'], window=self.config['indicators'][symbol].get('ema_short', 12))
-        ema_l = trend.ema_indicator(df['close'], window=self.config['indicators'][symbol].get('ema_long', 26))
-        if ema_s.iloc[-1] > ema_l.iloc[-1]:
-            long += 2
-        elif ema_s.iloc[-1] < ema_l.iloc[-1]:
-            short += 2
-        macd, signal, _ = self._calculate_macd(symbol, df)
-        if macd.iloc[-1] > signal.iloc[-1]:
-            long += 1
-        elif macd.iloc[-1] < signal.iloc[-1]:
-            short += 1
-        rsi = momentum.rsi(df['close'], window=self.config['indicators'][symbol].get('rsi', 14))
-        if rsi.iloc[-1] > 70:
-            short += 1
-        elif rsi.iloc[-1] < 30:
-            long += 1
-        adx = trend.adx(df['high'], df['low'], df['close'], window=14)
-        if adx.iloc[-1] > 25:
-            if ema_s.iloc[-1] > ema_l.iloc[-1]:
-                long += 1.5
-            else:
-                short += 1.5
-        return long - short
+        return self.score_timeframe(symbol, tf)[1]
 
-    async def check_exit_fills(self, symbol):
-        """Poll stored TP/SL orders and log trade if filled."""
+    async def check_exit_fills(self, symbol, snapshot=None):
+        """Poll stored TP/SL orders and log trade if filled.
+
+        With an account ``snapshot`` an order still listed as open cannot
+        have filled, so it is only fetched once it disappears.
+        """
         sl_id = self.sl_order_id.get(symbol)
         tp_id = self.tp_order_id.get(symbol)
+        if snapshot is not None:
+            open_ids = {o.get('id') for o in snapshot.orders.get(market_id(symbol), [])}
+            if all(not i or i in open_ids for i in (sl_id, tp_id)):
+                return
         exit_order = None
         exit_from_sl = False
         try:
@@ -229,33 +592,135 @@ class LiveMAStrategy:
 
         if exit_order:
             exit_price = float(exit_order.get('avgPrice') or exit_order.get('price'))
-            entry = self.entry_price[symbol]
-            side = self.position_side[symbol]
-            tf = self.entry_tf.get(symbol, 'unknown')
-            result = 'win' if (side == 'long' and exit_price > entry) or (side == 'short' and exit_price < entry) else 'loss'
-            self.log_trade(symbol, 'EXIT', entry, exit_price, result, tf)
-            other_id = tp_id if exit_from_sl else sl_id
-            if other_id:
-                try:
-                    await self.client.exchange.cancel_order(other_id, symbol)
-                except Exception:
-                    pass
-            self.sl_order_id[symbol] = None
-            self.tp_order_id[symbol] = None
-            self.entry_tf[symbol] = None
-            self.position_side[symbol] = None
-            self.entry_price[symbol] = None
-            self.quantity[symbol] = None
-            self.unrealized_pnl[symbol] = 0
+            await self._record_exit(symbol, exit_price, tp_id if exit_from_sl else sl_id)
+
+    async def _record_exit(self, symbol, exit_price, other_id):
+        """Log a filled SL/TP exit, cancel its sibling order and clear the position."""
+        entry = self.entry_price[symbol]
+        side = self.position_side[symbol]
+        tf = self.entry_tf.get(symbol, 'unknown')
+        result = 'win' if (side == 'long' and exit_price > entry) or (side == 'short' and exit_price < entry) else 'loss'
+        self.log_trade(symbol, 'EXIT', entry, exit_price, result, tf)
+        if other_id:
+            try:
+                await self.client.exchange.cancel_order(other_id, symbol)
+            except Exception:
+                pass
+        self.sl_order_id[symbol] = None
+        self.tp_order_id[symbol] = None
+        self.entry_tf[symbol] = None
+        self.position_side[symbol] = None
+        self.entry_price[symbol] = None
+        self.quantity[symbol] = None
+        self.unrealized_pnl[symbol] = 0
+
+    async def on_order_update(self, order):
+        """Apply an ``ORDER_TRADE_UPDATE`` payload from the user-data stream."""
+        symbol = order.get('s')
+        if symbol not in self.position_side:
+            return
+        order_id = str(order.get('i'))
+        status = order.get('X')
+        if self.account is not None:
+            orders = [o for o in self.account.orders.get(symbol, []) if o.get('id') != order_id]
+            if status in ('NEW', 'PARTIALLY_FILLED'):
+                orders.append({'id': order_id, 'type': order.get('ot') or order.get('o'), 'status': 'open',
+                               'info': {'symbol': symbol}})
+            self.account.orders[symbol] = orders
+        if status != 'FILLED':
+            return
+        price = float(order.get('ap') or order.get('L') or 0)
+        sl_id, tp_id = self.sl_order_id.get(symbol), self.tp_order_id.get(symbol)
+        if order_id in (sl_id, tp_id) and self.position_side[symbol]:
+            logger.info(f"{'SL' if order_id == sl_id else 'TP'} filled for {symbol} @ {price}")
+            await self._record_exit(symbol, price, tp_id if order_id == sl_id else sl_id)
+        elif self.position_side[symbol] and not self.entry_price[symbol] and price:
+            self.entry_price[symbol] = price
+
+    def on_account_update(self, account):
+        """Apply the positions of an ``ACCOUNT_UPDATE`` payload.
+
+        Only sizes, entry prices and PnL are refreshed; closing a position is
+        left to the order update of the exit that closed it.
+        """
+        for p in account.get('P', []):
+            symbol = p.get('s')
+            if symbol not in self.position_side:
+                continue
+            amt = float(p.get('pa', 0))
+            if self.account is not None:
+                self.account.positions[symbol] = [{
+                    'symbol': symbol,
+                    'positionAmt': p.get('pa', '0'),
+                    'entryPrice': p.get('ep', '0'),
+                    'unRealizedProfit': p.get('up', '0'),
+                }]
+            if amt == 0:
+                continue
+            side = 'long' if amt > 0 else 'short'
+            if self.position_side[symbol] in (None, side):
+                self.position_side[symbol] = side
+                self.quantity[symbol] = abs(amt)
+                self.entry_price[symbol] = float(p.get('ep', 0)) or self.entry_price[symbol]
+                self.unrealized_pnl[symbol] = float(p.get('up', 0))
+
+    def _needs_rest_sync(self):
+        """REST reconciliation runs every cycle unless the user-data stream is live."""
+        stream = self.user_stream
+        if stream is None or not stream.connected or self.account is None:
+            return True
+        return time.time() - self.account.taken_at >= self.rest_sync_interval
+
+    async def fetch_account_snapshot(self):
+        """Fetch every position and open order of the account in one call each.
+
+        Returns an ``AccountSnapshot`` keyed by exchange symbol id, or ``None``
+        if either request fails so callers fall back to per-symbol requests.
+        """
+        try:
+            await self.rate_budget.acquire(WEIGHTS['position_risk'] + WEIGHTS['open_orders_all'])
+            positions = await self.client.exchange.fapiPrivateV2GetPositionRisk({})
+            orders = await self.client.exchange.fetch_open_orders()
+        except Exception as e:
+            logger.error(f"Account snapshot failed: {e}")
+            return None
+        by_symbol = {}
+        for p in positions:
+            by_symbol.setdefault(p.get('symbol'), []).append(p)
+        open_orders = {}
+        for o in orders:
+            key = (o.get('info') or {}).get('symbol') or market_id(o.get('symbol', ''))
+            open_orders.setdefault(key, []).append(o)
+        return AccountSnapshot(by_symbol, open_orders, time.time())
+
+    async def sync_all(self, symbols=None, snapshot=None):
+        """Reconcile every symbol from one account snapshot.
+
+        Without a ``snapshot`` a fresh one is fetched; when snapshots are
+        disabled or the request fails, ``sync_position`` falls back to
+        per-symbol requests.  Returns the snapshot used.
+        """
+        symbols = self.symbols if symbols is None else symbols
+        if snapshot is None and self.account_snapshot:
+            snapshot = await self.fetch_account_snapshot()
+            if snapshot is not None:
+                self.account = snapshot
+        await asyncio.gather(*(self.sync_position(symbol, snapshot) for symbol in symbols))
+        return snapshot
 
-    async def sync_position(self, symbol):
+    async def sync_position(self, symbol, snapshot=None):
+        cancelled = set()
         try:
             # 1) Registrar possível saída de trade (SL/TP preenchido).
-            await self.check_exit_fills(symbol)
+            await self.check_exit_fills(symbol, snapshot)
 
             # 2) Buscar posição atual e ordens abertas
-            pos = await self.client.exchange.fapiPrivateV2GetPositionRisk({'symbol': symbol.replace('/', '')})
-            orders = await self.client.exchange.fetch_open_orders(symbol)
+            if snapshot is not None:
+                pos = snapshot.positions.get(market_id(symbol), [])
+                orders = snapshot.orders.get(market_id(symbol), [])
+            else:
+                pos = await self.client.exchange.fapiPrivateV2GetPositionRisk({'symbol': symbol.replace('/', '')})
+                orders = await self.client.exchange.fetch_open_orders(symbol)
 
             active = False
             for p in pos:
@@ -282,6 +747,7 @@ class LiveMAStrategy:
                 for o in orders:
                     if o['status'] == 'open' and o['type'].upper() in ['STOP_MARKET', 'TAKE_PROFIT_MARKET']:
                         await self.client.exchange.cancel_order(o['id'], symbol)
+                        cancelled.add(o['id'])
 
                 # 5) Limpa estado interno de posição
                 if self.position_side[symbol] is not None:
@@ -299,21 +765,49 @@ class LiveMAStrategy:
             for o in orders:
                 if o['status'] == 'open' and o['type'].upper() not in ['STOP_MARKET', 'TAKE_PROFIT_MARKET']:
                     await self.client.exchange.cancel_order(o['id'], symbol)
+                    cancelled.add(o['id'])
 
         except Exception as e:
             logger.error(f"Sync error {symbol}: {e}\n{traceback.format_exc()}")
+        finally:
+            if cancelled:
+                self._drop_orders(symbol, cancelled, snapshot)
+
+    def _drop_orders(self, symbol, order_ids, snapshot=None):
+        """Forget cancelled orders in ``snapshot`` and the cached account."""
+        key = market_id(symbol)
+        for snap in (snapshot, self.account):
+            if snap is not None and key in snap.orders:
+                snap.orders[key] = [o for o in snap.orders[key] if o.get('id') not in order_ids]
+
+    async def _fetch_depth_snapshot(self, symbol):
+        await self.rate_budget.acquire(depth_weight(DEPTH_SNAPSHOT_LIMIT))
+        return await self.client.exchange.fetch_order_book(symbol, limit=DEPTH_SNAPSHOT_LIMIT)
+
+    def process_depth(self, symbol, event):
+        """Apply a ``@depth`` diff to the local order book of ``symbol``."""
+        self.order_books.on_depth(symbol, event)
 
     async def validate_liquidity(self, symbol, qty):
-        """Check spread and depth before sending an order."""
+        """Check spread and depth before sending an order.
+
+        Reads the local order book when it is synced and fresh, otherwise
+        falls back to a REST snapshot.
+        """
         try:
-            ob = await self.client.exchange.fetch_order_book(symbol, limit=5)
-            bid = float(ob['bids'][0][0])
-            ask = float(ob['asks'][0][0])
-            spread = (ask - bid) / bid
+            book = self.order_books.get(symbol)
+            if book is not None:
+                spread = book.spread
+                depth = book.depth('bids', self.depth_bps)
+            else:
+                ob = await self.client.exchange.fetch_order_book(symbol, limit=5)
+                bid = float(ob['bids'][0][0])
+                ask = float(ob['asks'][0][0])
+                spread = (ask - bid) / bid
+                depth = sum(float(b[1]) for b in ob['bids'])
             if spread > 0.002:
                 logger.warning(f"High spread {spread*100:.2f}% for {symbol}")
                 return False
-            depth = sum(float(b[1]) for b in ob['bids'])
             if depth < qty * 3:
                 logger.warning(f"Low liquidity {depth} for {symbol}")
                 return False
@@ -328,21 +822,17 @@ class LiveMAStrategy:
             df = self.data[symbol].get(timeframe, pd.DataFrame())
             if df.empty or len(df) < 30:
                 return True
-            feats = extract_features(
-                df,
-                bb_period=self.config.get('bb_period', 20),
-                bb_k=self.config.get('bb_k', 2),
-                stoch_k_period=self.config.get('stoch_k_period', 14),
-                stoch_d_period=self.config.get('stoch_d_period', 3),
-                ema_short=self.config['indicators'][symbol].get('ema_short', 12),
-                ema_long=self.config['indicators'][symbol].get('ema_long', 26),
-                macd_fast=self.config['indicators'][symbol].get('macd_fast', 12),
-                macd_slow=self.config['indicators'][symbol].get('macd_slow', 26),
-                macd_signal=self.config['indicators'][symbol].get('macd_signal', 9),
-            )
-            features = feats.iloc[-1].to_dict()
-
-            result = self.signal_engine.get_signal_for_timeframe(features, symbol=symbol, timeframe=timeframe)
+            key = self._feature_key(symbol, timeframe)
+            cached = self.feature_cache.get(key, 'ai')
+            if cached is not None and cached[0] == self.signal_engine.model_version:
+                result = cached[1]
+            else:
+                features = self.feature_cache.get(key, 'features')
+                if features is None:
+                    feats = extract_features(df, **self._feature_params(symbol))
+                    features = feats.iloc[-1].to_dict()
+                    self.feature_cache.put(key, 'features', features)
+                result = self.signal_engine.get_signal_for_timeframe(features, symbol=symbol, timeframe=timeframe)
             if side == 'short':
                 return result['ok'] and result['confidence'] <= (1 - self.min_ai_confidence)
             return result['ok'] and result['confidence'] >= self.min_ai_confidence
@@ -350,6 +840,40 @@ class LiveMAStrategy:
             logger.error(f"AI check failed for {symbol}: {e}")
             return True
 
+    async def score_ai_batch(self, candidates):
+        """Run the AI model once over every ``(symbol, timeframe)`` candidate.
+
+        Feature rows and inference run in the compute executor; results are
+        stored in the feature cache so ``ai_accepts_trade`` on the same
+        closed candle needs no further model call.
+        """
+        pending = []
+        for symbol, tf in candidates:
+            if self.feature_cache.get(self._feature_key(symbol, tf), 'features') is None:
+                task = self._feature_tasks.get((symbol, tf))
+                if task is None or task.done():
+                    self._fill_feature_cache(symbol, tf)
+                    task = self._feature_tasks.get((symbol, tf))
+                if task is not None:
+                    pending.append(task)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        rows, keys = {}, {}
+        version = self.signal_engine.model_version
+        for symbol, tf in candidates:
+            key = self._feature_key(symbol, tf)
+            features = self.feature_cache.get(key, 'features')
+            cached = self.feature_cache.get(key, 'ai')
+            if features is not None and (cached is None or cached[0] != version):
+                rows[(symbol, tf)] = features
+                keys[(symbol, tf)] = key
+        if not rows:
+            return
+        results = await self.executor.submit_local(None, self.signal_engine.score_batch, rows)
+        for pair, result in results.items():
+            self.feature_cache.put(keys[pair], 'ai', (version, result))
+        logger.info(f"[AI] scored {len(results)} candidates in one batch")
+
     async def open_position(self, symbol, side, price, qty, tf):
         await self.sync_position(symbol)
         if self.position_side[symbol] or await self.has_open(symbol):
@@ -359,6 +883,7 @@ class LiveMAStrategy:
         if not self.signal_priority:
             if not await self.validate_liquidity(symbol, qty):
                 return
+            await self.score_ai_batch([(symbol, tf)])
             if not self.ai_accepts_trade(symbol, tf, side):
                 logger.info(f"AI rejected trade for {symbol} {tf}")
                 return
@@ -395,10 +920,10 @@ class LiveMAStrategy:
             return
 
     def calculate_cooldown(self, symbol, tf):
-        df = self.data[symbol].get(tf, pd.DataFrame())
-        if len(df) < 10:
+        close = self._buffer(symbol, tf).close
+        if len(close) < 10:
             return 30
-        vol = df['close'].pct_change().std() * 100
+        vol = np.std(np.diff(close) / close[:-1], ddof=1) * 100
         base = {'5m': 15, '15m': 30, '30m': 45, '1h': 30, '4h': 45, '1d': 60}
         return min(base.get(tf, 30) * (1 + vol), 1440)
 
@@ -475,9 +1000,12 @@ class LiveMAStrategy:
 
     def log_trade(self, symbol, trade_type, entry, exit_price, result, timeframe):
         row = [datetime.now().strftime('%Y-%m-%d %H:%M:%S'), symbol, timeframe, trade_type, entry, exit_price, ((exit_price - entry) / entry * 100 if trade_type == 'EXIT' else 0), result]
+        self._write_trade_rows(symbol, [row])
+
+    def _write_trade_rows(self, symbol, rows):
         try:
             with open('data/trade_log.csv', 'a') as f:
-                f.write(','.join(map(str, row)) + '\n')
+                f.writelines(','.join(map(str, row)) + '\n' for row in rows)
         except Exception as e:
             logger.error(f"Failed to log trade for {symbol}: {e}")
 
@@ -495,86 +1023,152 @@ class LiveMAStrategy:
         usdt = float(bal.get('USDT', {}).get('free', 0))
         if usdt < 50:
             return 0
-        qty = round(50 / float(price) * self.leverage[symbol], self.quantity_precision[symbol])
-        return qty if qty >= self.min_qty.get(symbol, 0) else 0
+        qty = 50 / float(price) * self.leverage[symbol]
+        if symbol in self.metadata:
+            qty = self.metadata.round_qty(symbol, qty)
+        else:
+            qty = round(qty, self.quantity_precision[symbol])
+        if qty < self.min_qty.get(symbol, 0) or qty * float(price) < self.min_notional.get(symbol, 0):
+            return 0
+        return qty
 
-    async def has_open(self, symbol):
-        orders = await self.client.exchange.fetch_open_orders(symbol)
+    async def has_open(self, symbol, snapshot=None):
+        if snapshot is not None:
+            orders = snapshot.orders.get(market_id(symbol), [])
+        else:
+            orders = await self.client.exchange.fetch_open_orders(symbol)
         return any(o['type'].upper() not in ['STOP_MARKET', 'TAKE_PROFIT_MARKET'] for o in orders)
 
+    def _simulation_candles(self, symbol, since):
+        """Base candles from the OHLCV store, or every warm-up buffer if it has none."""
+        if self.ohlcv_store is not None:
+            timestamps, values = self.ohlcv_store.read(symbol, self.timeframes[0], start=since)
+            if len(timestamps):
+                return dict(zip(COLUMNS, [timestamps, *values]))
+        frames = {tf: self._buffer(symbol, tf).frame() for tf in self.timeframes}
+        frames = {tf: df for tf, df in frames.items() if not df.empty}
+        return frames or None
+
     async def train_mode(self, days):
+        """Simulate the strategy over the last ``days`` and retrain on the trades.
+
+        Runs ``backtest_engine.simulate_strategy`` on stored candles, sizing
+        positions from a simulated balance (``train_balance``), and appends
+        all trades to the log in one write; no exchange requests are made.
+        """
         logger.info(f"Starting training mode for {days} days...")
+        # Candle timestamps are naive UTC.
+        start = pd.Timestamp.now('UTC').tz_localize(None) - pd.Timedelta(days=days)
+        # Leave the slowest timeframe enough closed candles to score at the start.
+        since = to_millis(start) - 30 * timeframe_to_ms(self.timeframes[-1])
         for symbol in self.symbols:
-            self.daily_trades[symbol] = []  # Reset daily trades for simulation
-            for tf in self.timeframes:
-                # Fetch historical data
-                since = int((pd.Timestamp.now() - pd.Timedelta(days=days)).timestamp() * 1000)
-                df = await self.client.fetch_candles(symbol, tf, limit=1000)
-                if df is None or df.empty:
-                    logger.warning(f"No data for {symbol} {tf} in training mode")
-                    continue
-                self.data[symbol][tf] = df
-
-                # Simulate trades for each candle
-                for i in range(30, len(df) - 1):  # Leave last candle for exit price
-                    self.data[symbol][tf] = df.iloc[:i+1]
-                    sig, timeframe = self.check_multi_timeframe_signal(symbol)
-                    if sig and len(self.daily_trades[symbol]) < self.max_trades:
-                        price = df['close'].iloc[i]
-                        qty = await self.calculate_qty(symbol, price)
-                        if qty == 0:
-                            continue
-                        self.daily_trades[symbol].append(datetime.now())
-                        self.log_trade(symbol, 'ENTRY', price, 0, 'open', tf)
-
-                        # Simulate exit based on next candle
-                        next_candle = df.iloc[i+1]
-                        tp, sl = self.calculate_tp_sl(symbol)
-                        exit_price = next_candle['close']
-                        if sig == 'long':
-                            if next_candle['high'] >= tp:
-                                exit_price = tp
-                                result = 'win'
-                            elif next_candle['low'] <= sl:
-                                exit_price = sl
-                                result = 'loss'
-                            else:
-                                result = 'win' if exit_price > price else 'loss'
-                        else:  # short
-                            if next_candle['low'] <= tp:
-                                exit_price = tp
-                                result = 'win'
-                            elif next_candle['high'] >= sl:
-                                exit_price = sl
-                                result = 'loss'
-                            else:
-                                result = 'win' if exit_price < price else 'loss'
-                        self.log_trade(symbol, 'EXIT', price, exit_price, result, tf)
-                        logger.info(f"Simulated trade for {symbol} {tf}: {sig}, Entry: {price}, Exit: {exit_price}, Result: {result}")
-                        await asyncio.sleep(0.1)  # Avoid rate limits
+            candles = self._simulation_candles(symbol, since)
+            if candles is None:
+                logger.warning(f"No data for {symbol} in training mode")
+                continue
+            trades, _ = await asyncio.to_thread(
+                simulate_strategy, candles, self.config, symbol, self.timeframes[0], self.timeframes,
+                self.config.get('train_balance', 1000),
+            )
+            trades = trades[trades['entry_time'] >= start]
+            rows = []
+            for t in trades.itertuples():
+                # Outcomes are known up front, and train_from_log learns from ENTRY rows.
+                rows.append([t.entry_time.strftime('%Y-%m-%d %H:%M:%S'), symbol, t.timeframe, 'ENTRY', t.entry_price, 0, 0, t.result])
+                rows.append([t.exit_time.strftime('%Y-%m-%d %H:%M:%S'), symbol, t.timeframe, 'EXIT', t.entry_price, t.exit_price,
+                             (t.exit_price - t.entry_price) / t.entry_price * 100, t.result])
+            self._write_trade_rows(symbol, rows)
+            logger.info(f"Simulated {len(trades)} trades for {symbol}")
         # Retrain model with simulated trades
-        train_from_log()
-        logger.info("Training mode completed, model retrained.")
+        await asyncio.to_thread(train_from_log)
+        await asyncio.to_thread(self.signal_engine.check_for_update)
+        logger.info(f"Training mode completed, model retrained (version {self.signal_engine.model_version}).")
+
+    async def evaluate_symbol(self, symbol, snapshot=None):
+        """Return ``(side, timeframe)`` if ``symbol`` may and wants to enter, else ``None``."""
+        if symbol in self.closing_only or symbol not in self.symbols:
+            return None
+        if self.cooldown[symbol] and datetime.now() < self.cooldown[symbol]:
+            return None
+        self.daily_trades[symbol] = [t for t in self.daily_trades[symbol] if t > datetime.now() - timedelta(days=1)]
+        if len(self.daily_trades[symbol]) >= self.max_trades:
+            return None
+        if self.position_side[symbol] or await self.has_open(symbol, snapshot):
+            return None
+        sig, tf = self.check_multi_timeframe_signal(symbol)
+        return (sig, tf) if sig else None
+
+    async def evaluate_symbols(self, symbols):
+        """Reconcile, score and act on ``symbols`` in one pass."""
+        signals = []
+        # While the user-data stream is live the snapshot is kept
+        # current by its events and only refreshed over REST every
+        # rest_sync_interval seconds.
+        cached = None if self._needs_rest_sync() else self.account
+        snapshot = await self.sync_all(symbols, cached)
+        await self.drop_closed_symbols()
+        for symbol in symbols:
+            result = await self.evaluate_symbol(symbol, snapshot)
+            if result:
+                signals.append((symbol, *result))
+        if signals and not self.signal_priority:
+            await self.score_ai_batch([(symbol, tf) for symbol, _, tf in signals])
+        for symbol, sig, tf in signals:
+            price = self.last_price(symbol, tf)
+            qty = await self.calculate_qty(symbol, price)
+            if qty:
+                await self.open_position(symbol, sig, price, qty, tf)
+
+    async def _wait_for_candles(self, timeout):
+        """Sleep until a candle closes (plus the debounce) or ``timeout`` elapses."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return
+        # Closes arrive in bursts at the top of the hour; gather them into
+        # one pass instead of waking once per symbol and timeframe.
+        if self.signal_debounce:
+            await asyncio.sleep(self.signal_debounce)
+
+    async def reconcile(self):
+        """Reconcile every symbol over REST without evaluating entries."""
+        await self.sync_all(self.symbols)
+        await self.drop_closed_symbols()
 
     async def run(self):
+        watcher = None
+        if self.model_reload_interval:
+            watcher = asyncio.create_task(self.signal_engine.watch_model(self.model_reload_interval))
+        metadata_refresh = asyncio.create_task(self.metadata.run_refresh(on_refresh=self._refresh_symbols))
+        next_sweep = 0.0
+        next_poll = time.monotonic() + (self.rest_poll_interval or 0)
         try:
             while True:
-                for symbol in self.symbols:
-                    await self.sync_position(symbol)
-                    if self.cooldown[symbol] and datetime.now() < self.cooldown[symbol]:
-                        continue
-                    self.daily_trades[symbol] = [t for t in self.daily_trades[symbol] if t > datetime.now() - timedelta(days=1)]
-                    if len(self.daily_trades[symbol]) >= self.max_trades:
-                        continue
-                    if self.position_side[symbol] or await self.has_open(symbol):
-                        continue
-                    sig, tf = self.check_multi_timeframe_signal(symbol)
-                    if sig:
-                        price = self.data[symbol][tf]['close'].iloc[-1]
-                        qty = await self.calculate_qty(symbol, price)
-                        if qty:
-                            await self.open_position(symbol, sig, price, qty, tf)
-                await asyncio.sleep(60)
+                self._wakeup.clear()
+                dirty, self._dirty = self._dirty, set()
+                now = time.monotonic()
+                sweep = now >= next_sweep
+                if sweep:
+                    next_sweep = now + self.sweep_interval
+                # The sweep catches expired cooldowns and anything a missed
+                # close event would otherwise leave unevaluated.
+                symbols = [s for s in self.symbols if self.ready[s] and (sweep or s in dirty)]
+                if symbols:
+                    await self.evaluate_symbols(symbols)
+                deadline = next_sweep
+                if self.rest_poll_interval:
+                    # Without a live user-data stream SL/TP fills are only
+                    # seen over REST, so poll between candle closes.
+                    if now >= next_poll:
+                        next_poll = now + self.rest_poll_interval
+                        if not sweep and self._needs_rest_sync():
+                            await self.reconcile()
+                    deadline = min(deadline, next_poll)
+                await self._wait_for_candles(max(deadline - time.monotonic(), 0))
         finally:
+            if watcher:
+                watcher.cancel()
+            metadata_refresh.cancel()
+            self.executor.shutdown()
             await self.client.close()
 
@@ -4,13 +4,38 @@ import asyncio
 import json
 import logging
 import os
+import pandas as pd
 from api_client import BinanceClient
 from live_strategy import LiveMAStrategy
-from backtest_engine import simulate_trades
+from backtest_engine import backtest_strategy, open_archive, simulate_trades
 from websocket_client import start_streams
+from user_data_stream import start_user_stream
+from candle_store import to_millis
+
+async def watch_config(strategy, path='config.json', interval=60):
+    """Apply edits to ``indicators`` in ``path`` to the running strategy."""
+    logger = logging.getLogger(__name__)
+    mtime = os.path.getmtime(path)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            current = os.path.getmtime(path)
+            if current == mtime:
+                continue
+            mtime = current
+            with open(path, 'r') as f:
+                indicators = json.load(f).get('indicators')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not reload {path}: {e}")
+            continue
+        if isinstance(indicators, dict) and indicators and indicators != strategy.config.get('indicators'):
+            logger.info("Symbol list changed in config.json")
+            await strategy.update_indicators(indicators)
 
 async def main():
     ws_task = None
+    user_task = None
+    config_task = None
     try:
         with open('config.json', 'r') as f:
             cfg = json.load(f)
@@ -32,9 +57,10 @@ async def main():
         client = BinanceClient(cfg)
         strategy = LiveMAStrategy(client, cfg)
         logger.info("Initializing strategy...")
-        await strategy.initialize()
-
         mode = cfg.get('mode', 'live')
+        # Live trading starts each symbol as soon as its own data is loaded.
+        await strategy.initialize(wait=mode != 'live')
+
         if mode == 'train':
             logger.info("Running in training mode...")
             await strategy.train_mode(cfg.get('train_days', 30))
@@ -42,6 +68,15 @@ async def main():
             logger.info("Running in backtest mode...")
             metrics, equity = simulate_trades()
             logger.info(f"Backtest results: {metrics}")
+            start = to_millis(pd.Timestamp.now('UTC').tz_localize(None) - pd.Timedelta(days=cfg.get('backtest_days', 365)))
+            for symbol in strategy.symbols:
+                # Only the pages of the backtested range are read from the archive.
+                archive = open_archive(symbol, '5m', store_root=cfg.get('ohlcv_store') or 'data/ohlcv')
+                candles = archive.window(start)
+                if not len(candles.close):
+                    continue
+                metrics, equity = backtest_strategy(candles, cfg, symbol)
+                logger.info(f"Strategy backtest for {symbol}: {metrics}")
         else:
             logger.info("Running in live mode...")
             ws_task = asyncio.create_task(
@@ -53,16 +88,21 @@ async def main():
                     cfg,
                 )
             )
+            if cfg.get('user_data_stream', True):
+                user_task = asyncio.create_task(start_user_stream(strategy, cfg))
+            if cfg.get('config_reload_interval', 60):
+                config_task = asyncio.create_task(watch_config(strategy, interval=cfg.get('config_reload_interval', 60)))
             await strategy.run()
     except Exception as e:
         logger.error(f"Error in main: {e}")
     finally:
-        if ws_task:
-            ws_task.cancel()
-            try:
-                await ws_task
-            except asyncio.CancelledError:
-                pass
+        for task in (ws_task, user_task, config_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         if 'client' in locals():
             await client.close()
 
@@ -0,0 +1,160 @@
+"""On-disk OHLCV history partitioned by symbol, timeframe and month."""
+
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from candle_store import COLUMNS, timeframe_to_ms
+from rate_limit import klines_weight
+
+logger = logging.getLogger(__name__)
+
+
+def _month(ts):
+    return str(np.datetime64(int(ts), 'ms').astype('datetime64[M]'))
+
+
+def _month_bounds(month):
+    start = np.datetime64(month, 'M')
+    return int(start.astype('datetime64[ms]').astype(np.int64)), int((start + 1).astype('datetime64[ms]').astype(np.int64))
+
+
+class OHLCVStore:
+    """Candles stored as ``root/SYMBOL/tf/YYYY-MM.npy`` float64 ``(n, 6)`` arrays.
+
+    Rows are ``timestamp(ms), open, high, low, close, volume`` sorted by
+    time; reads memory-map the partitions they need and slice them with a
+    binary search, so no CSV is parsed.  ``download`` only fetches candles
+    newer than the stored ones and saves every page as it arrives, so an
+    interrupted download resumes where it stopped.
+    """
+
+    def __init__(self, root='data/ohlcv'):
+        self.root = root
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.replace('/', ''), timeframe)
+
+    def months(self, symbol, timeframe):
+        directory = self._dir(symbol, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith('.npy'))
+
+    def _load(self, symbol, timeframe, month):
+        return np.load(os.path.join(self._dir(symbol, timeframe), f"{month}.npy"), mmap_mode='r')
+
+    def count(self, symbol, timeframe):
+        """Number of stored candles."""
+        return sum(len(self._load(symbol, timeframe, month)) for month in self.months(symbol, timeframe))
+
+    def last_timestamp(self, symbol, timeframe):
+        """Open time (ms) of the newest stored candle or ``None``."""
+        months = self.months(symbol, timeframe)
+        if not months:
+            return None
+        rows = self._load(symbol, timeframe, months[-1])
+        return int(rows[-1, 0]) if len(rows) else None
+
+    def append(self, symbol, timeframe, rows):
+        """Merge ``rows`` (``[ts, o, h, l, c, v]`` each) into their month partitions.
+
+        Rows for timestamps already stored replace them.  Returns the number
+        of rows written.
+        """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        if not len(rows):
+            return 0
+        directory = self._dir(symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        months = np.array([_month(ts) for ts in rows[:, 0]])
+        for month in np.unique(months):
+            new = rows[months == month]
+            path = os.path.join(directory, f"{month}.npy")
+            if os.path.exists(path):
+                new = np.concatenate([np.load(path), new])
+            # Keep the last occurrence of each timestamp, sorted.
+            _, keep = np.unique(new[::-1, 0], return_index=True)
+            merged = new[::-1][keep]
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, merged)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        return len(rows)
+
+    def read(self, symbol, timeframe, start=None, end=None, last=None):
+        """Return ``(timestamps, values)`` for ``start <= ts < end`` (ms).
+
+        ``values`` is a ``(5, n)`` OHLCV array as in ``frame_to_arrays``;
+        ``last`` keeps only the newest ``last`` candles of the range.
+        """
+        parts = []
+        months = self.months(symbol, timeframe)
+        if last is not None and start is None:
+            # Walk back from the end only as far as needed.
+            count = 0
+            for month in reversed(months):
+                if end is not None and _month_bounds(month)[0] >= end:
+                    continue
+                rows = self._load(symbol, timeframe, month)
+                if end is not None:
+                    rows = rows[:np.searchsorted(rows[:, 0], end)]
+                parts.insert(0, rows)
+                count += len(rows)
+                if count >= last:
+                    break
+        else:
+            for month in months:
+                lo, hi = _month_bounds(month)
+                if (start is not None and hi <= start) or (end is not None and lo >= end):
+                    continue
+                rows = self._load(symbol, timeframe, month)
+                i = np.searchsorted(rows[:, 0], start) if start is not None else 0
+                j = np.searchsorted(rows[:, 0], end) if end is not None else len(rows)
+                parts.append(rows[i:j])
+        data = np.concatenate(parts) if parts else np.empty((0, 6))
+        if last is not None:
+            data = data[-last:] if last else data[:0]
+        return data[:, 0].astype(np.int64), np.ascontiguousarray(data[:, 1:].T)
+
+    def read_frame(self, symbol, timeframe, start=None, end=None, last=None):
+        """``read`` as an OHLCV DataFrame with a datetime ``timestamp`` column."""
+        timestamps, values = self.read(symbol, timeframe, start, end, last)
+        df = pd.DataFrame(values.T, columns=COLUMNS[1:])
+        df.insert(0, 'timestamp', pd.to_datetime(timestamps, unit='ms'))
+        return df
+
+    async def download(self, fetch_ohlcv, symbol, timeframe, since, page_limit=1000, budget=None, now_ms=None):
+        """Fetch closed candles after the stored ones (or from ``since``) and append them.
+
+        Returns the number of candles added.
+        """
+        step = timeframe_to_ms(timeframe)
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        last = self.last_timestamp(symbol, timeframe)
+        if last is None and since is None:
+            raise ValueError(f"No stored candles for {symbol} {timeframe}; pass since")
+        cursor = since if last is None else max(last + step, since or 0)
+        added = 0
+        while cursor + step <= now_ms:
+            if budget is not None:
+                await budget.acquire(klines_weight(page_limit))
+            page = await fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+            # The newest kline is still forming until its close time passes.
+            page = [row for row in page if row[0] >= cursor and row[0] + step <= now_ms]
+            if not page:
+                break
+            added += self.append(symbol, timeframe, page)
+            cursor = int(page[-1][0]) + step
+        if added:
+            logger.info(f"Stored {added} new candles for {symbol} {timeframe}")
+        return added
@@ -0,0 +1,223 @@
+"""Local L2 order books maintained from the futures diff-depth stream."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LocalOrderBook:
+    """Order book of one symbol built from a REST snapshot plus ``depthUpdate`` diffs.
+
+    Follows Binance's futures rules: diffs older than the snapshot are
+    dropped, the first applied diff must straddle ``lastUpdateId`` and each
+    later diff's ``pu`` must equal the previous ``u``.  A broken chain
+    returns ``"gap"`` and the book stays unsynced until a new snapshot.
+
+    Best bid/ask are tracked on every update so ``spread`` is O(1); depth
+    and imbalance are computed once per book version and then memoized.
+    """
+
+    def __init__(self, symbol, max_pending=1000):
+        self.symbol = symbol
+        self.bids = {}
+        self.asks = {}
+        self.best_bid = None
+        self.best_ask = None
+        self.last_update_id = None
+        self.synced = False
+        self.updated_at = None
+        self.version = 0
+        self._pending = deque(maxlen=max_pending)
+        self._sides = {}
+        self._memo = {}
+
+    def apply_snapshot(self, snapshot):
+        """Load a REST snapshot (raw Binance or ccxt format) and replay buffered diffs.
+
+        Returns ``"gap"`` if the buffered diffs do not connect to it.
+        """
+        self.bids = {float(p): float(q) for p, q, *_ in snapshot['bids'] if float(q)}
+        self.asks = {float(p): float(q) for p, q, *_ in snapshot['asks'] if float(q)}
+        self.best_bid = max(self.bids) if self.bids else None
+        self.best_ask = min(self.asks) if self.asks else None
+        self.last_update_id = int(snapshot.get('lastUpdateId') or snapshot.get('nonce'))
+        self.synced = True
+        self._touch()
+        first = True
+        pending, self._pending = list(self._pending), deque(maxlen=self._pending.maxlen)
+        for event in pending:
+            if event['u'] < self.last_update_id:
+                continue
+            if (event['U'] > self.last_update_id) if first else (event.get('pu') != self.last_update_id):
+                self.synced = False
+                return "gap"
+            first = False
+            self._apply(event)
+        return "applied"
+
+    def apply_diff(self, event):
+        """Apply one ``depthUpdate`` event; returns ``"applied"``, ``"stale"``, ``"buffered"`` or ``"gap"``."""
+        if not self.synced:
+            self._pending.append(event)
+            return "buffered"
+        if event['u'] < self.last_update_id:
+            return "stale"
+        if event.get('pu') != self.last_update_id and event['U'] > self.last_update_id:
+            self.synced = False
+            self._pending.append(event)
+            logger.warning(f"Order book gap for {self.symbol}: pu={event.get('pu')} last={self.last_update_id}")
+            return "gap"
+        self._apply(event)
+        return "applied"
+
+    def _apply(self, event):
+        for price, qty in event.get('b', []):
+            self._set(self.bids, float(price), float(qty), True)
+        for price, qty in event.get('a', []):
+            self._set(self.asks, float(price), float(qty), False)
+        self.last_update_id = event['u']
+        self._touch()
+
+    def _set(self, levels, price, qty, is_bid):
+        if qty:
+            levels[price] = qty
+            if is_bid and (self.best_bid is None or price > self.best_bid):
+                self.best_bid = price
+            elif not is_bid and (self.best_ask is None or price < self.best_ask):
+                self.best_ask = price
+        elif levels.pop(price, None) is not None:
+            if is_bid and price == self.best_bid:
+                self.best_bid = max(levels) if levels else None
+            elif not is_bid and price == self.best_ask:
+                self.best_ask = min(levels) if levels else None
+
+    def _touch(self):
+        self.updated_at = time.time()
+        self.version += 1
+        self._sides.clear()
+        self._memo.clear()
+
+    @property
+    def age(self):
+        return time.time() - self.updated_at if self.updated_at else float('inf')
+
+    @property
+    def mid(self):
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self):
+        """Relative spread ``(ask - bid) / bid``."""
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return (self.best_ask - self.best_bid) / self.best_bid
+
+    def _side(self, side):
+        arrays = self._sides.get(side)
+        if arrays is None:
+            levels = self.bids if side == 'bids' else self.asks
+            prices = np.fromiter(levels.keys(), dtype=float, count=len(levels))
+            qtys = np.fromiter(levels.values(), dtype=float, count=len(levels))
+            order = np.argsort(-prices if side == 'bids' else prices)
+            arrays = self._sides[side] = (prices[order], np.cumsum(qtys[order]))
+        return arrays
+
+    def depth(self, side, bps=None, levels=None):
+        """Base-asset quantity on ``side`` within ``bps`` of the mid or in the top ``levels``."""
+        key = ('depth', side, bps, levels)
+        if key in self._memo:
+            return self._memo[key]
+        prices, cumulative = self._side(side)
+        if levels is not None:
+            n = min(levels, len(prices))
+        elif bps is not None and self.mid is not None:
+            if side == 'bids':
+                n = int(np.searchsorted(-prices, -self.mid * (1 - bps / 1e4), side='right'))
+            else:
+                n = int(np.searchsorted(prices, self.mid * (1 + bps / 1e4), side='right'))
+        else:
+            n = len(prices)
+        value = float(cumulative[n - 1]) if n else 0.0
+        self._memo[key] = value
+        return value
+
+    def imbalance(self, bps=10):
+        """``(bid_depth - ask_depth) / (bid_depth + ask_depth)`` within ``bps`` of the mid."""
+        bids, asks = self.depth('bids', bps), self.depth('asks', bps)
+        total = bids + asks
+        return (bids - asks) / total if total else 0.0
+
+
+class OrderBookManager:
+    """Route depth events to per-symbol books and resync them from REST snapshots.
+
+    ``fetch_snapshot(symbol)`` is a coroutine returning a depth snapshot.
+    ``get`` only hands out books that are synced and younger than
+    ``max_age`` seconds so callers can fall back to REST otherwise.  After a
+    failed or outdated snapshot the next one for that symbol waits
+    ``retry_delay`` seconds, doubling up to ``max_retry_delay``, so a
+    failing depth endpoint cannot drain the request budget.
+    """
+
+    def __init__(self, fetch_snapshot, max_age=5.0, retry_delay=1.0, max_retry_delay=60.0):
+        self._fetch_snapshot = fetch_snapshot
+        self.max_age = max_age
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.books = {}
+        self._resyncs = {}
+        self._delays = {}
+
+    def book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = LocalOrderBook(symbol)
+        return book
+
+    def on_depth(self, symbol, event):
+        book = self.book(symbol)
+        if book.apply_diff(event) in ("buffered", "gap"):
+            self._schedule_resync(symbol)
+
+    def _schedule_resync(self, symbol):
+        task = self._resyncs.get(symbol)
+        if task is not None and not task.done():
+            return
+        self._resyncs[symbol] = asyncio.get_running_loop().create_task(self.resync(symbol))
+
+    def _back_off(self, symbol):
+        delay = self._delays.get(symbol, 0)
+        self._delays[symbol] = min(max(2 * delay, self.retry_delay), self.max_retry_delay)
+
+    async def resync(self, symbol):
+        delay = self._delays.get(symbol)
+        if delay:
+            # Diffs arriving meanwhile are buffered; this task holds the slot.
+            await asyncio.sleep(delay)
+        book = self.book(symbol)
+        try:
+            snapshot = await self._fetch_snapshot(symbol)
+        except Exception as e:
+            logger.error(f"Depth snapshot failed for {symbol}: {e}")
+            self._back_off(symbol)
+            return
+        if book.apply_snapshot(snapshot) == "gap":
+            logger.info(f"Depth snapshot for {symbol} predates buffered updates, retrying")
+            self._back_off(symbol)
+            self._resyncs.pop(symbol, None)
+            self._schedule_resync(symbol)
+            return
+        self._delays.pop(symbol, None)
+
+    def get(self, symbol):
+        book = self.books.get(symbol)
+        if book is None or not book.synced or book.age > self.max_age:
+            return None
+        return book
@@ -0,0 +1,79 @@
+"""Request-weight budget shared by everything that calls the exchange REST API."""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Binance USDⓈ-M futures weights of the endpoints the bot calls.
+WEIGHTS = {
+    'exchange_info': 1,
+    'leverage': 1,
+    'position_risk': 5,
+    'open_orders': 1,
+    'open_orders_all': 40,
+    'order_book': 2,
+}
+
+# Liquidity checks only look ``depth_bps`` around the mid price, which the
+# top 100 levels cover; the full 1000-level book costs 20.
+DEPTH_SNAPSHOT_LIMIT = 100
+
+
+def depth_weight(limit):
+    """Weight of one ``/fapi/v1/depth`` request for ``limit`` levels."""
+    if limit <= 50:
+        return 2
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 10
+    return 20
+
+
+def klines_weight(limit):
+    """Weight of one ``/fapi/v1/klines`` request for ``limit`` candles."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class RateBudget:
+    """Token bucket over request weight.
+
+    ``weight_per_minute`` tokens refill continuously and at most ``burst``
+    can be held at once (defaults to a tenth of the per-minute budget, so a
+    cold start cannot spend the whole minute in one go).  ``acquire`` waits
+    in FIFO order until enough weight is available.
+    """
+
+    def __init__(self, weight_per_minute=1200, burst=None):
+        self.rate = weight_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(weight_per_minute / 10, 1))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.spent = 0
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, weight=1):
+        weight = min(weight, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < weight:
+                delay = (weight - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= weight
+            self.spent += weight
@@ -0,0 +1,115 @@
+"""Microbenchmark of WebSocket message decoding and dispatch.
+
+Compares the old per-message path (``json.loads``, stream-name parsing and a
+one-row DataFrame per closed kline) with ``websocket_client.build_router``.
+
+    python scripts/bench_ws_decode.py --symbols 200 --messages 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import websocket_client  # noqa: E402
+
+
+class NullStrategy:
+    def process_timeframe_data(self, symbol, timeframe, kline):
+        pass
+
+    def process_tick(self, symbol, price, **kwargs):
+        pass
+
+    def process_depth(self, symbol, event):
+        pass
+
+
+def make_messages(symbols, timeframes, count):
+    messages = []
+    for i in range(count):
+        symbol = random.choice(symbols)
+        price = f"{100 + random.random():.4f}"
+        if i % 4 == 0:
+            tf = random.choice(timeframes)
+            messages.append(json.dumps({"stream": f"{symbol.lower()}@kline_{tf}", "data": {
+                "e": "kline", "E": 1700000000000 + i, "s": symbol,
+                "k": {"t": 1700000000000, "T": 1700000299999, "s": symbol, "i": tf,
+                      "o": price, "h": price, "l": price, "c": price, "v": "12.5", "x": True},
+            }}))
+        else:
+            messages.append(json.dumps({"stream": f"{symbol.lower()}@ticker", "data": {
+                "e": "24hrTicker", "E": 1700000000000 + i, "s": symbol, "c": price,
+            }}))
+    return messages
+
+
+def legacy_dispatch(strategy, valid_timeframes):
+    """The decoding loop body of ``start_streams`` before the routing table."""
+
+    def dispatch(response):
+        message = json.loads(response)
+        data = message.get('data', {})
+        stream_name = message.get('stream', '')
+        if not data or not stream_name:
+            return
+        symbol = data.get('s', '').upper()
+        if not symbol:
+            return
+        if '@kline_' in stream_name:
+            kline = data.get('k', {})
+            if not kline or not kline.get('x', False):
+                return
+            timeframe = stream_name.split('@kline_')[1]
+            if timeframe not in valid_timeframes:
+                return
+            df = pd.DataFrame({
+                'timestamp': [pd.Timestamp(kline['t'], unit='ms')],
+                'open': [float(kline['o'])],
+                'high': [float(kline['h'])],
+                'low': [float(kline['l'])],
+                'close': [float(kline['c'])],
+                'volume': [float(kline['v'])]
+            })
+            strategy.process_timeframe_data(symbol, timeframe, df)
+        elif '@ticker' in stream_name:
+            price = float(data.get('c', 0))
+            if price > 0:
+                strategy.process_tick(symbol, price, ts=data.get('E'))
+
+    return dispatch
+
+
+def measure(dispatch, messages):
+    start = time.perf_counter()
+    for raw in messages:
+        dispatch(raw)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50000)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    timeframes = ["5m", "15m", "1h"]
+    messages = make_messages(symbols, timeframes, args.messages)
+    strategy = NullStrategy()
+    _, routed = websocket_client.build_router(symbols, timeframes, strategy)
+
+    before = measure(legacy_dispatch(strategy, timeframes), messages)
+    after = measure(routed, messages)
+    print(f"decoder: {websocket_client.loads.__module__}")
+    print(f"before: {before:12,.0f} msg/s")
+    print(f"after:  {after:12,.0f} msg/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,245 @@
 """Evaluate indicator data or a trained model to generate trading signals."""
 
+import asyncio
+import hashlib
 import joblib
 import os
 import logging
+import tempfile
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+
+from features import FEATURE_COLUMNS
 
 logger = logging.getLogger(__name__)
 
+# Column order of models trained before the feature set was extended.
+LEGACY_FEATURES = ['ema_short', 'ema_long', 'macd', 'macdsignal', 'rsi', 'adx', 'obv', 'atr', 'volume']
+
+
+def model_feature_order(model):
+    """Return the feature names ``model`` expects, in column order.
+
+    Names stored on the booster (or ``feature_names_in_``) win; unnamed
+    models are matched on their feature count.  Raises ``ValueError`` when
+    the model needs a feature this bot does not compute.
+    """
+    names = None
+    get_booster = getattr(model, 'get_booster', None)
+    if get_booster is not None:
+        names = get_booster().feature_names
+    if names is None:
+        names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        names = [str(n) for n in names]
+        unknown = [n for n in names if n not in FEATURE_COLUMNS]
+        if unknown:
+            raise ValueError(f"model expects unknown features {unknown}")
+        return names
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features == len(FEATURE_COLUMNS):
+        return list(FEATURE_COLUMNS)
+    if n_features == len(LEGACY_FEATURES):
+        return list(LEGACY_FEATURES)
+    raise ValueError(f"cannot infer feature names for a model with {n_features} features")
+
+
+def file_checksum(path):
+    """SHA-256 of a model artifact, used as its version."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dump_model(model, path):
+    """Write ``model`` to ``path`` atomically so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.model-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(model, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# Everything the scoring path needs about one model, swapped as a unit.
+_ModelState = namedtuple('_ModelState', 'model booster feature_order columns version')
+
+
 class SignalEngine:
     def __init__(self, model_path="model_xgb.pkl"):
-        self.model = None
         self.model_path = model_path
+        self._state = _ModelState(None, None, list(LEGACY_FEATURES),
+                                  [FEATURE_COLUMNS.index(n) for n in LEGACY_FEATURES], None)
+        self._stat = None
+        # (stat, version) of the last artifact that failed to load.
+        self._failed = (None, None)
+        self._reload_lock = threading.Lock()
+        # Feature row every candidate model must score before it goes live.
+        self.canary_row = np.zeros(len(FEATURE_COLUMNS))
         self.load_model()
 
+    @property
+    def model(self):
+        return self._state.model
+
+    @property
+    def feature_order(self):
+        return self._state.feature_order
+
+    @property
+    def model_version(self):
+        """Checksum prefix of the active model artifact, ``None`` without a model."""
+        version = self._state.version
+        return version[:12] if version else None
+
     def load_model(self):
         try:
             if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
-                logger.info("SignalEngine: Modelo XGBoost carregado com sucesso.")
+                self.check_for_update()
             else:
                 logger.warning("SignalEngine: Modelo não encontrado, fallback ativado.")
         except Exception as e:
             logger.warning(f"SignalEngine: Falha ao carregar modelo ({e}); fallback ativado.")
 
-    def get_signal_for_timeframe(self, data, min_score=0.65, symbol=None, timeframe=None):
-        try:
-            # Calcular score simples baseado nos indicadores (fallback)
-            base_score = sum([
-                data.get('ema_short', 0),
-                data.get('ema_long', 0),
-                data.get('macd', 0),
-                data.get('macdsignal', 0),
-                data.get('rsi', 0),
-                data.get('adx', 0),
-                data.get('obv', 0),
-                data.get('atr', 0),
-                data.get('volume', 0)
-            ]) / 9
-
-            proba = base_score
-            ok = base_score >= min_score
-            decision = "OK" if ok else "FAIL"
-
-            # Se modelo carregado, usa predição real
-            if self.model:
-                features = [[
-                    data.get('ema_short', 0),
-                    data.get('ema_long', 0),
-                    data.get('macd', 0),
-                    data.get('macdsignal', 0),
-                    data.get('rsi', 0),
-                    data.get('adx', 0),
-                    data.get('obv', 0),
-                    data.get('atr', 0),
-                    data.get('volume', 0)
-                ]]
-                proba = self.model.predict_proba(features)[0][1]
-                ok = proba >= 0.5
-                decision = "OK" if ok else "FAIL"
+    def _file_stat(self):
+        st = os.stat(self.model_path)
+        return st.st_mtime_ns, st.st_size
+
+    def check_for_update(self):
+        """Load the model artifact if it changed on disk; return ``True`` on swap.
+
+        Blocking (file I/O and unpickling), so the event loop calls it through
+        ``asyncio.to_thread``.  A model that fails to load or to score the
+        canary row is logged and the active model keeps serving; it is not
+        retried until the file changes again.
+        """
+        with self._reload_lock:
+            try:
+                stat = self._file_stat()
+            except FileNotFoundError:
+                return False
+            if stat in (self._stat, self._failed[0]):
+                return False
+            version = file_checksum(self.model_path)
+            if version == self._state.version:
+                self._stat = stat
+                return False
+            if version == self._failed[1]:
+                self._failed = (stat, version)
+                return False
+            try:
+                model = joblib.load(self.model_path)
+                state = self._prepare(model, version)
+                self._validate(state)
+            except Exception:
+                self._failed = (stat, version)
+                raise
+            self._state = state
+            self._stat = stat
+        logger.info(f"SignalEngine: Modelo XGBoost carregado com sucesso (versão {self.model_version}).")
+        return True
+
+    async def watch_model(self, interval=30):
+        """Poll the model artifact and hot-swap new versions until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.check_for_update)
+            except Exception as e:
+                logger.warning(f"SignalEngine: Falha ao recarregar modelo ({e}); mantendo versão {self.model_version}.")
+
+    def _prepare(self, model, version=None):
+        order = model_feature_order(model)
+        get_booster = getattr(model, 'get_booster', None)
+        booster = get_booster() if get_booster is not None else None
+        if booster is not None and not hasattr(booster, 'inplace_predict'):
+            booster = None
+        return _ModelState(model, booster, order, [FEATURE_COLUMNS.index(n) for n in order], version)
+
+    def _validate(self, state):
+        X = self._matrix(state, [self.canary_row])
+        proba = self._predict(state, X)
+        if proba.shape != (1,) or not np.all((proba >= 0) & (proba <= 1)):
+            raise ValueError(f"canary prediction {proba!r} is not a probability")
+
+    def set_model(self, model, version=None):
+        """Validate ``model`` on the canary row and make it the active model."""
+        state = self._prepare(model, version)
+        self._validate(state)
+        self._state = state
+
+    @staticmethod
+    def _matrix(state, rows):
+        X = np.empty((len(rows), len(state.feature_order)), dtype=np.float32)
+        for i, row in enumerate(rows):
+            if isinstance(row, Mapping):
+                X[i] = [row.get(name, 0) for name in state.feature_order]
+            else:
+                X[i] = np.asarray(row, dtype=np.float32)[state.columns]
+        return X
 
-            logger.info(f"[AI] {symbol or ''} {timeframe or ''} - proba: {proba:.4f} - decision: {decision}")
-            return {"ok": ok, "confidence": round(proba, 4)}
+    @staticmethod
+    def _predict(state, X):
+        if state.booster is not None:
+            proba = np.asarray(state.booster.inplace_predict(X))
+        else:
+            proba = np.asarray(state.model.predict_proba(X))
+        if proba.ndim == 2:
+            proba = proba[:, 1]
+        return proba
 
+    def feature_matrix(self, rows):
+        """Stack feature rows into a float32 matrix in the model's column order.
+
+        Rows are dicts keyed by feature name or arrays in ``FEATURE_COLUMNS``
+        order (as returned by ``features.latest_features``).
+        """
+        return self._matrix(self._state, rows)
+
+    def predict_proba(self, X):
+        """Probability of the positive class for every row of ``X``."""
+        return self._predict(self._state, X)
+
+    def score_batch(self, rows, min_score=0.65):
+        """Score many feature rows with one model invocation.
+
+        ``rows`` maps a key such as ``(symbol, timeframe)`` to a feature row;
+        the result maps the same keys to ``{"ok": ..., "confidence": ...}``.
+        """
+        keys = list(rows)
+        if not keys:
+            return {}
+        state = self._state
+        try:
+            X = self._matrix(state, [rows[k] for k in keys])
+            if state.model is not None:
+                proba = self._predict(state, X)
+                ok = proba >= 0.5
+            else:
+                # Sem modelo: média simples dos indicadores (fallback)
+                proba = X.mean(axis=1)
+                ok = proba >= min_score
         except Exception as e:
             logger.error(f"Erro ao gerar sinal: {e}")
-            return {"ok": False, "confidence": 0.0}
+            return {k: {"ok": False, "confidence": 0.0} for k in keys}
+        return {
+            k: {"ok": bool(o), "confidence": round(float(p), 4)}
+            for k, p, o in zip(keys, proba, ok)
+        }
+
+    def get_signal_for_timeframe(self, data, min_score=0.65, symbol=None, timeframe=None):
+        result = self.score_batch({(symbol, timeframe): data}, min_score=min_score)[(symbol, timeframe)]
+        decision = "OK" if result["ok"] else "FAIL"
+        logger.info(f"[AI] {symbol or ''} {timeframe or ''} - proba: {result['confidence']:.4f} - decision: {decision}")
+        return result
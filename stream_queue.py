@@ -0,0 +1,144 @@
+"""Bounded, coalescing hand-off between WebSocket readers and strategy handlers."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class StreamQueue:
+    """Per-(symbol, stream) queue drained by one consumer task.
+
+    Readers only enqueue, so a slow handler never delays ``ws.recv()``.
+
+    * Ticks are coalesced latest-wins per symbol: price and timestamp of the
+      newest tick, high/low over all merged ticks and their summed quantity.
+      A tick not handled within ``max_tick_age`` seconds is dropped.
+    * Closed klines are queued in order and never dropped.
+    * Depth diffs keep the newest ``max_depth_events`` per symbol; dropping
+      older ones breaks the update chain and the order book resyncs.
+
+    ``stats()`` reports queue depth, handling lag and drop counters.
+    """
+
+    def __init__(self, on_kline, on_tick, on_depth=None, max_depth_events=1000, max_tick_age=2.0, batch=256):
+        self.on_kline = on_kline
+        self.on_tick = on_tick
+        self.on_depth = on_depth
+        self.max_depth_events = max_depth_events
+        self.max_tick_age = max_tick_age
+        self.batch = batch
+        self._ready = deque()
+        self._klines = {}
+        self._depth = {}
+        self._ticks = {}
+        self._wakeup = asyncio.Event()
+        self.received = 0
+        self.coalesced = 0
+        self.stale_ticks = 0
+        self.dropped_depth = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def depth(self):
+        """Items waiting for the consumer."""
+        return (sum(map(len, self._klines.values())) + sum(map(len, self._depth.values()))
+                + len(self._ticks))
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'received': self.received,
+            'coalesced': self.coalesced,
+            'stale_ticks': self.stale_ticks,
+            'dropped_depth': self.dropped_depth,
+        }
+
+    def _enqueue(self, key, pending):
+        self.received += 1
+        if not pending:
+            self._ready.append(key)
+        self._wakeup.set()
+
+    def put_kline(self, symbol, timeframe, kline):
+        queue = self._klines.setdefault((symbol, timeframe), deque())
+        self._enqueue(('kline', symbol, timeframe), queue)
+        queue.append((kline, time.monotonic()))
+
+    def put_depth(self, symbol, event):
+        queue = self._depth.get(symbol)
+        if queue is None:
+            queue = self._depth[symbol] = deque(maxlen=self.max_depth_events)
+        self._enqueue(('depth', symbol), queue)
+        if len(queue) == queue.maxlen:
+            self.dropped_depth += 1
+        queue.append((event, time.monotonic()))
+
+    def put_tick(self, symbol, price, qty=0.0, ts=None):
+        tick = self._ticks.get(symbol)
+        self._enqueue(('tick', symbol), tick)
+        now = time.monotonic()
+        if tick is None:
+            # [price, qty, ts, high, low, first enqueued, last updated]
+            self._ticks[symbol] = [price, qty, ts, price, price, now, now]
+            return
+        self.coalesced += 1
+        tick[0] = price
+        tick[1] += qty
+        tick[2] = ts
+        tick[3] = max(tick[3], price)
+        tick[4] = min(tick[4], price)
+        tick[6] = now
+
+    def _observe(self, enqueued_at, now):
+        self.lag = now - enqueued_at
+        if self.lag > self.max_lag:
+            self.max_lag = self.lag
+
+    def _call(self, handler, *args, **kwargs):
+        try:
+            handler(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Stream handler {getattr(handler, '__name__', handler)} failed for {args[0]}: {e}")
+
+    def drain(self, limit=None):
+        """Hand up to ``limit`` pending keys to the handlers; return how many were handled."""
+        handled = 0
+        while self._ready and (limit is None or handled < limit):
+            key = self._ready.popleft()
+            handled += 1
+            now = time.monotonic()
+            if key[0] == 'kline':
+                queue = self._klines[key[1:]]
+                while queue:
+                    kline, enqueued_at = queue.popleft()
+                    self._observe(enqueued_at, now)
+                    self._call(self.on_kline, key[1], key[2], kline)
+            elif key[0] == 'depth':
+                queue = self._depth[key[1]]
+                while queue:
+                    event, enqueued_at = queue.popleft()
+                    self._observe(enqueued_at, now)
+                    self._call(self.on_depth, key[1], event)
+            else:
+                price, qty, ts, high, low, enqueued_at, updated_at = self._ticks.pop(key[1])
+                self._observe(enqueued_at, now)
+                if now - updated_at > self.max_tick_age:
+                    self.stale_ticks += 1
+                    continue
+                self._call(self.on_tick, key[1], price, qty=qty, ts=ts, high=high, low=low)
+        return handled
+
+    async def run(self):
+        """Consume until cancelled, yielding to the readers between batches."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._ready:
+                self.drain(self.batch)
+                await asyncio.sleep(0)
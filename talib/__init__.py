@@ -1,72 +1,79 @@
-import pandas as pd
+"""Minimal NumPy stand-in for the TA-Lib functions used by the bot.
+
+The maths lives in :mod:`indicators` (vectorized ``ewm(adjust=False)``
+recurrences seeded like the ``ta`` package, Wilder smoothing for
+RSI/ATR/ADX); this module only adapts it to the TA-Lib call signatures.
+Every function accepts NumPy arrays or pandas Series and returns the same
+kind (Series keep the input index).  Warm-up values are ``nan``.  Pass
+``dtype=np.float32`` to get single precision output; the maths always runs
+in float64.
+"""
+
 import numpy as np
+import pandas as pd
+
+import indicators
+from indicators import _windows
+
+
+def _array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _wrap(like, dtype, *outputs):
+    if dtype is not None:
+        outputs = tuple(o.astype(dtype) for o in outputs)
+    if isinstance(like, pd.Series):
+        outputs = tuple(pd.Series(o, index=like.index) for o in outputs)
+    return outputs[0] if len(outputs) == 1 else outputs
+
+
+def _warm_up(values, count):
+    """``values`` with the first ``count`` entries set to ``nan``."""
+    values[:count] = np.nan
+    return values
+
+
+def EMA(series, timeperiod=30, dtype=None):
+    return _wrap(series, dtype, indicators.ema(_array(series), timeperiod))
+
+
+def MACD(series, fastperiod=12, slowperiod=26, signalperiod=9, dtype=None):
+    macd, signal = indicators.macd(_array(series), fastperiod, slowperiod, signalperiod)
+    return _wrap(series, dtype, macd, signal, macd - signal)
+
+
+def RSI(series, timeperiod=14, dtype=None):
+    return _wrap(series, dtype, indicators.rsi(_array(series), timeperiod))
+
+
+def ADX(high, low, close, timeperiod=14, dtype=None):
+    # ``indicators.adx`` reports 0 during its warm-up, like ``ta``.
+    out = indicators.adx(_array(high), _array(low), _array(close), timeperiod)
+    return _wrap(close, dtype, _warm_up(out, 2 * timeperiod - 1))
+
+
+def OBV(close, volume, dtype=None):
+    # TA-Lib leaves OBV unchanged on an unchanged close; ``ta`` adds the volume.
+    c, v = _array(close), _array(volume)
+    direction = np.sign(np.diff(c, prepend=c[:1]))
+    direction[:1] = 1
+    return _wrap(close, dtype, np.cumsum(direction * v))
+
+
+def ATR(high, low, close, timeperiod=14, dtype=None):
+    out = indicators.atr(_array(high), _array(low), _array(close), timeperiod)
+    return _wrap(close, dtype, _warm_up(out, timeperiod - 1))
+
+
+def BBANDS(series, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0, dtype=None):
+    upper, ma, _ = indicators.bollinger(_array(series), timeperiod, 1)
+    std = upper - ma
+    return _wrap(series, dtype, ma + nbdevup * std, ma, ma - nbdevdn * std)
 
 
-def EMA(series, timeperiod=30):
-    return series.ewm(span=timeperiod, adjust=False).mean()
-
-
-def MACD(series, fastperiod=12, slowperiod=26, signalperiod=9):
-    ema_fast = EMA(series, fastperiod)
-    ema_slow = EMA(series, slowperiod)
-    macd = ema_fast - ema_slow
-    signal = EMA(macd, signalperiod)
-    hist = macd - signal
-    return macd, signal, hist
-
-
-def RSI(series, timeperiod=14):
-    delta = series.diff()
-    up = delta.clip(lower=0)
-    down = -delta.clip(upper=0)
-    ma_up = up.rolling(timeperiod).mean()
-    ma_down = down.rolling(timeperiod).mean()
-    rs = ma_up / ma_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def ADX(high, low, close, timeperiod=14):
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    plus_dm = (high - high.shift()).where((high - high.shift()) > (low.shift() - low), 0.0).clip(lower=0)
-    minus_dm = (low.shift() - low).where((low.shift() - low) > (high - high.shift()), 0.0).clip(lower=0)
-    atr = tr.rolling(timeperiod).mean()
-    plus_di = 100 * (plus_dm.rolling(timeperiod).sum() / atr)
-    minus_di = 100 * (minus_dm.rolling(timeperiod).sum() / atr)
-    dx = (abs(plus_di - minus_di) / (plus_di + minus_di)) * 100
-    adx = dx.rolling(timeperiod).mean()
-    return adx
-
-
-def OBV(close, volume):
-    direction = close.diff().fillna(0).apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
-    return (volume * direction).cumsum()
-
-
-def ATR(high, low, close, timeperiod=14):
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(timeperiod).mean()
-    return atr
-
-
-def BBANDS(series, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0):
-    ma = series.rolling(timeperiod).mean()
-    std = series.rolling(timeperiod).std()
-    upper = ma + nbdevup * std
-    lower = ma - nbdevdn * std
-    return upper, ma, lower
-
-
-def STOCH(high, low, close, fastk_period=14, slowk_period=3, slowk_matype=0, slowd_period=3, slowd_matype=0):
-    lowest_low = low.rolling(fastk_period).min()
-    highest_high = high.rolling(fastk_period).max()
-    fast_k = 100 * (close - lowest_low) / (highest_high - lowest_low)
-    slow_k = fast_k.rolling(slowk_period).mean()
-    slow_d = slow_k.rolling(slowd_period).mean()
-    return slow_k, slow_d
+def STOCH(high, low, close, fastk_period=14, slowk_period=3, slowk_matype=0, slowd_period=3, slowd_matype=0,
+          dtype=None):
+    _, slow_k = indicators.stochastic(_array(high), _array(low), _array(close), fastk_period, slowk_period)
+    slow_d = _windows(slow_k, slowd_period).mean(axis=1)
+    return _wrap(close, dtype, slow_k, slow_d)
@@ -0,0 +1,114 @@
+import sys, os, types, types as modtypes
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+from live_strategy import LiveMAStrategy
+
+
+class AccountExchange:
+    def __init__(self):
+        self.calls = []
+        self.fail_snapshot = False
+        self.positions = [
+            {'symbol': 'BTCUSDT', 'positionAmt': '0.5', 'entryPrice': '100', 'unRealizedProfit': '1'},
+            {'symbol': 'ETHUSDT', 'positionAmt': '0', 'entryPrice': '0', 'unRealizedProfit': '0'},
+            {'symbol': 'SOLUSDT', 'positionAmt': '0', 'entryPrice': '0', 'unRealizedProfit': '0'},
+        ]
+        self.orders = [
+            {'id': 'sl1', 'symbol': 'BTC/USDT:USDT', 'type': 'STOP_MARKET', 'status': 'open', 'info': {'symbol': 'BTCUSDT'}},
+            {'id': 'tp1', 'symbol': 'BTC/USDT:USDT', 'type': 'TAKE_PROFIT_MARKET', 'status': 'open', 'info': {'symbol': 'BTCUSDT'}},
+            {'id': 'lim', 'symbol': 'SOL/USDT:USDT', 'type': 'LIMIT', 'status': 'open', 'info': {'symbol': 'SOLUSDT'}},
+        ]
+
+    async def fapiPrivateV2GetPositionRisk(self, params):
+        self.calls.append(('positions', params.get('symbol')))
+        if self.fail_snapshot and not params:
+            raise ConnectionError('timeout')
+        return [p for p in self.positions if params.get('symbol') in (None, p['symbol'])]
+
+    async def fetch_open_orders(self, symbol=None):
+        self.calls.append(('orders', symbol))
+        return [o for o in self.orders if symbol in (None, o['info']['symbol'])]
+
+    async def fetch_order(self, order_id, symbol):
+        self.calls.append(('order', order_id))
+        return {'id': order_id, 'status': 'canceled'}
+
+    async def cancel_order(self, order_id, symbol):
+        self.calls.append(('cancel', order_id))
+        self.orders = [o for o in self.orders if o['id'] != order_id]
+
+
+class DummyClient:
+    def __init__(self):
+        self.exchange = AccountExchange()
+
+
+def make_strategy():
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}, 'ETHUSDT': {}, 'SOLUSDT': {}}})
+    strat.position_side['BTCUSDT'] = 'long'
+    strat.sl_order_id['BTCUSDT'] = 'sl1'
+    strat.tp_order_id['BTCUSDT'] = 'tp1'
+    return strat
+
+
+@pytest.mark.asyncio
+async def test_sync_all_uses_one_snapshot_for_every_symbol():
+    strat = make_strategy()
+    snapshot = await strat.sync_all()
+    calls = strat.client.exchange.calls
+
+    assert ('positions', None) in calls and ('orders', None) in calls
+    # no per-symbol fetches, and open SL/TP orders are not polled
+    assert [c for c in calls if c[0] in ('positions', 'orders', 'order')] == [('positions', None), ('orders', None)]
+    # the orphan limit order on SOL is still reconciled
+    assert ('cancel', 'lim') in calls
+    assert strat.position_side['BTCUSDT'] == 'long'
+    assert await strat.has_open('BTCUSDT', snapshot) is False
+
+
+@pytest.mark.asyncio
+async def test_vanished_exit_order_is_fetched():
+    strat = make_strategy()
+    strat.client.exchange.orders = [o for o in strat.client.exchange.orders if o['id'] != 'sl1']
+    await strat.sync_all(['BTCUSDT'])
+    assert ('order', 'sl1') in strat.client.exchange.calls
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_per_symbol_sync_when_snapshot_fails():
+    strat = make_strategy()
+    strat.client.exchange.fail_snapshot = True
+    assert await strat.sync_all() is None
+    calls = strat.client.exchange.calls
+    assert {('positions', s) for s in strat.symbols} <= set(calls)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_orders_leave_the_snapshot():
+    strat = make_strategy()
+    snapshot = await strat.sync_all(['SOLUSDT'])
+    assert ('cancel', 'lim') in strat.client.exchange.calls
+    assert await strat.has_open('SOLUSDT', snapshot) is False
+    assert strat.account.orders['SOLUSDT'] == []
+
+
+@pytest.mark.asyncio
+async def test_exit_fills_match_snapshot_by_market_id():
+    strat = make_strategy()
+    strat.sl_order_id['BTC/USDT'] = 'sl1'
+    strat.tp_order_id['BTC/USDT'] = 'tp1'
+    snapshot = await strat.fetch_account_snapshot()
+    await strat.check_exit_fills('BTC/USDT', snapshot)
+    assert not [c for c in strat.client.exchange.calls if c[0] == 'order']
@@ -0,0 +1,122 @@
+import sys, os, types, types as modtypes
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import time
+import pandas as pd
+from backfill import missing_range, fetch_range, backfill_gaps
+from rate_limit import RateBudget
+from live_strategy import LiveMAStrategy
+
+STEP = 300_000  # 5m
+T0 = 1_700_000_100_000 // STEP * STEP
+
+
+class Exchange:
+    def __init__(self):
+        self.calls = []
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((symbol, timeframe, since, limit))
+        step = {'5m': STEP, '1h': 12 * STEP}[timeframe]
+        now = int(time.time() * 1000)
+        return [[t, 1.0, 2.0, 0.5, float(t // step % 100), 1.0]
+                for t in range(since, since + limit * step, step) if t + step <= now]
+
+
+def test_missing_range():
+    now = T0 + 5 * STEP + 100  # candle T0+5*STEP is still forming
+    assert missing_range(T0, '5m', now) == (T0 + STEP, 4)
+    assert missing_range(T0, '5m', now, max_candles=2) == (T0 + 3 * STEP, 2)
+    assert missing_range(T0 + 4 * STEP, '5m', now) is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_range_pages_under_budget():
+    exchange = Exchange()
+    budget = RateBudget(1200)
+    rows = await fetch_range(exchange.fetch_ohlcv, 'BTCUSDT', '5m', T0, 7, budget, page_limit=3)
+    assert [r[0] for r in rows] == [T0 + i * STEP for i in range(7)]
+    assert [(since, limit) for _, _, since, limit in exchange.calls] == [
+        (T0, 3), (T0 + 3 * STEP, 3), (T0 + 6 * STEP, 1)]
+    assert budget.spent == 3
+
+
+@pytest.mark.asyncio
+async def test_backfill_gaps_skips_current_series():
+    exchange = Exchange()
+    now = T0 + 10 * STEP + 1
+    filled = await backfill_gaps(exchange.fetch_ohlcv, {
+        ('BTCUSDT', '5m'): T0 + 8 * STEP,   # one closed candle missing
+        ('ETHUSDT', '5m'): T0 + 9 * STEP,   # up to date
+    }, now_ms=now)
+    assert list(filled) == [('BTCUSDT', '5m')]
+    assert [r[0] for r in filled[('BTCUSDT', '5m')]] == [T0 + 9 * STEP]
+    assert len(exchange.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_strategy_backfill_merges_missing_candles():
+    class Client:
+        exchange = Exchange()
+
+    strat = LiveMAStrategy(Client(), {'indicators': {'BTCUSDT': {}}})
+    last_closed = (int(time.time() * 1000) // STEP - 1) * STEP
+    start = last_closed - 20 * STEP
+    strat.process_timeframe_data('BTCUSDT', '5m', pd.DataFrame({
+        'timestamp': [start + i * STEP for i in range(15)],
+        'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.0, 'volume': 1.0,
+    }))
+    filled = await strat.backfill()
+
+    assert list(filled) == [('BTCUSDT', '5m')]
+    assert Client.exchange.calls == [('BTCUSDT', '5m', start + 15 * STEP, 6)]
+    df = strat.data['BTCUSDT']['5m']
+    assert len(df) == 21
+    assert df['timestamp'].is_monotonic_increasing
+    assert to_ms(df['timestamp'].iloc[-1]) == last_closed
+
+
+@pytest.mark.asyncio
+async def test_backfill_inserts_rows_older_than_a_streamed_candle():
+    last_closed = (int(time.time() * 1000) // STEP - 1) * STEP
+    start = last_closed - 43 * STEP
+
+    class StreamingExchange(Exchange):
+        async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            # A newer candle closes on the stream while the request is in flight.
+            strat.process_timeframe_data('BTCUSDT', '5m', (last_closed, 1.0, 2.0, 0.5, 7.0, 1.0))
+            rows = await super().fetch_ohlcv(symbol, timeframe, since, limit)
+            return [r for r in rows if r[0] < last_closed]
+
+    class Client:
+        exchange = StreamingExchange()
+
+    strat = LiveMAStrategy(Client(), {'indicators': {'BTCUSDT': {}}})
+    strat.process_timeframe_data('BTCUSDT', '5m', pd.DataFrame({
+        'timestamp': [start + i * STEP for i in range(40)],
+        'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.0, 'volume': 1.0,
+    }))
+    strat.get_signal_for_timeframe_score('BTCUSDT', '5m')
+    await strat.backfill()
+
+    buf = strat._buffer('BTCUSDT', '5m')
+    assert buf.timestamps.tolist() == [start + i * STEP for i in range(44)]
+    assert buf.close[-1] == 7.0 and buf.close[40] == float((start + 40 * STEP) // STEP % 100)
+    # Indicators were rebuilt over the merged sequence.
+    assert strat.indicators['BTCUSDT']['5m'].count == 44
+
+
+def to_ms(ts):
+    return int(pd.Timestamp(ts).value // 1_000_000)
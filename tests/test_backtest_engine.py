@@ -0,0 +1,117 @@
+import sys, os, types, types as modtypes
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import backtest_strategy, resample_candles, simulate_strategy, strategy_signals, _timeframe_arrays
+from candle_store import frame_to_arrays
+from indicators import indicator_params
+from live_strategy import LiveMAStrategy
+
+CONFIG = {
+    'indicators': {'BTCUSDT': {'ema_short': 8, 'ema_long': 21}},
+    'tp': {'BTCUSDT': 0.07},
+    'sl': {'BTCUSDT': 0.025},
+    'leverage': 10,
+    'max_trades_per_day': 5,
+}
+
+
+def make_candles(n=2000, seed=3, drift=0.0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(drift, 0.003, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='5min'),
+        'open': np.concatenate(([close[0]], close[:-1])),
+        'high': close * (1 + rng.uniform(0, 0.002, n)),
+        'low': close * (1 - rng.uniform(0, 0.002, n)),
+        'close': close,
+        'volume': rng.uniform(1, 10, n),
+    })
+
+
+def test_resample_matches_pandas_and_drops_partial_periods():
+    df = make_candles(n=100).iloc[1:]  # first hour incomplete
+    ts, values = resample_candles(*frame_to_arrays(df), '5m', '1h')
+    expected = df.set_index('timestamp').resample('1h').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    expected = expected.iloc[1:-1]  # partial first and forming last hour
+    assert pd.to_datetime(ts, unit='ms').tolist() == expected.index.tolist()
+    np.testing.assert_allclose(values.T, expected.to_numpy())
+
+
+def test_signals_match_live_strategy_without_lookahead():
+    df = make_candles(n=280)
+    frames = _timeframe_arrays(df, '5m', ['5m', '15m', '30m'])
+    side, tf_index, _ = strategy_signals(frames, indicator_params(CONFIG, 'BTCUSDT'))
+    tfs = list(frames)
+    strat = LiveMAStrategy(object(), CONFIG)
+    checked = 0
+    for i in range(60, 280, 7):
+        close_time = frames['5m'][0][i] + 300_000
+        for tf, (ts, values) in frames.items():
+            done = ts + pd.Timedelta(tf).value // 1_000_000 <= close_time
+            strat.data['BTCUSDT'][tf] = pd.DataFrame({
+                'timestamp': pd.to_datetime(ts[done], unit='ms'),
+                'open': values[0, done], 'high': values[1, done], 'low': values[2, done],
+                'close': values[3, done], 'volume': values[4, done],
+            })
+        sig, tf = strat.check_multi_timeframe_signal('BTCUSDT')
+        expected = {'long': 1, 'short': -1, None: 0}[sig]
+        assert side[i] == expected, i
+        if sig:
+            assert tfs[tf_index[i]] == tf
+            checked += 1
+    assert checked
+
+
+def test_trades_hit_tp_sl_with_fees_and_daily_limit():
+    df = make_candles(drift=0.0005)
+    config = dict(CONFIG, max_trades_per_day=1)
+    trades, equity = simulate_strategy(df, config, 'BTCUSDT', timeframes=['5m', '15m', '30m'], fee=0.0004)
+    assert len(trades) >= 2
+    entry_ts = trades['entry_time'].astype('int64') // 10**6
+    assert (np.diff(entry_ts) >= 86_400_000).all()
+    assert (trades['exit_time'] > trades['entry_time']).all()
+    tp = trades['entry_price'] * np.where(trades['side'] == 'long', 1.007, 0.993)
+    sl = trades['entry_price'] * np.where(trades['side'] == 'long', 0.9975, 1.0025)
+    last = trades['exit_index'] == len(df) - 1
+    assert np.isclose(trades['exit_price'], tp)[~last].sum() + np.isclose(trades['exit_price'], sl)[~last].sum() == (~last).sum()
+    assert np.allclose(trades['fees'], 0.0004 * 500 * (1 + trades['exit_price'] / trades['entry_price']))
+    assert equity.iloc[-1] == pytest.approx(1000 + trades['pnl'].sum())
+    assert len(equity) == len(df)
+
+
+def test_no_entry_on_the_last_candle():
+    df = make_candles(drift=0.0005)
+    trades, _ = simulate_strategy(df, CONFIG, 'BTCUSDT', timeframes=['5m', '15m', '30m'])
+    last = int(trades['entry_index'].iloc[1])
+    # Cut the history at a candle that opens a trade in the full run.
+    cut, _ = simulate_strategy(df.iloc[:last + 1], CONFIG, 'BTCUSDT', timeframes=['5m', '15m', '30m'])
+    assert len(cut) == 1 and (cut['entry_index'] < last).all()
+
+
+def test_backtest_strategy_accepts_frames_and_reports_metrics():
+    df = make_candles()
+    metrics, equity = backtest_strategy(df, CONFIG, 'BTCUSDT', timeframes=['5m', '15m', '30m'])
+    columns = {name: df[name].to_numpy() for name in df}
+    same, _ = backtest_strategy(columns, CONFIG, 'BTCUSDT', timeframes=['5m', '15m', '30m'])
+    assert metrics == same
+    assert set(metrics) == {'Total Trades', 'Win Rate', 'Final Balance', 'Max Drawdown', 'Sharpe Ratio'}
+    assert metrics['Final Balance'] == round(equity.iloc[-1], 2)
+    # A single timeframe never has the two agreeing signals an entry needs.
+    empty, _ = backtest_strategy({'5m': df}, CONFIG, 'BTCUSDT')
+    assert empty['Total Trades'] == 0 and empty['Final Balance'] == 1000
@@ -0,0 +1,97 @@
+import sys, os, types, types as modtypes
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+from candle_aggregator import CandleAggregator, period_start
+from live_strategy import LiveMAStrategy
+
+MINUTE = 60_000
+DAY = 1440 * MINUTE
+TFS = ['5m', '15m', '30m', '1h', '4h', '1d']
+
+
+def base_candles(start, n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows, price = [], 100.0
+    for i in range(n):
+        o = price
+        c = round(o + rng.normal(0, 0.5), 2)
+        h = round(max(o, c) + abs(rng.normal(0, 0.2)), 2)
+        l = round(min(o, c) - abs(rng.normal(0, 0.2)), 2)
+        v = f"{rng.uniform(0, 50):.3f}"
+        rows.append((start + i * MINUTE, o, h, l, c, v))
+        price = c
+    return rows
+
+
+def reference(rows, tf):
+    """Exchange-style klines: exact decimal volume sums, complete periods only."""
+    df = pd.DataFrame(rows, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
+    df['start'] = [period_start(ts, tf) for ts in df['ts']]
+    size = pd.Timedelta(tf).value // 1_000_000 // MINUTE
+    out = []
+    for start, g in df.groupby('start'):
+        if len(g) == size:
+            out.append((int(start), g['o'].iloc[0], g['h'].max(), g['l'].min(), g['c'].iloc[-1],
+                        float(sum(Decimal(v) for v in g['v']))))
+    return out
+
+
+def test_matches_exchange_klines():
+    start = 1_700_000_000_000 // DAY * DAY - 37 * MINUTE  # mid-period for every timeframe
+    rows = base_candles(start, 2 * 1440 + 100)
+    agg = CandleAggregator('1m', TFS)
+    built = {tf: [] for tf in TFS}
+    for ts, o, h, l, c, v in rows:
+        for tf, bar in agg.update((ts, o, h, l, c, float(v))):
+            built[tf].append(bar)
+    for tf in TFS:
+        assert built[tf] == reference(rows, tf), tf
+    assert len(built['1d']) == 2
+    # The partial first periods were reported, never emitted.
+    assert ('1d', start // DAY * DAY) in agg.pop_incomplete()
+    assert agg.forming('5m') is not None
+
+
+def test_gap_drops_period():
+    start = 1_700_000_000_000 // DAY * DAY
+    rows = [r for r in base_candles(start, 30) if r[0] != start + 7 * MINUTE]
+    agg = CandleAggregator('1m', ['5m', '15m'])
+    emitted = [(tf, bar[0]) for r in rows for tf, bar in agg.update((*r[:5], float(r[5])))]
+    assert ('5m', start + 5 * MINUTE) not in emitted
+    assert ('15m', start) not in emitted
+    assert ('5m', start + 10 * MINUTE) in emitted and ('15m', start + 15 * MINUTE) in emitted
+    assert sorted(agg.pop_incomplete()) == [('15m', start), ('5m', start + 5 * MINUTE)]
+
+
+def test_week_bars_open_on_monday():
+    monday = pd.Timestamp('2024-01-08').value // 1_000_000
+    assert period_start(monday + 3 * DAY, '1w') == monday
+
+
+def test_strategy_builds_higher_timeframes_from_base():
+    strat = LiveMAStrategy(None, {'indicators': {'BTCUSDT': {}}, 'ws_base_interval': '5m'})
+    start = 1_700_000_000_000 // DAY * DAY
+    for i in range(12):
+        ts = start + i * 5 * MINUTE
+        strat.process_timeframe_data('BTCUSDT', '5m', (ts, 1.0 + i, 2.0 + i, 0.5, 1.5 + i, 1.0))
+    assert len(strat.data['BTCUSDT']['5m']) == 12
+    assert len(strat.data['BTCUSDT']['15m']) == 4
+    hour = strat.data['BTCUSDT']['1h']
+    assert len(hour) == 1
+    assert hour[['open', 'high', 'low', 'close', 'volume']].iloc[0].tolist() == [1.0, 13.0, 0.5, 12.5, 12.0]
+    assert strat.forming_bar('BTCUSDT', '4h') == (start, 1.0, 13.0, 0.5, 12.5, 12.0)
@@ -0,0 +1,109 @@
+import json
+import pickle
+import sys, os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from candle_archive import CandleArchive
+from features import archive_features, feature_matrix
+from ohlcv_store import OHLCVStore
+
+STEP = 300_000
+T0 = 1_704_067_200_000  # 2024-01-01
+
+
+def make_history(n=2000, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.uniform(0, 1, n)
+    low = close - rng.uniform(0, 1, n)
+    values = np.vstack([close, high, low, close, rng.uniform(1, 10, n)])
+    return T0 + np.arange(n, dtype=np.int64) * STEP, values
+
+
+def close_sum(archive, start, end):
+    return float(np.sum(archive.window(start, end).close))
+
+
+def test_window_is_zero_copy_binary_search(tmp_path):
+    ts, values = make_history()
+    archive = CandleArchive.write(str(tmp_path / 'a'), ts, values, symbol='BTCUSDT', timeframe='5m')
+    window = archive.window(T0 + 10 * STEP, T0 + 20 * STEP + 1)
+    assert window.timestamp.tolist() == ts[10:21].tolist()
+    assert np.array_equal(window.high, values[1, 10:21])
+    assert isinstance(window.close, np.memmap)
+    assert len(archive.window(T0 - STEP, T0)) == 6 and len(archive.window(T0 - STEP, T0).close) == 0
+
+    clone = pickle.loads(pickle.dumps(archive))
+    assert len(pickle.dumps(archive)) < 200
+    assert np.array_equal(clone.window().close, values[3])
+
+
+def test_from_store_and_float32(tmp_path):
+    ts, values = make_history(n=20000)  # spans three months
+    store = OHLCVStore(str(tmp_path / 'store'))
+    store.append('BTCUSDT', '5m', np.column_stack([ts, values.T]))
+    assert len(store.months('BTCUSDT', '5m')) == 3
+    archive = CandleArchive.from_store(store, 'BTCUSDT', '5m', str(tmp_path / 'a32'), dtype=np.float32)
+    assert len(archive) == 20000
+    assert archive.column('close').dtype == np.float32
+    assert np.array_equal(archive.timestamps, ts)
+    assert np.allclose(archive.column('volume'), values[4], rtol=1e-6)
+
+
+def test_failed_write_leaves_no_temp_files(tmp_path, monkeypatch):
+    ts, values = make_history(n=100)
+    with pytest.raises(ValueError):
+        CandleArchive.write(str(tmp_path / 'a'), ts[::-1], values, symbol='BTCUSDT', timeframe='5m')
+    assert os.listdir(tmp_path / 'a') == []
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(json, 'dump', fail)
+    with pytest.raises(OSError):
+        CandleArchive.write(str(tmp_path / 'b'), ts, values, symbol='BTCUSDT', timeframe='5m')
+    assert not [name for name in os.listdir(tmp_path / 'b') if name.endswith('.tmp')]
+
+
+def test_archive_features_match_full_history(tmp_path):
+    ts, values = make_history()
+    archive = CandleArchive.write(str(tmp_path / 'a'), ts, values)
+    start, end = T0 + 500 * STEP, T0 + 800 * STEP
+    got_ts, got = archive_features(archive, start, end, warmup=500)
+    full = feature_matrix({'high': values[1], 'low': values[2], 'close': values[3], 'volume': values[4]})
+    assert got_ts.tolist() == ts[500:800].tolist()
+    np.testing.assert_allclose(got, full[500:800])
+
+
+def test_process_pool_shares_archive(tmp_path):
+    ts, values = make_history()
+    archive = CandleArchive.write(str(tmp_path / 'a'), ts, values)
+    ranges = [(T0 + i * 100 * STEP, T0 + (i + 1) * 100 * STEP) for i in range(4)]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        sums = list(pool.map(close_sum, [archive] * 4, *zip(*ranges)))
+    assert sums == pytest.approx([values[3, i * 100:(i + 1) * 100].sum() for i in range(4)])
+
+
+def test_open_archive_follows_the_store(tmp_path):
+    from backtest_engine import open_archive
+    ts, values = make_history(n=100)
+    store_root = str(tmp_path / 'store')
+    root = str(tmp_path / 'archive')
+    OHLCVStore(store_root).append('BTC/USDT', '5m', np.column_stack([ts, values.T]))
+    archive = open_archive('BTC/USDT', '5m', root=root, store_root=store_root)
+    assert len(archive) == 100
+    mapped = archive.window().close
+    assert open_archive('BTC/USDT', '5m', root=root, store_root=store_root).path == archive.path
+
+    # Newer candles, and a backfilled hole, are picked up on the next open.
+    OHLCVStore(store_root).append('BTC/USDT', '5m', [[ts[-1] + STEP, 1, 1, 1, 1, 1]])
+    fresh = open_archive('BTC/USDT', '5m', root=root, store_root=store_root)
+    assert len(fresh) == 101 and fresh.timestamps[-1] == ts[-1] + STEP
+    OHLCVStore(store_root).append('BTC/USDT', '5m', [[ts[0] - STEP, 1, 1, 1, 1, 1]])
+    assert len(open_archive('BTC/USDT', '5m', root=root, store_root=store_root)) == 102
+    # Columns mapped before the rebuild still read their own snapshot.
+    np.testing.assert_array_equal(mapped, values[3])
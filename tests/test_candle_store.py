@@ -0,0 +1,73 @@
+import sys, os
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from candle_store import CandleBuffer, CandleStore, FormingBars
+
+
+def fill(buf, start, n):
+    for i in range(start, start + n):
+        buf.append(i * 60_000, i, i + 1, i - 1, i + 0.5, 10)
+
+
+def test_buffer_keeps_last_capacity_candles_contiguous():
+    buf = CandleBuffer(capacity=5)
+    fill(buf, 0, 12)
+    assert len(buf) == 5
+    assert buf.timestamps.tolist() == [i * 60_000 for i in range(7, 12)]
+    assert buf.close.tolist() == [i + 0.5 for i in range(7, 12)]
+    assert buf.close.flags['C_CONTIGUOUS']
+    assert np.shares_memory(buf.close, buf._values)
+
+
+def test_buffer_replaces_revised_candle_and_ignores_stale():
+    buf = CandleBuffer(capacity=4)
+    fill(buf, 0, 6)
+    assert buf.append(5 * 60_000, 5, 9, 1, 8, 20) == "replace"
+    assert buf.close[-1] == 8
+    assert buf.append(3 * 60_000, 3, 3, 3, 3, 3) == "replace"
+    assert buf.close[1] == 3
+    assert buf.append(0, 0, 0, 0, 0, 0) == "stale"
+    assert len(buf) == 4
+
+
+def test_store_round_trips_frames():
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=8, freq='1h'),
+        'open': np.arange(8.0),
+        'high': np.arange(8.0) + 1,
+        'low': np.arange(8.0) - 1,
+        'close': np.arange(8.0),
+        'volume': np.ones(8),
+    })
+    store = CandleStore(capacity=5)
+    store['1h'] = df
+    frame = store['1h']
+    assert len(frame) == 5
+    assert frame['timestamp'].iloc[-1] == df['timestamp'].iloc[-1]
+    assert frame['close'].tolist() == df['close'].tail(5).tolist()
+    assert store['1h'] is frame
+    store.buffer('1h').append(int(df['timestamp'].iloc[-1].value // 1_000_000), 1, 2, 0, 42, 1)
+    assert store['1h']['close'].iloc[-1] == 42
+
+
+def test_forming_bars_track_range_and_roll_per_timeframe():
+    bars = FormingBars(['5m', '1h'])
+    t0 = 1_700_000_100_000 - 1_700_000_100_000 % 3_600_000
+    bars.update(100.0, qty=1.0, ts=t0)
+    bars.update(103.0, qty=2.0, ts=t0 + 60_000)
+    bars.update(99.0, qty=1.0, ts=t0 + 120_000)
+    assert bars.bar('5m') == (t0, 100.0, 103.0, 99.0, 99.0, 4.0)
+
+    bars.update(101.0, qty=1.0, ts=t0 + 300_000)
+    assert bars.bar('5m') == (t0 + 300_000, 101.0, 101.0, 101.0, 101.0, 1.0)
+    assert bars.bar('1h') == (t0, 100.0, 103.0, 99.0, 101.0, 5.0)
+
+    bars.close_bar('5m', t0 + 300_000)
+    assert bars.bar('5m') is None
+    bars.update(102.0, ts=t0 + 301_000)
+    assert bars.bar('5m') is None
+    bars.update(104.0, ts=t0 + 600_000)
+    assert bars.bar('5m')[1] == 104.0
@@ -0,0 +1,108 @@
+import sys, os
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from compute_executor import ComputeExecutor
+from features import latest_features
+
+
+def slow_echo(value, delay):
+    time.sleep(delay)
+    return value
+
+
+def test_same_symbol_runs_in_submission_order():
+    executor = ComputeExecutor('thread', max_workers=4)
+    finished = []
+
+    async def job(key, value, delay):
+        finished.append((key[0], await executor.submit(key, slow_echo, value, delay)))
+
+    async def scenario():
+        await asyncio.gather(
+            job(('BTC', '5m'), 1, 0.05),
+            job(('BTC', '1h'), 2, 0.0),
+            job(('ETH', '5m'), 3, 0.0),
+        )
+
+    asyncio.run(scenario())
+    executor.shutdown(wait=True)
+    btc = [value for symbol, value in finished if symbol == 'BTC']
+    assert btc == [1, 2]
+    # ETH was not held up behind the slow BTC job
+    assert finished.index(('ETH', 3)) < finished.index(('BTC', 1))
+
+
+def test_backpressure_limits_jobs_in_flight():
+    executor = ComputeExecutor('thread', max_workers=8, max_pending=2)
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def work():
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(executor.submit((f'S{i}', '1m'), work) for i in range(8)))
+
+    asyncio.run(scenario())
+    executor.shutdown(wait=True)
+    assert running[1] == 2
+    assert executor.pending == 0
+
+
+def test_event_loop_keeps_running_while_work_is_offloaded():
+    executor = ComputeExecutor('thread', max_workers=2)
+    gaps = []
+
+    async def heartbeat(stop):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def scenario():
+        stop = asyncio.Event()
+        beat = asyncio.create_task(heartbeat(stop))
+        await asyncio.gather(*(executor.submit((f'S{i}', '1m'), slow_echo, i, 0.05) for i in range(6)))
+        stop.set()
+        await beat
+
+    asyncio.run(scenario())
+    executor.shutdown(wait=True)
+    assert max(gaps) < 0.05
+
+
+@pytest.mark.parametrize("mode", ["process", "inline"])
+def test_pure_functions_run_in_every_mode(mode):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 80))
+    candles = {'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.ones(80)}
+    executor = ComputeExecutor(mode, max_workers=1)
+
+    async def scenario():
+        remote = await executor.submit(('BTC', '1h'), latest_features, candles, ema_short=5)
+        local = await executor.submit_local(('BTC', '1h'), lambda: 'local')
+        return remote, local
+
+    remote, local = asyncio.run(scenario())
+    executor.shutdown(wait=True)
+    np.testing.assert_array_equal(remote, latest_features(candles, ema_short=5))
+    assert local == 'local'
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ComputeExecutor('gpu')
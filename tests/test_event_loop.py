@@ -0,0 +1,151 @@
+import asyncio
+import sys, os, types, types as modtypes
+import time
+import pandas as pd
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+from live_strategy import LiveMAStrategy
+
+
+class DummyClient:
+    exchange = None
+
+    async def close(self):
+        pass
+
+
+def make_strategy(**config):
+    config = {'indicators': {'BTCUSDT': {}, 'ETHUSDT': {}, 'SOLUSDT': {}},
+              'model_reload_interval': 0, **config}
+    strat = LiveMAStrategy(DummyClient(), config)
+    strat.ready = {s: True for s in strat.symbols}
+    passes = []
+
+    async def evaluate_symbols(symbols):
+        passes.append(symbols)
+
+    strat.evaluate_symbols = evaluate_symbols
+    return strat, passes
+
+
+def test_closed_candle_marks_symbol_dirty():
+    strat, _ = make_strategy()
+    strat.process_timeframe_data('ETHUSDT', '5m', pd.DataFrame({
+        'timestamp': [pd.Timestamp(1_700_000_000_000, unit='ms')],
+        'open': [1.0], 'high': [2.0], 'low': [0.5], 'close': [1.5], 'volume': [10.0],
+    }))
+    assert strat._dirty == {'ETHUSDT'}
+    assert strat._wakeup.is_set()
+
+
+@pytest.mark.asyncio
+async def test_run_evaluates_only_closed_symbols_after_debounce():
+    strat, passes = make_strategy(signal_debounce_ms=20, sweep_interval=60)
+    task = asyncio.create_task(strat.run())
+    try:
+        await asyncio.sleep(0.01)
+        assert passes == [['BTCUSDT', 'ETHUSDT', 'SOLUSDT']]  # startup sweep
+
+        strat.mark_dirty('SOLUSDT')
+        await asyncio.sleep(0.005)
+        strat.mark_dirty('BTCUSDT')
+        await asyncio.sleep(0.05)
+        assert passes[1:] == [['BTCUSDT', 'SOLUSDT']]
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_periodic_sweep_without_events():
+    strat, passes = make_strategy(sweep_interval=0.02)
+    task = asyncio.create_task(strat.run())
+    try:
+        await asyncio.sleep(0.07)
+        assert len(passes) >= 3
+        assert all(p == ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'] for p in passes)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_update_indicators_changes_symbols_and_streams():
+    strat, _ = make_strategy()
+    strat.position_side['SOLUSDT'] = 'long'
+    warmed, subscribed = [], []
+
+    async def warm_up(symbol):
+        warmed.append(symbol)
+
+    async def set_symbols(symbols):
+        subscribed.append(list(symbols))
+
+    strat._warm_up_symbol = warm_up
+    strat.stream_manager = types.SimpleNamespace(set_symbols=set_symbols)
+    await strat.update_indicators({'BTCUSDT': {}, 'XRPUSDT': {'ema_short': 9}})
+    await asyncio.sleep(0)
+
+    assert strat.symbols == ['BTCUSDT', 'SOLUSDT', 'XRPUSDT']  # SOL keeps its open position
+    assert strat.ready['ETHUSDT'] is False
+    assert strat.position_side['XRPUSDT'] is None and strat.daily_trades['XRPUSDT'] == []
+    assert warmed == ['XRPUSDT']
+    assert subscribed == [['BTCUSDT', 'SOLUSDT', 'XRPUSDT']]
+    assert strat.closing_only == {'SOLUSDT'}
+
+    # The retained symbol keeps processing candles without its config entry.
+    candles = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=41, freq='5min'),
+        'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': [1.0 + i / 100 for i in range(41)], 'volume': 10.0,
+    })
+    strat.process_timeframe_data('SOLUSDT', '5m', candles.iloc[:40])
+    strat.process_timeframe_data('SOLUSDT', '5m', candles.iloc[40:])
+    assert strat._buffer('SOLUSDT', '5m').last_timestamp == candles['timestamp'].iloc[-1].value // 10**6
+    assert await strat.evaluate_symbol('SOLUSDT') is None
+
+    strat.position_side['SOLUSDT'] = None
+    assert await strat.drop_closed_symbols() == ['SOLUSDT']
+    assert strat.symbols == ['BTCUSDT', 'XRPUSDT'] and not strat.closing_only
+    assert subscribed[-1] == ['BTCUSDT', 'XRPUSDT']
+
+
+@pytest.mark.asyncio
+async def test_rest_poll_reconciles_without_user_stream():
+    strat, passes = make_strategy(sweep_interval=60, rest_poll_interval=0.02)
+    syncs = []
+
+    async def sync_all(symbols=None, snapshot=None):
+        syncs.append(symbols)
+
+    strat.sync_all = sync_all
+    task = asyncio.create_task(strat.run())
+    try:
+        await asyncio.sleep(0.07)
+        assert passes == [['BTCUSDT', 'ETHUSDT', 'SOLUSDT']]  # no candle closed
+        assert len(syncs) >= 2
+        assert all(s == strat.symbols for s in syncs)
+
+        # A live stream with a fresh snapshot keeps the account current.
+        strat.user_stream = types.SimpleNamespace(connected=True)
+        strat.account = types.SimpleNamespace(taken_at=time.time())
+        polled = len(syncs)
+        await asyncio.sleep(0.05)
+        assert len(syncs) == polled
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
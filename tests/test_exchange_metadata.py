@@ -0,0 +1,99 @@
+import sys, os
+import asyncio
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from exchange_metadata import ExchangeMetadata, parse_exchange_info
+
+INFO = {'symbols': [
+    {
+        'symbol': 'BTCUSDT', 'pricePrecision': 2, 'quantityPrecision': 3,
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'tickSize': '0.10'},
+            {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001', 'maxQty': '1000'},
+            {'filterType': 'MIN_NOTIONAL', 'notional': '100'},
+        ],
+    },
+    {
+        'symbol': 'DOGEUSDT', 'pricePrecision': 6, 'quantityPrecision': 0,
+        'filters': [
+            {'filterType': 'LOT_SIZE', 'stepSize': '1', 'minQty': '1', 'maxQty': '1000000'},
+            {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+        ],
+    },
+]}
+
+
+class Fetcher:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError('exchange down')
+        return INFO
+
+
+def test_parse_indexes_filters():
+    info = parse_exchange_info(INFO)['BTCUSDT']
+    assert (info.tick_size, info.step_size, info.min_qty, info.min_notional) == (0.1, 0.001, 0.001, 100.0)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_fetch_and_persist(tmp_path):
+    path = str(tmp_path / 'exchange_info.json')
+    fetch = Fetcher()
+    meta = ExchangeMetadata(fetch, path, ttl=60)
+    await asyncio.gather(*(meta.load() for _ in range(10)))
+    assert fetch.calls == 1
+    assert meta.get('BTC/USDT:USDT').quantity_precision == 3
+
+    restarted = ExchangeMetadata(fetch, path, ttl=60)
+    await restarted.load()
+    assert fetch.calls == 1
+    assert restarted.get('DOGEUSDT') == meta.get('DOGEUSDT')
+
+
+@pytest.mark.asyncio
+async def test_stale_file_is_used_when_exchange_is_down(tmp_path):
+    path = tmp_path / 'exchange_info.json'
+    await ExchangeMetadata(Fetcher(), str(path)).load()
+    data = json.loads(path.read_text())
+    data['fetched_at'] = 0
+    path.write_text(json.dumps(data))
+
+    fetch = Fetcher()
+    fetch.fail = True
+    meta = ExchangeMetadata(fetch, str(path), ttl=60)
+    await meta.load()
+    assert fetch.calls == 1
+    assert 'BTCUSDT' in meta
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    meta = ExchangeMetadata(Fetcher(), str(tmp_path / 'exchange_info.json'))
+    meta.symbols = parse_exchange_info(INFO)
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(json, 'dump', fail)
+    with pytest.raises(OSError):
+        meta._write_file()
+    assert os.listdir(tmp_path) == []
+
+
+def test_rounding_and_order_checks():
+    meta = ExchangeMetadata(Fetcher(), None)
+    meta.symbols = parse_exchange_info(INFO)
+    assert meta.round_qty('BTCUSDT', 0.0239) == 0.023
+    assert meta.round_qty('DOGEUSDT', 0.3 / 0.1) == 3
+    assert meta.round_price('BTCUSDT', 100.37) == 100.4
+    assert not meta.check_order('BTCUSDT', 0.001, 50_000)
+    assert meta.check_order('BTCUSDT', 0.003, 50_000)
+    assert meta.check_order('NEWUSDT', 1, 1)
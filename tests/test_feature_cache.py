@@ -0,0 +1,108 @@
+import sys, os, types, types as modtypes
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from feature_cache import FeatureCache
+from features import extract_features
+from live_strategy import LiveMAStrategy
+
+
+def make_candles(n=120, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='1h'),
+        'open': close,
+        'high': close + rng.random(n),
+        'low': close - rng.random(n),
+        'close': close,
+        'volume': rng.random(n) * 10,
+    })
+
+
+def test_lru_eviction_and_invalidation():
+    cache = FeatureCache(maxsize=2)
+    cache.put(('BTC', '1h', 1, ''), 'signal', 'a')
+    cache.put(('BTC', '1h', 2, ''), 'signal', 'b')
+    assert cache.get(('BTC', '1h', 1, ''), 'signal') == 'a'
+    cache.put(('ETH', '1h', 1, ''), 'signal', 'c')
+    assert cache.get(('BTC', '1h', 2, ''), 'signal') is None
+    assert len(cache) == 2
+
+    cache.invalidate('BTC', '1h')
+    assert cache.get(('BTC', '1h', 1, ''), 'signal') is None
+    assert cache.get(('ETH', '1h', 1, ''), 'signal') == 'c'
+
+
+def test_ai_gate_reads_features_filled_on_kline_close(monkeypatch):
+    import live_strategy
+    df = make_candles()
+    strat = LiveMAStrategy(object(), {'indicators': {'BTCUSDT': {}}})
+    strat.data['BTCUSDT']['1h'] = df.iloc[:-1].reset_index(drop=True)
+    strat.process_timeframe_data('BTCUSDT', '1h', df.iloc[-1:])
+
+    expected = extract_features(df, **strat._feature_params('BTCUSDT')).iloc[-1]
+    seen = {}
+
+    def fail_extract(*args, **kwargs):
+        raise AssertionError('features should come from the cache')
+
+    class Engine:
+        def get_signal_for_timeframe(self, features, **kwargs):
+            seen.update(features)
+            return {'ok': True, 'confidence': 1.0}
+
+    monkeypatch.setattr(live_strategy, 'extract_features', fail_extract)
+    strat.signal_engine = Engine()
+    assert strat.ai_accepts_trade('BTCUSDT', '1h', 'long')
+    np.testing.assert_allclose([seen[c] for c in expected.index], expected.to_numpy(), rtol=1e-9)
+
+    key = strat._feature_key('BTCUSDT', '1h')
+    assert strat.feature_cache.get(key, 'signal') == strat.score_timeframe('BTCUSDT', '1h')
+
+    revised = df.iloc[-1:].copy()
+    revised['close'] += 5
+    strat.process_timeframe_data('BTCUSDT', '1h', revised)
+    assert strat.feature_cache.get(key, 'features')['ema_short'] != seen['ema_short']
+
+
+def test_kline_close_offloads_features_and_batches_inference():
+    import asyncio
+    df = make_candles()
+    strat = LiveMAStrategy(object(), {'indicators': {'BTCUSDT': {}, 'ETHUSDT': {}}})
+    calls = []
+
+    class Engine:
+        model_version = 'v1'
+
+        def score_batch(self, rows):
+            calls.append(threading.current_thread().name)
+            return {key: {'ok': True, 'confidence': 0.9} for key in rows}
+
+    strat.signal_engine = Engine()
+
+    async def scenario():
+        for symbol in strat.symbols:
+            strat.data[symbol]['1h'] = df.iloc[:-1].reset_index(drop=True)
+            strat.process_timeframe_data(symbol, '1h', df.iloc[-1:])
+        # features are computed in the executor, not on the loop
+        assert strat.feature_cache.get(strat._feature_key('BTCUSDT', '1h'), 'features') is None
+        await strat.score_ai_batch([(s, '1h') for s in strat.symbols])
+
+    asyncio.run(scenario())
+    strat.executor.shutdown(wait=True)
+    assert len(calls) == 1 and calls[0].startswith('compute')
+    assert strat.ai_accepts_trade('ETHUSDT', '1h', 'long')
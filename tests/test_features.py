@@ -14,10 +14,17 @@ sys.modules.setdefault('sklearn', dummy_sk)
 sys.modules.setdefault('sklearn.utils', dummy_utils)
 sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
 
+import numpy as np
 import pandas as pd
 import talib
 
-from features import extract_features
+from features import (
+    FEATURE_COLUMNS,
+    extract_features,
+    feature_matrix,
+    feature_matrix_batch,
+    latest_features,
+)
 from live_strategy import LiveMAStrategy
 
 
@@ -107,3 +114,72 @@ def test_ai_accepts_trade_passes_config(monkeypatch):
     assert captured['macd_fast'] == 8
     assert captured['macd_slow'] == 17
     assert captured['macd_signal'] == 5
+
+
+def reference_features(df, bb_period=20, bb_k=2, stoch_k_period=14, stoch_d_period=3,
+                       ema_short=9, ema_long=21, macd_fast=12, macd_slow=26, macd_signal=9):
+    import ta.trend as trend
+    import ta.momentum as momentum
+    import ta.volume as volume
+    import ta.volatility as volatility
+    features = pd.DataFrame(index=df.index)
+    features['ema_short'] = trend.ema_indicator(df['close'], window=ema_short)
+    features['ema_long'] = trend.ema_indicator(df['close'], window=ema_long)
+    features['macd'] = trend.macd(df['close'], window_fast=macd_fast, window_slow=macd_slow)
+    features['macdsignal'] = trend.macd_signal(
+        df['close'], window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_signal
+    )
+    features['rsi'] = momentum.rsi(df['close'], window=14)
+    features['adx'] = trend.adx(df['high'], df['low'], df['close'], window=14)
+    features['obv'] = volume.on_balance_volume(df['close'], df['volume'])
+    features['atr'] = volatility.average_true_range(df['high'], df['low'], df['close'], window=14)
+    features['bb_upper'] = volatility.bollinger_hband(df['close'], window=bb_period, window_dev=bb_k)
+    features['bb_middle'] = volatility.bollinger_mavg(df['close'], window=bb_period)
+    features['bb_lower'] = volatility.bollinger_lband(df['close'], window=bb_period, window_dev=bb_k)
+    stoch = momentum.StochasticOscillator(
+        df['close'], df['high'], df['low'], window=stoch_k_period, smooth_window=stoch_d_period
+    )
+    features['stoch_k'] = stoch.stoch()
+    features['stoch_d'] = stoch.stoch_signal()
+    typical_price = (df['high'] + df['low'] + df['close']) / 3
+    features['vwap'] = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
+    features['volume'] = df['volume']
+    return features.dropna().reset_index(drop=True)
+
+
+def random_candles(n=300, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'open': close,
+        'high': close + rng.random(n),
+        'low': close - rng.random(n),
+        'close': close,
+        'volume': rng.random(n) * 50,
+    })
+
+
+def test_feature_matrix_matches_ta_reference():
+    df = random_candles()
+    params = dict(ema_short=8, ema_long=21, macd_fast=7, macd_slow=19, macd_signal=5)
+    expected = reference_features(df, **params)
+    got = extract_features(df, **params)
+    assert list(got.columns) == FEATURE_COLUMNS
+    np.testing.assert_allclose(got.to_numpy(), expected[FEATURE_COLUMNS].to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+def test_latest_features_and_batch_agree_with_matrix():
+    df = random_candles()
+    other = random_candles(n=120, seed=5)
+    full = feature_matrix(df, ema_short=5)
+    np.testing.assert_allclose(latest_features(df, ema_short=5), full[-1], rtol=1e-9)
+
+    matrix, index = feature_matrix_batch(
+        {('BTCUSDT', '5m'): df, ('ETHUSDT', '1h'): other},
+        params={('BTCUSDT', '5m'): {'ema_short': 5}},
+        dtype=np.float32,
+    )
+    assert matrix.dtype == np.float32 and matrix.flags['C_CONTIGUOUS']
+    assert matrix.shape == (420, len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(matrix[index[('BTCUSDT', '5m')]], full, rtol=1e-5, equal_nan=True)
+    np.testing.assert_allclose(matrix[index[('ETHUSDT', '1h')]], feature_matrix(other), rtol=1e-5, equal_nan=True)
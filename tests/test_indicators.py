@@ -0,0 +1,120 @@
+import sys, os, types, types as modtypes
+import math
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import numpy as np
+import pandas as pd
+import pytest
+import ta.trend as trend
+import ta.momentum as momentum
+
+from indicators import StreamingIndicators, PARITY_RTOL, score_arrays, score_indicators
+from live_strategy import LiveMAStrategy
+
+PARAMS = dict(ema_short=8, ema_long=21, macd_fast=7, macd_slow=19, macd_signal=5, rsi=10, adx=14)
+
+
+def make_candles(n=200, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='5min'),
+        'open': close,
+        'high': close + rng.random(n),
+        'low': close - rng.random(n),
+        'close': close,
+        'volume': rng.random(n) * 10,
+    })
+
+
+def ta_values(df):
+    return {
+        'ema_short': trend.ema_indicator(df['close'], window=PARAMS['ema_short']).iloc[-1],
+        'ema_long': trend.ema_indicator(df['close'], window=PARAMS['ema_long']).iloc[-1],
+        'macd': trend.macd(df['close'], window_fast=PARAMS['macd_fast'], window_slow=PARAMS['macd_slow']).iloc[-1],
+        'macd_signal': trend.macd_signal(
+            df['close'], window_fast=PARAMS['macd_fast'], window_slow=PARAMS['macd_slow'],
+            window_sign=PARAMS['macd_signal'],
+        ).iloc[-1],
+        'rsi': momentum.rsi(df['close'], window=PARAMS['rsi']).iloc[-1],
+        'adx': trend.adx(df['high'], df['low'], df['close'], window=PARAMS['adx']).iloc[-1],
+    }
+
+
+@pytest.mark.parametrize("n", [30, 31, 45, 120, 200])
+def test_streaming_matches_ta(n):
+    df = make_candles().iloc[:n]
+    engine = StreamingIndicators(**PARAMS)
+    for row in df.itertuples():
+        engine.update(row.high, row.low, row.close, row.timestamp)
+    expected = ta_values(df)
+    for key, value in engine.values().items():
+        assert math.isclose(value, expected[key], rel_tol=PARITY_RTOL, abs_tol=PARITY_RTOL), key
+
+
+def test_score_arrays_match_streaming_scores():
+    df = make_candles()
+    scores = score_arrays(df['high'], df['low'], df['close'], **PARAMS)
+    engine = StreamingIndicators(**PARAMS)
+    for i, row in enumerate(df.itertuples()):
+        engine.update(row.high, row.low, row.close, row.timestamp)
+        expected = score_indicators(engine.values()) if i >= 29 else 0
+        assert scores[i] == expected, i
+
+
+def test_process_timeframe_data_updates_indicators_incrementally():
+    df = make_candles()
+    strat = LiveMAStrategy(object(), {'indicators': {'BTCUSDT': {'ema_short': 8, 'ema_long': 21}}})
+    strat.data['BTCUSDT']['5m'] = df.iloc[:100].reset_index(drop=True)
+    strat.get_signal_for_timeframe_score('BTCUSDT', '5m')
+    engine = strat.indicators['BTCUSDT']['5m']
+
+    for i in range(100, 110):
+        strat.process_timeframe_data('BTCUSDT', '5m', df.iloc[i:i + 1])
+        strat.get_signal_for_timeframe_score('BTCUSDT', '5m')
+
+    assert strat.indicators['BTCUSDT']['5m'] is engine
+    assert engine.count == 110
+    assert math.isclose(
+        engine.ema_long,
+        trend.ema_indicator(df['close'].iloc[:110], window=21).iloc[-1],
+        rel_tol=PARITY_RTOL,
+    )
+
+
+def test_score_timeframe_is_memoized_per_closed_candle(monkeypatch):
+    import live_strategy
+    calls = []
+    real_score = live_strategy.score_indicators
+
+    def counting_score(values):
+        calls.append(values)
+        return real_score(values)
+
+    monkeypatch.setattr(live_strategy, 'score_indicators', counting_score)
+    df = make_candles()
+    strat = LiveMAStrategy(object(), {'indicators': {'BTCUSDT': {}}})
+    strat.data['BTCUSDT']['1h'] = df.iloc[:100].reset_index(drop=True)
+
+    first = strat.score_timeframe('BTCUSDT', '1h')
+    strat.check_multi_timeframe_signal('BTCUSDT')
+    assert len(calls) == 1
+    assert strat.get_signal_for_timeframe_score('BTCUSDT', '1h') == first[1]
+
+    strat.process_timeframe_data('BTCUSDT', '1h', df.iloc[100:101])
+    strat.score_timeframe('BTCUSDT', '1h')
+    assert len(calls) == 2
+
+    strat.config['indicators']['BTCUSDT']['rsi'] = 7
+    strat.score_timeframe('BTCUSDT', '1h')
+    assert len(calls) == 3
+    assert strat.indicators['BTCUSDT']['1h'].rsi_window == 7
@@ -0,0 +1,137 @@
+import sys, os, types, types as modtypes
+import numpy as np
+import pandas as pd
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import auto_retrain
+from ohlcv_store import OHLCVStore
+from backtest_engine import load_candles
+from live_strategy import LiveMAStrategy
+
+HOUR = 3_600_000
+START = int(pd.Timestamp('2024-01-31 20:00').value // 1_000_000)
+
+
+def candles(start, n):
+    return [[start + i * HOUR, i, i + 1, i - 1, i + 0.5, 10.0] for i in range(n)]
+
+
+class Exchange:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append(since)
+        return [r for r in self.rows if r[0] >= since][:limit]
+
+
+def test_append_partitions_by_month_and_reads_ranges(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append('BTCUSDT', '1h', candles(START, 10))
+    assert store.months('BTCUSDT', '1h') == ['2024-01', '2024-02']
+    # overlapping rows replace stored ones
+    store.append('BTCUSDT', '1h', [[START + 2 * HOUR, 0, 0, 0, 99.0, 0]])
+
+    ts, values = store.read('BTCUSDT', '1h', START + HOUR, START + 5 * HOUR)
+    assert ts.tolist() == [START + i * HOUR for i in range(1, 5)]
+    assert values.shape == (5, 4)
+    assert values[3].tolist() == [1.5, 99.0, 3.5, 4.5]
+    assert store.read('BTCUSDT', '1h', last=3)[0].tolist() == [START + i * HOUR for i in (7, 8, 9)]
+    assert store.last_timestamp('BTCUSDT', '1h') == START + 9 * HOUR
+
+    df = load_candles('BTCUSDT', '1h', '2024-02-01', root=str(tmp_path))
+    assert len(df) == 6 and df['timestamp'].iloc[0] == pd.Timestamp('2024-02-01')
+
+
+def test_failed_append_keeps_stored_month(tmp_path, monkeypatch):
+    store = OHLCVStore(str(tmp_path))
+    store.append('BTCUSDT', '1h', candles(START, 3))
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(np, 'save', fail)
+    with pytest.raises(OSError):
+        store.append('BTCUSDT', '1h', candles(START + 3 * HOUR, 2))
+    assert os.listdir(store._dir('BTCUSDT', '1h')) == ['2024-01.npy']
+    assert store.count('BTCUSDT', '1h') == 3
+
+
+@pytest.mark.asyncio
+async def test_download_resumes_after_stored_candles(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    exchange = Exchange(candles(START, 25))
+    now = START + 25 * HOUR - 1  # the last candle is still forming
+    added = await store.download(exchange.fetch_ohlcv, 'BTCUSDT', '1h', START, page_limit=10, now_ms=now)
+    assert added == 24
+    assert exchange.calls == [START, START + 10 * HOUR, START + 20 * HOUR]
+
+    exchange.calls.clear()
+    exchange.rows = candles(START, 30)
+    added = await store.download(exchange.fetch_ohlcv, 'BTCUSDT', '1h', START, page_limit=10, now_ms=START + 30 * HOUR)
+    assert added == 6
+    assert exchange.calls == [START + 24 * HOUR]
+    assert len(store.read('BTCUSDT', '1h')[0]) == 30
+
+
+@pytest.mark.asyncio
+async def test_warmup_reads_store_and_fetches_only_the_gap(tmp_path):
+    import time
+    now = int(time.time() * 1000)
+    last_closed = now // HOUR * HOUR - HOUR
+    store = OHLCVStore(str(tmp_path))
+    store.append('BTCUSDT', '1h', candles(last_closed - 99 * HOUR, 98))
+    exchange = Exchange(candles(last_closed - 99 * HOUR, 100))
+
+    class Client:
+        pass
+
+    client = Client()
+    client.exchange = exchange
+    strat = LiveMAStrategy(client, {'indicators': {'BTCUSDT': {}}, 'ohlcv_store': str(tmp_path)})
+    await strat._load_candles('BTCUSDT', '1h')
+    assert exchange.calls == [last_closed - HOUR]
+    ts = strat._buffer('BTCUSDT', '1h').timestamps
+    assert len(ts) == 100 and ts[-1] == last_closed
+
+
+def test_retrain_uses_store_only_for_the_requested_period(tmp_path, monkeypatch):
+    requested = []
+
+    class Binance:
+        def __init__(self, config):
+            self.options = {}
+
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            requested.append(since)
+            return candles(since, limit)
+
+    monkeypatch.setattr(auto_retrain.ccxt, 'binance', Binance)
+    monkeypatch.setattr(auto_retrain.time, 'sleep', lambda s: None)
+    june = int(pd.Timestamp('2024-06-01').value // 1_000_000)
+    store = OHLCVStore(str(tmp_path))
+    store.append('BTCUSDT', '1h', candles(june, 1000))
+
+    df = auto_retrain.fetch_ohlcv('BTCUSDT', '1h', june + 1, limit=300, store=store)
+    assert requested == [] and df['timestamp'].iloc[0] == pd.Timestamp('2024-06-01 01:00')
+
+    january = int(pd.Timestamp('2024-01-01').value // 1_000_000)
+    df = auto_retrain.fetch_ohlcv('BTCUSDT', '1h', january, limit=300, store=store)
+    assert requested == [january] and df['timestamp'].iloc[0] == pd.Timestamp('2024-01-01')
+
+    store.append('BTCUSDT', '1h', candles(june + 1001 * HOUR, 500))  # one-candle hole
+    auto_retrain.fetch_ohlcv('BTCUSDT', '1h', june + 900 * HOUR, limit=300, store=store)
+    assert requested == [january, june + 900 * HOUR]
@@ -0,0 +1,134 @@
+import asyncio
+import sys, os, types, types as modtypes
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+from order_book import LocalOrderBook, OrderBookManager
+from live_strategy import LiveMAStrategy
+
+SNAPSHOT = {
+    'lastUpdateId': 100,
+    'bids': [['100.0', '2'], ['99.95', '3'], ['99.0', '10']],
+    'asks': [['100.1', '1'], ['100.15', '4'], ['101.0', '10']],
+}
+
+
+def diff(U, u, pu, b=(), a=()):
+    return {'e': 'depthUpdate', 'U': U, 'u': u, 'pu': pu, 'b': list(b), 'a': list(a)}
+
+
+def test_snapshot_replays_buffered_diffs_and_drops_stale():
+    book = LocalOrderBook('BTCUSDT')
+    assert book.apply_diff(diff(90, 95, 89, b=[['100.0', '9']])) == "buffered"
+    assert book.apply_diff(diff(96, 105, 95, b=[['100.05', '1']])) == "buffered"
+    assert book.apply_diff(diff(106, 110, 105, a=[['100.1', '0']])) == "buffered"
+    assert book.apply_snapshot(SNAPSHOT) == "applied"
+
+    assert book.bids[100.0] == 2  # the diff ending at 95 predates the snapshot
+    assert book.best_bid == 100.05
+    assert book.best_ask == 100.15
+    assert book.last_update_id == 110
+    assert book.apply_diff(diff(101, 108, 99)) == "stale"
+    assert book.apply_diff(diff(111, 112, 110, b=[['100.05', '0']])) == "applied"
+    assert book.best_bid == 100.0
+
+
+def test_spread_depth_and_imbalance():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_snapshot(SNAPSHOT)
+    assert book.spread == pytest.approx(0.001)
+    assert book.depth('bids', levels=2) == 5
+    # mid 100.05, 10 bps either side -> bids >= 99.95, asks <= 100.15
+    assert book.depth('bids', 10) == 5
+    assert book.depth('asks', 10) == 5
+    assert book.imbalance(10) == 0
+    version = book.version
+    book.apply_diff(diff(101, 101, 100, a=[['100.15', '0']]))
+    assert book.version == version + 1
+    assert book.depth('asks', 10) == 1
+    assert book.imbalance(10) == pytest.approx(4 / 6)
+
+
+@pytest.mark.asyncio
+async def test_gap_triggers_resync():
+    snapshots = [dict(SNAPSHOT), dict(SNAPSHOT, lastUpdateId=120)]
+    fetched = []
+
+    async def fetch(symbol):
+        fetched.append(symbol)
+        return snapshots[len(fetched) - 1]
+
+    manager = OrderBookManager(fetch)
+    manager.on_depth('BTCUSDT', diff(99, 101, 98))
+    await asyncio.sleep(0)
+    await manager._resyncs['BTCUSDT']
+    assert manager.get('BTCUSDT').last_update_id == 101
+
+    manager.on_depth('BTCUSDT', diff(115, 121, 114, b=[['100.05', '1']]))
+    assert manager.get('BTCUSDT') is None
+    await manager._resyncs['BTCUSDT']
+    book = manager.get('BTCUSDT')
+    assert fetched == ['BTCUSDT', 'BTCUSDT']
+    assert book.last_update_id == 121
+    assert book.best_bid == 100.05
+
+
+@pytest.mark.asyncio
+async def test_failed_snapshots_back_off():
+    calls = []
+
+    async def fetch(symbol):
+        calls.append(asyncio.get_running_loop().time())
+        if len(calls) < 3:
+            raise RuntimeError("429 Too Many Requests")
+        return dict(SNAPSHOT)
+
+    manager = OrderBookManager(fetch, retry_delay=0.02, max_retry_delay=0.05)
+    manager.on_depth('BTCUSDT', diff(99, 101, 98))
+    for i in range(1, 30):  # a diff every 5 ms while the endpoint fails
+        manager.on_depth('BTCUSDT', diff(101 + i, 101 + i, 100 + i))
+        await asyncio.sleep(0.005)
+    await manager._resyncs['BTCUSDT']
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.02 and calls[2] - calls[1] >= 0.04
+    assert manager.get('BTCUSDT') is not None
+    assert 'BTCUSDT' not in manager._delays
+
+
+class BookExchange:
+    def __init__(self):
+        self.rest_calls = 0
+
+    async def fetch_order_book(self, symbol, limit=5):
+        self.rest_calls += 1
+        return {'bids': [[100, 1]], 'asks': [[101, 1]]}
+
+
+class DummyClient:
+    def __init__(self):
+        self.exchange = BookExchange()
+
+
+@pytest.mark.asyncio
+async def test_validate_liquidity_prefers_local_book():
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}}})
+    strat.order_books.book('BTCUSDT').apply_snapshot(SNAPSHOT)
+    assert await strat.validate_liquidity('BTCUSDT', 1) is True
+    assert await strat.validate_liquidity('BTCUSDT', 2) is False
+    assert strat.client.exchange.rest_calls == 0
+
+    strat.order_books.max_age = -1
+    # REST book has a 1% spread
+    assert await strat.validate_liquidity('BTCUSDT', 0.1) is False
+    assert strat.client.exchange.rest_calls == 1
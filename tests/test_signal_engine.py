@@ -0,0 +1,147 @@
+import sys, os, types, types as modtypes
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+
+import numpy as np
+import pytest
+
+from features import FEATURE_COLUMNS
+import signal_engine
+from signal_engine import LEGACY_FEATURES, SignalEngine, dump_model
+
+
+class FakeBooster:
+    def __init__(self, names):
+        self.feature_names = names
+        self.calls = []
+
+    def inplace_predict(self, X):
+        self.calls.append(X)
+        # probability grows with the first column
+        return 1 / (1 + np.exp(-X[:, 0]))
+
+
+class FakeModel:
+    def __init__(self, names):
+        self.booster = FakeBooster(names)
+
+    def get_booster(self):
+        return self.booster
+
+    def predict_proba(self, X):
+        raise AssertionError('batch path must use inplace_predict')
+
+
+def make_engine(model):
+    engine = SignalEngine(model_path='does-not-exist.pkl')
+    engine.set_model(model)
+    return engine
+
+
+def test_score_batch_uses_one_inplace_call_in_model_order():
+    names = ['rsi', 'ema_short', 'volume']
+    model = FakeModel(names)
+    engine = make_engine(model)
+    model.booster.calls.clear()  # drop the canary prediction
+    rows = {}
+    for i in range(300):
+        row = np.arange(len(FEATURE_COLUMNS), dtype=float)
+        row[FEATURE_COLUMNS.index('rsi')] = (i - 150) / 10
+        rows[(f'S{i // 6}', f'tf{i % 6}')] = row
+    rows[('DICT', '1h')] = {'rsi': 2.0, 'ema_short': 1.0, 'volume': 3.0}
+
+    results = engine.score_batch(rows)
+
+    assert len(model.booster.calls) == 1
+    X = model.booster.calls[0]
+    assert X.shape == (301, 3) and X.dtype == np.float32
+    assert X[-1].tolist() == [2.0, 1.0, 3.0]
+    assert X[0].tolist() == [-15.0, FEATURE_COLUMNS.index('ema_short'), FEATURE_COLUMNS.index('volume')]
+    assert results[('S0', 'tf0')] == {'ok': False, 'confidence': 0.0}
+    assert results[('DICT', '1h')]['ok'] is True
+
+
+def test_single_row_matches_batch():
+    engine = make_engine(FakeModel(list(FEATURE_COLUMNS)))
+    features = dict(zip(FEATURE_COLUMNS, np.linspace(-1, 1, len(FEATURE_COLUMNS))))
+    single = engine.get_signal_for_timeframe(features, symbol='BTCUSDT', timeframe='1h')
+    assert single == engine.score_batch({'k': features})['k']
+
+
+def test_model_with_unknown_features_is_rejected():
+    engine = SignalEngine(model_path='does-not-exist.pkl')
+    with pytest.raises(ValueError):
+        engine.set_model(FakeModel(['ema_short', 'funding_rate']))
+    assert engine.model is None
+
+
+def test_fallback_only_without_model():
+    engine = SignalEngine(model_path='does-not-exist.pkl')
+    assert engine.feature_order == LEGACY_FEATURES
+    result = engine.get_signal_for_timeframe({name: 1.0 for name in LEGACY_FEATURES})
+    assert result == {'ok': True, 'confidence': 1.0}
+
+
+class PicklableModel:
+    """Unnamed sklearn-style model returning a constant probability."""
+    n_features_in_ = len(FEATURE_COLUMNS)
+
+    def __init__(self, proba):
+        self.proba = proba
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - np.full(len(X), self.proba), np.full(len(X), self.proba)])
+
+
+def test_hot_reload_swaps_new_artifact_and_keeps_serving_on_bad_one(tmp_path, monkeypatch):
+    path = str(tmp_path / 'model.pkl')
+    dump_model(PicklableModel(0.7), path)
+    engine = SignalEngine(model_path=path)
+    first = engine.model_version
+    assert first and engine.get_signal_for_timeframe({})['confidence'] == 0.7
+    assert engine.check_for_update() is False
+
+    dump_model(PicklableModel(0.2), path)
+    os.utime(path, ns=(1, 1))
+    asyncio.run(asyncio.to_thread(engine.check_for_update))
+    assert engine.model_version != first
+    assert engine.get_signal_for_timeframe({})['confidence'] == 0.2
+
+    good = engine.model_version
+    dump_model(PicklableModel(3.0), path)
+    os.utime(path, ns=(2, 2))
+    with pytest.raises(ValueError):
+        engine.check_for_update()
+    assert engine.model_version == good
+    # The bad artifact is not unpickled again until it changes.
+    loads = []
+    real_load = signal_engine.joblib.load
+    monkeypatch.setattr(signal_engine.joblib, 'load', lambda p: loads.append(p) or real_load(p))
+    assert engine.check_for_update() is False
+    os.utime(path, ns=(3, 3))  # touched, same content
+    assert engine.check_for_update() is False
+    assert loads == []
+    dump_model(PicklableModel(0.4), path)
+    os.utime(path, ns=(4, 4))
+    assert engine.check_for_update() is True
+    assert engine.get_signal_for_timeframe({})['confidence'] == 0.4
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+
+
+def test_watch_model_reloads_in_background(tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    engine = SignalEngine(model_path=path)
+    assert engine.model is None
+
+    async def scenario():
+        watcher = asyncio.create_task(engine.watch_model(0.01))
+        dump_model(PicklableModel(0.9), path)
+        for _ in range(100):
+            if engine.model is not None:
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+
+    asyncio.run(scenario())
+    assert engine.get_signal_for_timeframe({})['confidence'] == 0.9
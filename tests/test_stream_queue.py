@@ -0,0 +1,87 @@
+import asyncio
+import sys, os
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from stream_queue import StreamQueue
+
+
+class Recorder:
+    def __init__(self):
+        self.klines, self.ticks, self.depth = [], [], []
+
+    def queue(self, **kwargs):
+        return StreamQueue(
+            lambda symbol, tf, kline: self.klines.append((symbol, tf, kline)),
+            lambda symbol, price, **kw: self.ticks.append((symbol, price, kw)),
+            lambda symbol, event: self.depth.append((symbol, event)),
+            **kwargs,
+        )
+
+
+def test_ticks_coalesce_latest_wins():
+    rec = Recorder()
+    q = rec.queue()
+    q.put_tick('BTCUSDT', 100.0, qty=1.0, ts=1)
+    q.put_tick('ETHUSDT', 10.0, ts=1)
+    q.put_tick('BTCUSDT', 103.0, qty=2.0, ts=2)
+    q.put_tick('BTCUSDT', 99.0, qty=0.5, ts=3)
+    assert q.depth == 2
+    assert q.drain() == 2
+    assert rec.ticks == [
+        ('BTCUSDT', 99.0, {'qty': 3.5, 'ts': 3, 'high': 103.0, 'low': 99.0}),
+        ('ETHUSDT', 10.0, {'qty': 0.0, 'ts': 1, 'high': 10.0, 'low': 10.0}),
+    ]
+    stats = q.stats()
+    assert stats['received'] == 4 and stats['coalesced'] == 2 and stats['depth'] == 0
+
+
+def test_klines_kept_and_depth_bounded():
+    rec = Recorder()
+    q = rec.queue(max_depth_events=3)
+    for i in range(5):
+        q.put_kline('BTCUSDT', '5m', (i,))
+        q.put_depth('BTCUSDT', {'u': i})
+    assert q.depth == 8
+    q.drain()
+    assert [k[2][0] for k in rec.klines] == [0, 1, 2, 3, 4]
+    assert [e['u'] for _, e in rec.depth] == [2, 3, 4]
+    assert q.stats()['dropped_depth'] == 2
+
+
+def test_stale_ticks_are_dropped():
+    rec = Recorder()
+    q = rec.queue(max_tick_age=0.01)
+    q.put_tick('BTCUSDT', 100.0)
+    time.sleep(0.02)
+    q.put_kline('BTCUSDT', '5m', (1,))
+    q.drain()
+    assert rec.ticks == []
+    assert len(rec.klines) == 1
+    assert q.stats()['stale_ticks'] == 1
+    assert q.stats()['max_lag'] >= 0.02
+
+
+@pytest.mark.asyncio
+async def test_consumer_survives_handler_errors():
+    handled = []
+
+    def on_kline(symbol, tf, kline):
+        if kline == 'bad':
+            raise ValueError('boom')
+        handled.append(kline)
+
+    q = StreamQueue(on_kline, lambda *a, **k: None)
+    task = asyncio.create_task(q.run())
+    try:
+        for kline in ('a', 'bad', 'b'):
+            q.put_kline('BTCUSDT', '5m', kline)
+        await asyncio.sleep(0.01)
+        assert handled == ['a', 'b']
+        q.put_kline('BTCUSDT', '5m', 'c')
+        await asyncio.sleep(0.01)
+        assert handled == ['a', 'b', 'c']
+    finally:
+        task.cancel()
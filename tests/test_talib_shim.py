@@ -0,0 +1,98 @@
+import sys, os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import talib
+import ta.trend as trend
+import ta.momentum as momentum
+import ta.volume as volume
+import ta.volatility as volatility
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(42)
+    n = 400
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'high': close + rng.random(n) + 0.01,
+        'low': close - rng.random(n) - 0.01,
+        'close': close,
+        'volume': rng.random(n) * 100,
+    })
+
+
+def assert_matches(got, expected):
+    """Shim warm-up is ``nan``; everything after must equal ``ta``."""
+    got = np.asarray(got, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    valid = ~np.isnan(got)
+    assert valid.sum() > len(got) // 2
+    np.testing.assert_allclose(got[valid], expected[valid], rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("period", [5, 12, 26])
+def test_ema(candles, period):
+    assert_matches(talib.EMA(candles['close'], timeperiod=period),
+                   trend.ema_indicator(candles['close'], window=period))
+
+
+def test_macd(candles):
+    macd, signal, hist = talib.MACD(candles['close'], 7, 19, 5)
+    assert_matches(macd, trend.macd(candles['close'], window_slow=19, window_fast=7))
+    assert_matches(signal, trend.macd_signal(candles['close'], window_slow=19, window_fast=7, window_sign=5))
+    assert_matches(hist, trend.macd_diff(candles['close'], window_slow=19, window_fast=7, window_sign=5))
+
+
+@pytest.mark.parametrize("period", [7, 14])
+def test_rsi_uses_wilder_smoothing(candles, period):
+    assert_matches(talib.RSI(candles['close'], timeperiod=period),
+                   momentum.rsi(candles['close'], window=period))
+
+
+def test_atr(candles):
+    assert_matches(talib.ATR(candles['high'], candles['low'], candles['close'], 14),
+                   volatility.average_true_range(candles['high'], candles['low'], candles['close'], window=14))
+
+
+@pytest.mark.parametrize("period", [10, 14])
+def test_adx(candles, period):
+    got = talib.ADX(candles['high'], candles['low'], candles['close'], period)
+    assert np.isnan(got.iloc[2 * period - 2]) and not np.isnan(got.iloc[2 * period - 1])
+    assert_matches(got, trend.adx(candles['high'], candles['low'], candles['close'], window=period))
+
+
+def test_obv(candles):
+    assert_matches(talib.OBV(candles['close'], candles['volume']),
+                   volume.on_balance_volume(candles['close'], candles['volume']))
+
+
+def test_obv_ignores_unchanged_close():
+    obv = talib.OBV(np.array([1.0, 2.0, 2.0, 1.0]), np.array([5.0, 1.0, 7.0, 2.0]))
+    assert obv.tolist() == [5.0, 6.0, 6.0, 4.0]
+
+
+def test_bbands(candles):
+    upper, middle, lower = talib.BBANDS(candles['close'], timeperiod=20, nbdevup=2, nbdevdn=2)
+    assert_matches(upper, volatility.bollinger_hband(candles['close'], window=20, window_dev=2))
+    assert_matches(middle, volatility.bollinger_mavg(candles['close'], window=20))
+    assert_matches(lower, volatility.bollinger_lband(candles['close'], window=20, window_dev=2))
+
+
+def test_stoch(candles):
+    slow_k, _ = talib.STOCH(candles['high'], candles['low'], candles['close'], 14, 3, 0, 3, 0)
+    expected = momentum.StochasticOscillator(
+        candles['high'], candles['low'], candles['close'], window=14, smooth_window=3
+    ).stoch_signal()
+    assert_matches(slow_k, expected)
+
+
+def test_return_types_and_float32(candles):
+    series = talib.RSI(candles['close'])
+    assert isinstance(series, pd.Series) and series.index.equals(candles.index)
+    array = talib.RSI(candles['close'].to_numpy(), dtype=np.float32)
+    assert isinstance(array, np.ndarray) and array.dtype == np.float32
+    np.testing.assert_allclose(array, series.to_numpy(), rtol=1e-6, equal_nan=True)
@@ -0,0 +1,81 @@
+import sys, os, types, types as modtypes
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import json
+import time
+import numpy as np
+import pandas as pd
+
+import auto_retrain
+from live_strategy import LiveMAStrategy
+from ohlcv_store import OHLCVStore
+
+HEADER = 'timestamp,symbol,timeframe,type,entry_price,exit_price,pnl_pct,result\n'
+
+
+class NoExchangeClient:
+    def __getattr__(self, name):
+        raise AssertionError(f"train_mode used client.{name}")
+
+
+@pytest.mark.asyncio
+async def test_train_mode_simulates_from_store_without_exchange(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    with open('data/trade_log.csv', 'w') as f:
+        f.write(HEADER)
+    n = 60 * 288
+    end = (int(time.time() * 1000) // 300_000) * 300_000
+    ts = end - 300_000 * np.arange(n, 0, -1)
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    rows = np.column_stack([ts, close, close * 1.002, close * 0.998, close, rng.uniform(1, 10, n)])
+    OHLCVStore('ohlcv').append('BTCUSDT', '5m', rows)
+
+    class Booster:
+        def __init__(self, **kwargs):
+            pass
+
+        def fit(self, X, y):
+            fitted.append((len(X), set(y)))
+
+    def no_exchange(*args, **kwargs):
+        raise AssertionError("retraining asked the exchange for candles")
+
+    fitted = []
+    monkeypatch.setattr(auto_retrain.ccxt, 'binance', no_exchange)
+    monkeypatch.setattr(auto_retrain, 'xgb', types.SimpleNamespace(XGBClassifier=Booster))
+    monkeypatch.setattr(auto_retrain, 'compute_class_weight', lambda *a, **k: np.ones(2))
+    monkeypatch.setattr(auto_retrain, 'dump_model', lambda model, path: None)
+    config = {'indicators': {'BTCUSDT': {}}, 'tp': {}, 'sl': {}, 'ohlcv_store': 'ohlcv', 'model_path': 'none.pkl'}
+    with open('config.json', 'w') as f:
+        json.dump(config, f)
+    strat = LiveMAStrategy(NoExchangeClient(), config)
+    monkeypatch.setattr(strat.signal_engine, 'check_for_update', lambda: None)
+
+    started = time.perf_counter()
+    await strat.train_mode(30)
+    assert time.perf_counter() - started < 10
+
+    log = pd.read_csv('data/trade_log.csv')
+    entries, exits = log[log['type'] == 'ENTRY'], log[log['type'] == 'EXIT']
+    assert len(entries) == len(exits) > 0
+    assert set(exits['result']) <= {'win', 'loss'}
+    assert entries['result'].tolist() == exits['result'].tolist()
+    assert set(log['timeframe']) - {'5m'}  # higher timeframes come from resampled 5m candles
+    assert fitted and 0 < fitted[0][0] <= len(entries)
+    assert set(log['timeframe']) <= set(strat.timeframes)
+    assert pd.to_datetime(entries['timestamp']).min() >= pd.Timestamp.now('UTC').tz_localize(None) - pd.Timedelta(days=30, minutes=1)
+    assert (pd.to_datetime(exits['timestamp']).to_numpy() > pd.to_datetime(entries['timestamp']).to_numpy()).all()
@@ -0,0 +1,195 @@
+import sys, os, types, types as modtypes
+import asyncio
+import json
+import time
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import websockets
+
+from live_strategy import AccountSnapshot, LiveMAStrategy
+import user_data_stream
+from user_data_stream import UserDataStream, WS_URLS
+
+# Recorded futures user-data events (trimmed to the fields the bot reads).
+ENTRY_FILL = {"e": "ORDER_TRADE_UPDATE", "E": 1700000000100, "o": {
+    "s": "BTCUSDT", "i": 8886774, "S": "BUY", "o": "MARKET", "ot": "MARKET", "X": "FILLED",
+    "ap": "100.5", "L": "100.5", "z": "0.010"}}
+POSITION_OPEN = {"e": "ACCOUNT_UPDATE", "E": 1700000000101, "a": {"m": "ORDER", "P": [
+    {"s": "BTCUSDT", "pa": "0.010", "ep": "100.5", "up": "0", "ps": "BOTH"}]}}
+SL_NEW = {"e": "ORDER_TRADE_UPDATE", "E": 1700000000200, "o": {
+    "s": "BTCUSDT", "i": 111, "S": "SELL", "o": "STOP_MARKET", "ot": "STOP_MARKET", "X": "NEW"}}
+SL_FILLED = {"e": "ORDER_TRADE_UPDATE", "E": 1700000900000, "o": {
+    "s": "BTCUSDT", "i": 111, "S": "SELL", "o": "MARKET", "ot": "STOP_MARKET", "X": "FILLED",
+    "ap": "98.0", "L": "98.0", "z": "0.010"}}
+POSITION_CLOSED = {"e": "ACCOUNT_UPDATE", "E": 1700000900001, "a": {"m": "ORDER", "P": [
+    {"s": "BTCUSDT", "pa": "0", "ep": "0", "up": "0", "ps": "BOTH"}]}}
+KEY_EXPIRED = {"e": "listenKeyExpired", "E": 1700000950000}
+
+
+class ListenKeyExchange:
+    def __init__(self):
+        self.created = 0
+        self.renewed = 0
+        self.deleted = 0
+        self.canceled = []
+
+    async def fapiPrivatePostListenKey(self):
+        self.created += 1
+        return {'listenKey': f'key{self.created}'}
+
+    async def fapiPrivatePutListenKey(self):
+        self.renewed += 1
+        return {}
+
+    async def fapiPrivateDeleteListenKey(self):
+        self.deleted += 1
+        return {}
+
+    async def cancel_order(self, order_id, symbol):
+        self.canceled.append(order_id)
+
+
+class DummyClient:
+    def __init__(self):
+        self.exchange = ListenKeyExchange()
+
+
+async def replay_server(sessions):
+    """Serve one list of recorded events per connection, recording the paths."""
+    paths = []
+
+    async def handler(ws):
+        paths.append(ws.request.path)
+        events = sessions[min(len(paths), len(sessions)) - 1]
+        for event in events:
+            await ws.send(json.dumps(event))
+        await asyncio.Future()
+
+    server = await websockets.serve(handler, 'localhost', 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f'ws://localhost:{port}/ws/', paths
+
+
+@pytest.mark.asyncio
+async def test_fills_and_positions_reach_strategy_as_events(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    log_file = tmp_path / 'data' / 'trade_log.csv'
+    log_file.write_text('timestamp,symbol,timeframe,type,entry_price,exit_price,pnl_pct,result\n')
+    monkeypatch.chdir(tmp_path)
+
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}}})
+    strat.position_side['BTCUSDT'] = 'long'
+    strat.entry_price['BTCUSDT'] = 0
+    strat.entry_tf['BTCUSDT'] = '1h'
+    strat.sl_order_id['BTCUSDT'] = '111'
+    strat.tp_order_id['BTCUSDT'] = '222'
+
+    server, url, paths = await replay_server([[ENTRY_FILL, POSITION_OPEN, SL_NEW, SL_FILLED, POSITION_CLOSED]])
+    stream = UserDataStream(strat.client.exchange, strat, url=url, keepalive_interval=0.05)
+    strat.user_stream = stream
+    task = asyncio.create_task(stream.run())
+    try:
+        for _ in range(200):
+            if strat.position_side['BTCUSDT'] is None:
+                break
+            await asyncio.sleep(0.01)
+        assert stream.connected
+        await asyncio.sleep(0.12)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        server.close()
+
+    assert paths == ['/ws/key1']
+    lines = log_file.read_text().strip().splitlines()
+    assert lines[-1].split(',')[1:6] == ['BTCUSDT', '1h', 'EXIT', '100.5', '98.0']
+    assert lines[-1].endswith('loss')
+    assert strat.client.exchange.canceled == ['222']
+    assert strat.sl_order_id['BTCUSDT'] is None and strat.quantity['BTCUSDT'] is None
+    assert strat.client.exchange.renewed >= 1
+    assert strat.client.exchange.deleted == 1
+    assert not stream.connected
+
+
+@pytest.mark.asyncio
+async def test_expired_listen_key_is_recreated():
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}}})
+    server, url, paths = await replay_server([[KEY_EXPIRED], [POSITION_OPEN]])
+    stream = UserDataStream(strat.client.exchange, strat, url=url)
+    task = asyncio.create_task(stream.run())
+    try:
+        for _ in range(200):
+            if strat.position_side['BTCUSDT']:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        server.close()
+
+    assert paths == ['/ws/key1', '/ws/key2']
+    assert strat.position_side['BTCUSDT'] == 'long'
+    assert strat.quantity['BTCUSDT'] == 0.01
+
+
+@pytest.mark.asyncio
+async def test_rest_sync_only_runs_as_fallback_while_stream_is_live():
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}}, 'rest_sync_interval': 300})
+    assert strat._needs_rest_sync()
+    strat.user_stream = types.SimpleNamespace(connected=True)
+    strat.account = AccountSnapshot({}, {}, time.time())
+    assert not strat._needs_rest_sync()
+
+    await strat.on_order_update(SL_NEW['o'])
+    assert await strat.has_open('BTCUSDT', strat.account) is False
+    assert [o['id'] for o in strat.account.orders['BTCUSDT']] == ['111']
+
+    strat.account = AccountSnapshot({}, {}, time.time() - 301)
+    assert strat._needs_rest_sync()
+
+
+@pytest.mark.asyncio
+async def test_stream_is_live_only_after_a_message():
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}}})
+    server, url, paths = await replay_server([[]])
+    stream = UserDataStream(strat.client.exchange, strat, url=url)
+    task = asyncio.create_task(stream.run())
+    try:
+        for _ in range(200):
+            if paths:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert paths == ['/ws/key1']
+        assert not stream.connected  # a silent stream may be on the wrong network
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_user_stream_uses_the_client_network(monkeypatch):
+    async def run(self):
+        pass
+
+    monkeypatch.setattr(UserDataStream, 'run', run)
+    strat = LiveMAStrategy(DummyClient(), {'indicators': {'BTCUSDT': {}}})
+    strat.client.testnet = False
+    await user_data_stream.start_user_stream(strat, {})
+    assert strat.user_stream.url == WS_URLS[False]
+    strat.client.testnet = True
+    await user_data_stream.start_user_stream(strat, {'testnet': False})
+    assert strat.user_stream.url == WS_URLS[True]
@@ -0,0 +1,121 @@
+import sys, os, types, types as modtypes
+import asyncio
+import time
+import pytest
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.modules.setdefault('xgboost', types.SimpleNamespace())
+dummy_sk = modtypes.ModuleType('sklearn')
+dummy_utils = modtypes.ModuleType('sklearn.utils')
+dummy_cw = modtypes.ModuleType('sklearn.utils.class_weight')
+dummy_cw.compute_class_weight = lambda *a, **k: None
+dummy_utils.class_weight = dummy_cw
+sys.modules.setdefault('sklearn', dummy_sk)
+sys.modules.setdefault('sklearn.utils', dummy_utils)
+sys.modules.setdefault('sklearn.utils.class_weight', dummy_cw)
+
+import pandas as pd
+
+from live_strategy import LiveMAStrategy
+from rate_limit import RateBudget, klines_weight
+
+
+class SlowExchange:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.open_order_calls = 0
+
+    async def _call(self, result, delay=0.01):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(delay)
+        self.in_flight -= 1
+        return result
+
+    async def fapiPrivatePostLeverage(self, params):
+        return await self._call({})
+
+    async def fapiPublicGetExchangeInfo(self):
+        return await self._call({'symbols': [{'symbol': 'ETHUSDT', 'pricePrecision': 3, 'quantityPrecision': 2}]})
+
+    async def fapiPrivateV2GetPositionRisk(self, params):
+        return await self._call([{'positionAmt': '0', 'entryPrice': '0', 'unRealizedProfit': '0'}])
+
+    async def fetch_open_orders(self, symbol=None):
+        self.open_order_calls += 1
+        return await self._call([])
+
+    async def fetch_my_trades(self, symbol, *args, **kwargs):
+        return await self._call([])
+
+
+class SlowClient:
+    def __init__(self, delays):
+        self.exchange = SlowExchange()
+        self.delays = delays
+
+    async def fetch_candles(self, symbol, timeframe, limit=300):
+        df = pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=50, freq='1h'),
+            'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0,
+        })
+        return await self.exchange._call(df, self.delays.get(symbol, 0.01))
+
+
+@pytest.mark.asyncio
+async def test_warmup_is_concurrent_bounded_and_timed(tmp_path):
+    symbols = {f'S{i}USDT': {} for i in range(6)}
+    symbols['ETHUSDT'] = {}
+    client = SlowClient({})
+    strat = LiveMAStrategy(client, {'indicators': symbols, 'warmup_concurrency': 4, 'rate_limit_weight': 60000,
+                                   'exchange_info_path': str(tmp_path / 'exchange_info.json'),
+                                   'ohlcv_store': str(tmp_path / 'ohlcv')})
+
+    start = time.perf_counter()
+    await strat.initialize()
+    elapsed = time.perf_counter() - start
+
+    assert all(strat.ready.values())
+    assert client.exchange.max_in_flight <= 4
+    # 7 symbols x 9 requests x 10 ms would take ~0.6 s one by one
+    assert elapsed < 0.4
+    assert set(strat.warmup_timings) == {'leverage', 'precision', 'candles', 'positions'}
+    assert strat.warmup_timings['candles']['calls'] == 7 * len(strat.timeframes)
+    assert len(strat.data['S0USDT']['1h']) == 50
+    assert strat.quantity_precision['ETHUSDT'] == 2
+    # positions and orders came from one account-wide snapshot
+    assert client.exchange.open_order_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_symbols_become_ready_independently(tmp_path):
+    client = SlowClient({'SLOWUSDT': 0.2})
+    strat = LiveMAStrategy(client, {'indicators': {'FASTUSDT': {}, 'SLOWUSDT': {}}, 'rate_limit_weight': 60000,
+                                   'exchange_info_path': str(tmp_path / 'exchange_info.json'),
+                                   'ohlcv_store': str(tmp_path / 'ohlcv')})
+
+    await strat.initialize(wait=False)
+    assert not any(strat.ready.values())
+    while not strat.ready['FASTUSDT']:
+        await asyncio.sleep(0.01)
+    assert not strat.ready['SLOWUSDT']
+    await strat._warmup
+    assert strat.ready['SLOWUSDT']
+
+
+@pytest.mark.asyncio
+async def test_rate_budget_throttles_to_weight_per_minute():
+    budget = RateBudget(weight_per_minute=6000, burst=10)  # 100 weight/s
+    start = time.perf_counter()
+    for _ in range(15):
+        await budget.acquire(2)
+    elapsed = time.perf_counter() - start
+    # 10 weight come from the burst, the other 20 need ~0.2 s of refill
+    assert 0.15 < elapsed < 0.5
+    assert budget.spent == 30
+
+
+def test_klines_weight_follows_limit_tiers():
+    assert [klines_weight(n) for n in (50, 300, 1000, 1500)] == [1, 2, 5, 10]
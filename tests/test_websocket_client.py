@@ -18,7 +18,7 @@ class DummyStrategy:
     def process_timeframe_data(self, symbol, timeframe, df):
         self.tf_calls.append((symbol, timeframe, df))
 
-    def process_tick(self, symbol, price):
+    def process_tick(self, symbol, price, **kwargs):
         self.tick_calls.append((symbol, price))
 
 class DummyWS:
@@ -112,3 +112,148 @@ async def test_start_streams_modes(monkeypatch, testnet):
         assert created_exchange.modes == [True]
     else:
         assert created_exchange.modes == []
+
+
+def test_router_passes_typed_tuples():
+    strategy = DummyStrategy()
+    strategy.depth_calls = []
+    strategy.process_depth = lambda symbol, event: strategy.depth_calls.append((symbol, event['u']))
+    streams, dispatch = websocket_client.build_router(["BTCUSDT"], ["1m"], strategy)
+    assert streams == ["btcusdt@kline_1m", "btcusdt@ticker", "btcusdt@depth@100ms"]
+
+    for raw in DummyWS().messages:
+        dispatch(raw)
+    dispatch(json.dumps({"stream": "btcusdt@depth@100ms", "data": {"e": "depthUpdate", "u": 7}}))
+    dispatch(json.dumps({"stream": "ethusdt@ticker", "data": {"s": "ETHUSDT", "c": "2"}}))
+
+    (symbol, tf, kline), = strategy.tf_calls
+    assert (symbol, tf) == ("BTCUSDT", "1m")
+    assert kline == (1234567890000, 1.0, 1.0, 1.0, 1.0, 1.0)
+    assert kline.close == 1.0
+    assert strategy.tick_calls == [("BTCUSDT", 1.0)]
+    assert strategy.depth_calls == [("BTCUSDT", 7)]
+
+
+def test_manager_shards_streams_per_symbol(monkeypatch):
+    monkeypatch.setattr(websocket_client.ccxt, "binance", dummy_binance)
+    symbols = [f"SYM{i}USDT" for i in range(250)]
+    manager = websocket_client.StreamManager(symbols, ["1m", "5m"], DummyStrategy(), {})
+    assert len(manager.shards) == 4
+    assert all(len(shard.streams) <= 200 for shard in manager.shards)
+    assert sum(len(shard.streams) for shard in manager.shards) == 750
+    for symbol in symbols:
+        assert set(manager.router.streams_for(symbol)) <= set(manager._owner[symbol].streams)
+
+
+class FakeWS:
+    def __init__(self, url):
+        self.url = url
+        self.sent = []
+        self.queue = asyncio.Queue()
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def recv(self):
+        item = await self.queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class FakeConnect:
+    def __init__(self):
+        self.sockets = []
+
+    def __call__(self, url, **kwargs):
+        ws = FakeWS(url)
+        self.sockets.append(ws)
+
+        class Conn:
+            async def __aenter__(self):
+                return ws
+
+            async def __aexit__(self, *exc):
+                pass
+
+        return Conn()
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not met")
+
+
+@pytest.mark.asyncio
+async def test_live_subscribe_and_independent_reconnect(monkeypatch):
+    connect = FakeConnect()
+    monkeypatch.setattr(websocket_client.websockets, "connect", connect)
+    monkeypatch.setattr(websocket_client.ccxt, "binance", dummy_binance)
+    strategy = DummyStrategy()
+    manager = websocket_client.StreamManager(
+        ["BTCUSDT", "ETHUSDT"], ["1m", "5m"], strategy, {"ws_streams_per_connection": 6})
+    manager.reconnect_delay = 0
+    task = asyncio.create_task(manager.run())
+    try:
+        await wait_for(lambda: manager.shards[0].ws is not None)
+        first = connect.sockets[0]
+        assert first.url.endswith("btcusdt@kline_1m/btcusdt@kline_5m/btcusdt@ticker/"
+                                  "ethusdt@kline_1m/ethusdt@kline_5m/ethusdt@ticker")
+
+        await manager.set_symbols(["BTCUSDT", "SOLUSDT"])
+        assert [m["method"] for m in first.sent] == ["UNSUBSCRIBE", "SUBSCRIBE"]
+        assert first.sent[1]["params"] == ["solusdt@kline_1m", "solusdt@kline_5m", "solusdt@ticker"]
+        assert len(connect.sockets) == 1
+
+        await first.queue.put(json.dumps({"result": None, "id": 2}))
+        await first.queue.put(json.dumps({"stream": "solusdt@kline_5m", "data": {
+            "s": "SOLUSDT", "k": {"t": 1, "o": "2", "h": "2", "l": "2", "c": "2", "v": "3", "x": True}}}))
+        await first.queue.put(json.dumps({"stream": "ethusdt@ticker", "data": {"s": "ETHUSDT", "c": "5"}}))
+        await wait_for(lambda: strategy.tf_calls)
+        assert strategy.tf_calls[0][:2] == ("SOLUSDT", "5m")
+        assert strategy.tick_calls == []
+
+        await manager.add_symbol("XRPUSDT")
+        assert len(manager.shards) == 2
+        await wait_for(lambda: len(connect.sockets) == 2)
+        second = connect.sockets[1]
+
+        await first.queue.put(websocket_client.websockets.exceptions.ConnectionClosedError(None, None))
+        await wait_for(lambda: len(connect.sockets) == 3)
+        assert manager.shards[1].ws is second
+        assert "solusdt@ticker" in connect.sockets[2].url
+        assert "ethusdt" not in connect.sockets[2].url
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_reconnect_backfills_missed_candles(monkeypatch):
+    connect = FakeConnect()
+    monkeypatch.setattr(websocket_client.websockets, "connect", connect)
+    monkeypatch.setattr(websocket_client.ccxt, "binance", dummy_binance)
+    strategy = DummyStrategy()
+    backfilled = []
+
+    async def backfill(symbols):
+        backfilled.append(symbols)
+
+    strategy.backfill = backfill
+    manager = websocket_client.StreamManager(["BTCUSDT", "ETHUSDT"], ["1m"], strategy, {})
+    manager.reconnect_delay = 0
+    task = asyncio.create_task(manager.run())
+    try:
+        await wait_for(lambda: manager.shards[0].ws is not None)
+        assert backfilled == []
+        await connect.sockets[0].queue.put(websocket_client.websockets.exceptions.ConnectionClosedError(None, None))
+        await wait_for(lambda: backfilled)
+        assert backfilled == [["BTCUSDT", "ETHUSDT"]]
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
@@ -4,11 +4,11 @@ import pandas as pd
 import numpy as np
 import xgboost as xgb
 import talib
-import joblib
 import logging
 import json
 from sklearn.model_selection import StratifiedKFold, cross_val_score
-from features import extract_features
+from features import FEATURE_COLUMNS, latest_features
+from signal_engine import dump_model
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +47,7 @@ def train_model(log_path='data/trade_log.csv', model_output='model_xgb.pkl', con
                 macd_fast = ind_cfg.get('macd_fast', 12)
                 macd_slow = ind_cfg.get('macd_slow', 26)
                 macd_signal = ind_cfg.get('macd_signal', 9)
-                feats = extract_features(
+                row_feats = latest_features(
                     df,
                     bb_period=bb_period,
                     bb_k=bb_k,
@@ -59,9 +59,9 @@ def train_model(log_path='data/trade_log.csv', model_output='model_xgb.pkl', con
                     macd_slow=macd_slow,
                     macd_signal=macd_signal,
                 )
-                if feats.empty:
+                if np.isnan(row_feats).any():
                     continue
-                X_list.append(feats.iloc[-1])
+                X_list.append(row_feats)
                 y_list.append(1 if row['result'].lower() == 'win' else 0)
             except Exception as e:
                 logger.warning(f"Erro ao processar linha: {e}")
@@ -70,7 +70,7 @@ def train_model(log_path='data/trade_log.csv', model_output='model_xgb.pkl', con
             logger.error("Nenhum dado válido para treinar.")
             return
 
-        X = pd.DataFrame(X_list)
+        X = pd.DataFrame(X_list, columns=FEATURE_COLUMNS)
         y = np.array(y_list)
 
         model = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss')
@@ -84,7 +84,7 @@ def train_model(log_path='data/trade_log.csv', model_output='model_xgb.pkl', con
         logger.info(f"Accuracy: {acc_scores.mean():.4f} (+/- {acc_scores.std():.4f})")
 
         model.fit(X, y)
-        joblib.dump(model, model_output)
+        dump_model(model, model_output)
         logger.info(f"Modelo treinado e salvo em: {model_output}")
 
     except Exception as e:
@@ -0,0 +1,138 @@
+"""Binance futures user-data stream: order fills and position changes as events."""
+
+import asyncio
+import inspect
+import json
+import logging
+import time
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+WS_URLS = {
+    True: "wss://stream.binancefuture.com/ws/",
+    False: "wss://fstream.binance.com/ws/",
+}
+
+
+class UserDataStream:
+    """Keep a listenKey alive and push account events into ``strategy``.
+
+    ``ORDER_TRADE_UPDATE`` payloads (the ``o`` object) go to
+    ``strategy.on_order_update`` and ``ACCOUNT_UPDATE`` payloads (the ``a``
+    object) to ``strategy.on_account_update``; either handler may be a
+    coroutine.  The key is renewed every ``keepalive_interval`` seconds and
+    recreated when the exchange reports it expired.  ``connected`` tells the
+    strategy whether it can skip routine REST reconciliation; it is only set
+    once a message arrives, proving the key belongs to the stream's network.
+    """
+
+    def __init__(self, exchange, strategy, testnet=True, url=None, keepalive_interval=30 * 60,
+                 reconnect_delay=5, max_reconnect_delay=120):
+        self.exchange = exchange
+        self.strategy = strategy
+        self.url = url or WS_URLS[bool(testnet)]
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.listen_key = None
+        self.connected = False
+        self.last_event_at = None
+
+    async def create_listen_key(self):
+        response = await self.exchange.fapiPrivatePostListenKey()
+        self.listen_key = response['listenKey']
+        return self.listen_key
+
+    async def close_listen_key(self):
+        if not self.listen_key:
+            return
+        try:
+            await self.exchange.fapiPrivateDeleteListenKey()
+        except Exception as e:
+            logger.warning(f"Failed to close listenKey: {e}")
+        self.listen_key = None
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self.exchange.fapiPrivatePutListenKey()
+                logger.debug("listenKey renewed")
+            except Exception as e:
+                logger.warning(f"listenKey keepalive failed: {e}")
+
+    async def handle(self, message):
+        """Dispatch one decoded event; return ``False`` if the key expired."""
+        event = message.get('e')
+        self.last_event_at = time.time()
+        if event == 'ORDER_TRADE_UPDATE':
+            result = self.strategy.on_order_update(message.get('o', {}))
+        elif event == 'ACCOUNT_UPDATE':
+            result = self.strategy.on_account_update(message.get('a', {}))
+        elif event == 'listenKeyExpired':
+            logger.warning("listenKey expired, reconnecting user-data stream")
+            return False
+        else:
+            return True
+        if inspect.isawaitable(result):
+            await result
+        return True
+
+    async def _session(self):
+        """One connection on a fresh listenKey; returns ``True`` if the key expired."""
+        await self.create_listen_key()
+        keepalive = asyncio.create_task(self._keepalive())
+        try:
+            async with websockets.connect(f"{self.url}{self.listen_key}", ping_interval=30, ping_timeout=10) as ws:
+                logger.info("User-data stream connected")
+                async for raw in ws:
+                    self.connected = True
+                    try:
+                        message = json.loads(raw)
+                    except ValueError:
+                        logger.debug("Ignoring undecodable user-data message")
+                        continue
+                    try:
+                        if not await self.handle(message):
+                            return True
+                    except Exception as e:
+                        logger.error(f"User-data handler failed for {message.get('e')}: {e}")
+        finally:
+            self.connected = False
+            keepalive.cancel()
+
+    async def run(self):
+        """Stream until cancelled, reconnecting with exponential backoff."""
+        delay = self.reconnect_delay
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    if await self._session():
+                        delay = self.reconnect_delay
+                        continue
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"User-data stream error: {e}")
+                if time.monotonic() - started > self.max_reconnect_delay:
+                    delay = self.reconnect_delay
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            await self.close_listen_key()
+
+
+async def start_user_stream(strategy, config):
+    """Run the user-data stream for ``strategy`` and attach it as ``strategy.user_stream``."""
+    stream = UserDataStream(
+        strategy.client.exchange,
+        strategy,
+        # The listenKey comes from the client's exchange, so use its network.
+        testnet=getattr(strategy.client, 'testnet', config.get('testnet', False)),
+        keepalive_interval=config.get('listen_key_keepalive', 30 * 60),
+    )
+    strategy.user_stream = stream
+    await stream.run()
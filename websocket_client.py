@@ -4,11 +4,112 @@ import asyncio
 import json
 import websockets
 import logging
+from collections import namedtuple
 import pandas as pd
 import ccxt.async_support as ccxt
+from stream_queue import StreamQueue
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # optional, roughly 2-3x faster than the stdlib decoder
+    loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Closed candle as handed to ``strategy.process_timeframe_data``; timestamp in ms.
+Kline = namedtuple('Kline', 'timestamp open high low close volume')
+
+
+class StreamRouter:
+    """Routing table from stream name to ``(symbol, timeframe, handler)``.
+
+    ``dispatch(raw)`` decodes one message and calls the strategy with a
+    single dict lookup instead of parsing the stream name, or hands it to
+    ``queue`` (a ``StreamQueue``) when one is given.  Symbols can be added
+    and removed while streams are running.
+    """
+
+    def __init__(self, strategy, timeframes, tick_stream='ticker', depth=True, queue=None):
+        self.strategy = strategy
+        self.timeframes = list(timeframes)
+        self.tick_stream = tick_stream
+        self.process_depth = getattr(strategy, 'process_depth', None) if depth else None
+        self.tick_handler = self._on_agg_trade if tick_stream.startswith('aggTrade') else self._on_ticker
+        self.routes = {}
+        if queue is not None:
+            self._kline_sink, self._tick_sink, self._depth_sink = queue.put_kline, queue.put_tick, queue.put_depth
+        else:
+            self._kline_sink = strategy.process_timeframe_data
+            self._tick_sink = strategy.process_tick
+            self._depth_sink = self.process_depth
+
+    def streams_for(self, symbol):
+        name = symbol.lower()
+        streams = [f"{name}@kline_{tf}" for tf in self.timeframes]
+        streams.append(f"{name}@{self.tick_stream}")
+        if self.process_depth is not None:
+            streams.append(f"{name}@depth@100ms")
+        return streams
+
+    def add(self, symbol):
+        """Route ``symbol``'s streams and return their names."""
+        streams = self.streams_for(symbol)
+        for stream in streams:
+            if '@kline_' in stream:
+                self.routes[stream] = (symbol, stream.split('@kline_')[1], self._on_kline)
+            elif '@depth' in stream:
+                self.routes[stream] = (symbol, None, self._on_depth)
+            else:
+                self.routes[stream] = (symbol, None, self.tick_handler)
+        return streams
+
+    def remove(self, symbol):
+        streams = self.streams_for(symbol)
+        for stream in streams:
+            self.routes.pop(stream, None)
+        return streams
+
+    def dispatch(self, raw):
+        message = loads(raw)
+        route = self.routes.get(message.get('stream'))
+        data = message.get('data')
+        if route is None or not data:
+            # Also covers SUBSCRIBE/UNSUBSCRIBE acknowledgements.
+            logger.debug("Ignoring WebSocket message %s", message)
+            return
+        symbol, timeframe, handler = route
+        handler(symbol, timeframe, data)
+
+    def _on_kline(self, symbol, timeframe, data):
+        k = data.get('k')
+        if not k or not k.get('x', False):
+            return
+        kline = Kline(k['t'], float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v']))
+        logger.debug("Kline %s %s ts=%s close=%s", symbol, timeframe, kline.timestamp, kline.close)
+        self._kline_sink(symbol, timeframe, kline)
+
+    def _on_ticker(self, symbol, _, data):
+        price = float(data.get('c', 0))
+        if price > 0:
+            self._tick_sink(symbol, price, ts=data.get('E'))
+
+    def _on_agg_trade(self, symbol, _, data):
+        price = float(data.get('p', 0))
+        if price > 0:
+            self._tick_sink(symbol, price, qty=float(data.get('q', 0)), ts=data.get('T'))
+
+    def _on_depth(self, symbol, _, data):
+        self._depth_sink(symbol, data)
+
+
+def build_router(symbols, timeframes, strategy, tick_stream='ticker', depth=True):
+    """Return ``(streams, dispatch)`` for a fixed set of symbols."""
+    router = StreamRouter(strategy, timeframes, tick_stream, depth)
+    streams = [stream for symbol in symbols for stream in router.add(symbol)]
+    return streams, router.dispatch
+
+
 async def fetch_historical_klines(exchange, symbol, timeframe, limit=300):
     try:
         ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
@@ -20,107 +121,247 @@ async def fetch_historical_klines(exchange, symbol, timeframe, limit=300):
         logger.error(f"Failed to fetch historical klines for {symbol} {timeframe}: {e}")
         return None
 
-async def start_streams(symbols, timeframes, strategy, valid_timeframes, config):
+class StreamShard:
+    """One combined-stream connection that reconnects on its own.
+
+    Streams listed at connect time go in the URL; later changes are sent as
+    live ``SUBSCRIBE``/``UNSUBSCRIBE`` requests on the open connection.
+    """
+
+    def __init__(self, manager, index):
+        self.manager = manager
+        self.index = index
+        self.streams = []
+        self.uri_index = manager.uri_index
+        self.ws = None
+        self.connections = 0
+        self._wake = asyncio.Event()
+
+    @property
+    def room(self):
+        """Streams this connection can still take."""
+        return self.manager.streams_per_connection - len(self.streams)
+
+    async def subscribe(self, streams):
+        self.streams.extend(streams)
+        self._wake.set()
+        await self._send('SUBSCRIBE', streams)
+
+    async def unsubscribe(self, streams):
+        removed = set(streams)
+        self.streams = [s for s in self.streams if s not in removed]
+        await self._send('UNSUBSCRIBE', streams)
+
+    async def _send(self, method, streams):
+        if self.ws is None or not streams:
+            return  # applied from self.streams on the next connect
+        self.manager.request_id += 1
+        try:
+            await self.ws.send(json.dumps({"method": method, "params": streams, "id": self.manager.request_id}))
+        except Exception as e:
+            logger.warning(f"Shard {self.index} {method} failed, will resync on reconnect: {e}")
+
+    async def run(self):
+        m = self.manager
+        reconnect_delay = m.reconnect_delay
+        reconnect_attempts = 0
+        while True:
+            if not self.streams:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            if reconnect_attempts >= m.max_attempts:
+                logger.info(f"Shard {self.index}: max WebSocket attempts ({m.max_attempts}) reached, switching to REST API fallback")
+                await m.rest_fallback(self.streams)
+                await asyncio.sleep(60)
+                reconnect_attempts = 0
+                reconnect_delay = m.reconnect_delay
+                continue
+
+            connected = list(self.streams)
+            url = f"{m.uris[self.uri_index]}?streams={'/'.join(connected)}"
+            try:
+                async with websockets.connect(url, ping_interval=30, ping_timeout=10) as ws:
+                    logger.info(f"Shard {self.index} connected to {m.uris[self.uri_index]} with {len(connected)} streams")
+                    self.ws = ws
+                    self.connections += 1
+                    reconnect_attempts = 0
+                    reconnect_delay = m.reconnect_delay
+                    if self.connections > 1:
+                        m.schedule_backfill(self.streams)
+                    await self._send('SUBSCRIBE', [s for s in self.streams if s not in connected])
+                    while True:
+                        m.dispatch(await ws.recv())
+            except websockets.exceptions.ConnectionClosedError as e:
+                logger.error(f"Shard {self.index} closed on {m.uris[self.uri_index]}: {e}")
+                self.uri_index = (self.uri_index + 1) % len(m.uris)
+            except asyncio.CancelledError:
+                logger.info(f"Shard {self.index} cancelled")
+                return
+            except Exception as e:
+                logger.error(f"Shard {self.index} WebSocket error: {e}")
+            finally:
+                self.ws = None
+            reconnect_attempts += 1
+            await asyncio.sleep(reconnect_delay)
+            reconnect_delay = min(reconnect_delay * 2, m.max_reconnect_delay)
+
+
+class StreamManager:
+    """Spread market-data streams over as many connections as needed.
+
+    Each connection carries at most ``ws_streams_per_connection`` streams
+    (Binance futures allows 200) and a symbol's streams stay on one
+    connection.  ``set_symbols`` subscribes and unsubscribes on the live
+    connections, opening a new one only when the existing ones are full.
+    """
+
     uris = [
         "wss://stream.binancefuture.com/stream",
         "wss://fstream.binance.com/stream"
     ]
-    ws_tfs = config.get('ws_timeframes') or timeframes
-    if isinstance(ws_tfs, str):
-        ws_tfs = [ws_tfs]
 
-    streams = [
-        f"{symbol.lower()}@kline_{tf}" for symbol in symbols
-        for tf in ws_tfs
-    ] + [
-        f"{symbol.lower()}@ticker" for symbol in symbols
-    ]
-    stream_param = "/".join(streams)
-    current_uri_index = 0
-    if not config.get('testnet', True):
-        current_uri_index = 1
-
-    exchange = ccxt.binance({'enableRateLimit': True})
-    if config.get('testnet', True):
-        exchange.set_sandbox_mode(True)
-
-    reconnect_delay = 5
-    max_reconnect_delay = 120
-    reconnect_attempts = 0
-    max_attempts = 3
-
-    while True:
-        full_url = f"{uris[current_uri_index]}?streams={stream_param}"
-        if reconnect_attempts >= max_attempts:
-            logger.info(f"Max WebSocket attempts ({max_attempts}) reached, switching to REST API fallback")
-            for symbol in symbols:
-                for tf in timeframes:
-                    df = await fetch_historical_klines(exchange, symbol, tf)
-                    if df is not None:
-                        strategy.process_timeframe_data(symbol, tf, df)
-                    else:
-                        logger.warning(f"REST API failed for {symbol} {tf}, skipping data update")
-            await asyncio.sleep(60)
-            reconnect_attempts = 0
-            reconnect_delay = 5
-            continue
+    def __init__(self, symbols, timeframes, strategy, config, ws_timeframes=None):
+        self.strategy = strategy
+        self.timeframes = timeframes
+        self.queue = None
+        if config.get('ws_queue', True):
+            self.queue = StreamQueue(
+                strategy.process_timeframe_data,
+                strategy.process_tick,
+                getattr(strategy, 'process_depth', None),
+                max_tick_age=config.get('ws_max_tick_age', 2.0),
+            )
+        self.router = StreamRouter(
+            strategy,
+            ws_timeframes or timeframes,
+            tick_stream=config.get('ws_tick_stream', 'ticker'),
+            depth=config.get('ws_depth', True),
+            queue=self.queue,
+        )
+        self.dispatch = self.router.dispatch
+        self.streams_per_connection = config.get('ws_streams_per_connection', 200)
+        self.uri_index = 0 if config.get('testnet', True) else 1
+        self.reconnect_delay = 5
+        self.max_reconnect_delay = 120
+        self.max_attempts = 3
+        self.request_id = 0
+        self.symbols = []
+        self.shards = []
+        self._owner = {}
+        self._tasks = []
+        self.running = False
+        # Strategies with a candle store only refetch the range they missed.
+        self._backfill = getattr(strategy, 'backfill', None)
+        self._backfills = set()
+        self.exchange = ccxt.binance({'enableRateLimit': True})
+        if config.get('testnet', True):
+            self.exchange.set_sandbox_mode(True)
+        for symbol in symbols:
+            shard, streams = self._place(symbol)
+            shard.streams.extend(streams)
+
+    def _place(self, symbol):
+        streams = self.router.add(symbol)
+        shard = next((s for s in self.shards if s.room >= len(streams)), None)
+        if shard is None:
+            shard = StreamShard(self, len(self.shards))
+            self.shards.append(shard)
+            if self.running:
+                self._tasks.append(asyncio.create_task(shard.run()))
+        self.symbols.append(symbol)
+        self._owner[symbol] = shard
+        return shard, streams
+
+    async def add_symbol(self, symbol):
+        if symbol in self._owner:
+            return
+        shard, streams = self._place(symbol)
+        await shard.subscribe(streams)
+
+    async def remove_symbol(self, symbol):
+        shard = self._owner.pop(symbol, None)
+        if shard is None:
+            return
+        self.symbols.remove(symbol)
+        await shard.unsubscribe(self.router.remove(symbol))
 
+    async def set_symbols(self, symbols):
+        """Subscribe to ``symbols`` only, without reconnecting."""
+        for symbol in [s for s in self.symbols if s not in symbols]:
+            await self.remove_symbol(symbol)
+        for symbol in symbols:
+            await self.add_symbol(symbol)
+
+    def _symbols_of(self, streams):
+        symbols = {self.router.routes[s][0] for s in streams if s in self.router.routes}
+        return [s for s in self.symbols if s in symbols]
+
+    def schedule_backfill(self, streams):
+        """Fetch the candles a shard missed while it was disconnected."""
+        if self._backfill is None:
+            return
+        task = asyncio.create_task(self._run_backfill(self._symbols_of(streams)))
+        self._backfills.add(task)
+        task.add_done_callback(self._backfills.discard)
+
+    async def _run_backfill(self, symbols):
         try:
-            async with websockets.connect(full_url, ping_interval=30, ping_timeout=10) as ws:
-                logger.info(f"WebSocket connected to {full_url}: {stream_param}")
-                reconnect_attempts = 0
-                reconnect_delay = 5
-                while True:
-                    response = await ws.recv()
-                    message = json.loads(response)
-                    data = message.get('data', {})
-                    stream_name = message.get('stream', '')
-                    if not data or not stream_name:
-                        logger.debug("Received empty or invalid WebSocket message")
-                        continue
-
-                    symbol = data.get('s', '').upper()
-                    if not symbol:
-                        logger.debug("No symbol in WebSocket message")
-                        continue
-
-                    if '@kline_' in stream_name:
-                        kline = data.get('k', {})
-                        if not kline:
-                            logger.debug("No kline data in WebSocket message")
-                            continue
-                        if not kline.get('x', False):
-                            continue
-                        timeframe = stream_name.split('@kline_')[1]
-                        if timeframe not in valid_timeframes:
-                            logger.warning(f"Received invalid timeframe {timeframe} for {symbol}")
-                            continue
-                        df = pd.DataFrame({
-                            'timestamp': [pd.Timestamp(kline['t'], unit='ms')],
-                            'open': [float(kline['o'])],
-                            'high': [float(kline['h'])],
-                            'low': [float(kline['l'])],
-                            'close': [float(kline['c'])],
-                            'volume': [float(kline['v'])]
-                        })
-                        logger.info(f"Received WebSocket kline for {symbol} {timeframe}: timestamp={df['timestamp'].iloc[0]}, close={df['close'].iloc[0]}")
-                        strategy.process_timeframe_data(symbol, timeframe, df)
-
-                    elif '@ticker' in stream_name:
-                        price = float(data.get('c', 0))
-                        if price > 0:
-                            strategy.process_tick(symbol, price)
-
-        except websockets.exceptions.ConnectionClosedError as e:
-            logger.error(f"WebSocket closed on {uris[current_uri_index]}: {e}")
-            current_uri_index = (current_uri_index + 1) % len(uris)
-        except asyncio.CancelledError:
-            logger.info("WebSocket stream task cancelled")
-            break
+            await self._backfill(symbols)
         except Exception as e:
-            logger.error(f"WebSocket error: {e}")
-        reconnect_attempts += 1
-        await asyncio.sleep(reconnect_delay)
-        reconnect_delay = min(reconnect_delay * 2, max_reconnect_delay)
+            logger.error(f"Backfill after reconnect failed: {e}")
+
+    async def rest_fallback(self, streams):
+        if self._backfill is not None:
+            await self._run_backfill(self._symbols_of(streams))
+            return
+        for symbol in self._symbols_of(streams):
+            for tf in self.timeframes:
+                df = await fetch_historical_klines(self.exchange, symbol, tf)
+                if df is not None:
+                    self.strategy.process_timeframe_data(symbol, tf, df)
+                else:
+                    logger.warning(f"REST API failed for {symbol} {tf}, skipping data update")
+
+    async def run(self):
+        """Run every shard until all of them stop or this is cancelled."""
+        self.running = True
+        self._tasks = [asyncio.create_task(shard.run()) for shard in self.shards]
+        consumer = asyncio.create_task(self.queue.run()) if self.queue is not None else None
+        logger.info(f"Streaming {len(self.router.routes)} streams over {len(self.shards)} connections")
+        try:
+            while True:
+                pending = [t for t in self._tasks if not t.done()]
+                if not pending:
+                    break
+                await asyncio.wait(pending)
+            if self.queue is not None:
+                self.queue.drain()
+        finally:
+            self.running = False
+            for task in [*self._tasks, *self._backfills, consumer]:
+                if task is not None:
+                    task.cancel()
+            await self.exchange.close()
+
+
+async def start_streams(symbols, timeframes, strategy, valid_timeframes, config):
+    """Stream market data for ``symbols`` into ``strategy`` until cancelled.
 
-    await exchange.close()
+    The connection manager is attached as ``strategy.stream_manager`` so the
+    symbol set can be changed while running.  With ``ws_base_interval`` only
+    that kline stream is subscribed and the strategy aggregates the rest.
+    """
+    base = config.get('ws_base_interval')
+    ws_tfs = [base] if base else config.get('ws_timeframes') or timeframes
+    if isinstance(ws_tfs, str):
+        ws_tfs = [ws_tfs]
+    # The base interval may be finer than any strategy timeframe (e.g. 1m).
+    valid = set(valid_timeframes) | ({base} if base else set())
+    invalid = [tf for tf in ws_tfs if tf not in valid]
+    if invalid:
+        logger.warning(f"Ignoring invalid WebSocket timeframes {invalid}")
+    manager = StreamManager(symbols, timeframes, strategy, config,
+                            ws_timeframes=[tf for tf in ws_tfs if tf in valid])
+    strategy.stream_manager = manager
+    await manager.run()